@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 from datetime import timedelta
 from contextlib import asynccontextmanager
@@ -13,7 +14,20 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
 
 
+from backend.db.session import init_engine, dispose_engine, get_pool_stats
+from backend.db.cache import get_cache_stats
+from backend.db.occupancy import build_occupancy, refresh_occupancy_periodically
+from backend.services.agent import init_agent
+from backend.services.persistence import message_writer
+from backend.services.response_cache import response_cache
+from backend.services.summary import wait_for_compactions
+from backend.services.tracing import trace_sink
+from backend.routes.availability import router as availability_router
 from backend.routes.chat import router as chat_router  
+from backend.routes.export import router as export_router
+from backend.routes.guests import router as guests_router
+from backend.routes.session import router as session_router
+from backend.routes.traces import router as traces_router
 from backend.routes.reservations import router as reservations_router 
 from backend.routes.service_orders import router as service_orders_router 
 
@@ -26,8 +40,20 @@ async def lifespan(app: FastAPI):
     Lifespan context manager: runs any startup/shutdown logic if needed.
     """
     # STARTUP LOGIC
+    init_engine()
+    init_agent()
+    await build_occupancy()
+    occupancy_refresh = asyncio.create_task(refresh_occupancy_periodically())
+    trace_flush = asyncio.create_task(trace_sink.run())
     yield
     # SHUTDOWN LOGIC
+    occupancy_refresh.cancel()
+    trace_flush.cancel()
+    await trace_sink.flush()
+    # queued turns first: writing them can schedule more compactions
+    await message_writer.close()
+    await wait_for_compactions()
+    await dispose_engine()
 
 
 def create_app() -> FastAPI:
@@ -65,6 +91,11 @@ def create_app() -> FastAPI:
     app.include_router(chat_router)
     app.include_router(reservations_router)
     app.include_router(service_orders_router)
+    app.include_router(availability_router)
+    app.include_router(guests_router)
+    app.include_router(session_router)
+    app.include_router(export_router)
+    app.include_router(traces_router)
 
     # 10) Minimal 400 handler for pydantic validation
     @app.exception_handler(RequestValidationError)
@@ -79,4 +110,24 @@ def create_app() -> FastAPI:
     async def ping():
         return JSONResponse(status_code=200, content={"message": "pong"})
 
+    # 12) DB connection pool counters
+    @app.get("/metrics/db_pool")
+    async def db_pool_metrics():
+        return JSONResponse(status_code=200, content=get_pool_stats())
+
+    # 13) repository result cache counters
+    @app.get("/metrics/cache")
+    async def cache_metrics():
+        return JSONResponse(status_code=200, content=get_cache_stats())
+
+    # 14) write-behind chat message queue
+    @app.get("/metrics/message_writer")
+    async def message_writer_metrics():
+        return JSONResponse(status_code=200, content=message_writer.get_stats())
+
+    # 15) cached chat answers
+    @app.get("/metrics/response_cache")
+    async def response_cache_metrics():
+        return JSONResponse(status_code=200, content=response_cache.get_stats())
+
     return app
@@ -0,0 +1,204 @@
+import os
+import time
+import logging
+import functools
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+# bounds staleness from writes made by other processes, which do not bump our versions
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+# replica reads are not cached for this long after we write one of their tables,
+# since the replica may not have replayed the write yet
+CACHE_REPLICA_LAG_SECONDS = float(os.getenv("CACHE_REPLICA_LAG_SECONDS", "5"))
+
+
+class TableVersions:
+    """
+    Per-table write counters. Repository write methods bump the tables they
+    touch (see invalidates); a cached read is only served while the versions
+    of every table it read are unchanged.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._bumped_at: Dict[str, float] = {}
+
+    def bump(self, *tables: str) -> None:
+        now = time.monotonic()
+        for table in tables:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            self._bumped_at[table] = now
+
+    def snapshot(self, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def written_within(self, tables: Tuple[str, ...], seconds: float) -> bool:
+        """
+        Whether any of `tables` was bumped in the last `seconds`.
+        """
+        since = time.monotonic() - seconds
+        return any(self._bumped_at.get(table, float("-inf")) > since for table in tables)
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self._versions)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    expired: int = 0
+    evictions: int = 0
+    replica_skips: int = 0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    tables: Tuple[str, ...]
+    versions: Tuple[int, ...]
+    expires_at: float
+
+
+class ResultCache:
+    """
+    In-process LRU + TTL cache of repository read results,
+    validated against TableVersions on every hit.
+    """
+
+    def __init__(self, versions: TableVersions, max_entries: int = CACHE_MAX_ENTRIES):
+        self.versions = versions
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return False, None
+
+        if entry.expires_at <= time.monotonic():
+            self.stats.expired += 1
+        elif entry.versions != self.versions.snapshot(entry.tables):
+            self.stats.stale += 1
+        else:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, entry.value
+
+        del self._entries[key]
+        self.stats.misses += 1
+        return False, None
+
+    def put(self, key: Hashable, value: Any, tables: Tuple[str, ...], versions: Tuple[int, ...], ttl: float) -> None:
+        self._entries[key] = _Entry(value, tables, versions, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+table_versions = TableVersions()
+result_cache = ResultCache(table_versions)
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _copy(value: Any) -> Any:
+    # callers get their own list; the schemas inside are shared and must not be mutated
+    return list(value) if isinstance(value, list) else value
+
+
+def _served_by_replica(repository: Any) -> bool:
+    # RoutingSession (backend.db.session) records its replica in session.info
+    info = getattr(getattr(repository, "db", None), "info", None) or {}
+    return "replica" in info and not info.get("use_primary")
+
+
+def cached(*tables: str, ttl: float = CACHE_TTL_SECONDS) -> Callable:
+    """
+    Cache an async repository read by method and arguments. `tables` are the
+    tables the query reads; a write to any of them invalidates the entry.
+
+    Only for plain reads: not for locking reads (FOR UPDATE) or reads that
+    must see the caller's uncommitted writes. A read served by a replica is
+    returned but not stored while one of its tables was written in the last
+    CACHE_REPLICA_LAG_SECONDS, so a lagging replica cannot cache pre-write rows
+    under the post-write version.
+    """
+    def decorator(method: Callable) -> Callable:
+        name = method.__qualname__
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if not CACHE_ENABLED:
+                return await method(self, *args, **kwargs)
+
+            key = (name, _freeze(args), _freeze(kwargs))
+            hit, value = result_cache.get(key)
+            if hit:
+                return _copy(value)
+
+            # taken before the query, so a write that lands mid-read leaves the entry already stale
+            versions = table_versions.snapshot(tables)
+            value = await method(self, *args, **kwargs)
+            if _served_by_replica(self) and table_versions.written_within(tables, CACHE_REPLICA_LAG_SECONDS):
+                result_cache.stats.replica_skips += 1
+                return _copy(value)
+            result_cache.put(key, value, tables, versions, ttl)
+            return _copy(value)
+
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables: str) -> Callable:
+    """
+    Bump the versions of `tables` after an async repository write runs,
+    whether or not it succeeded.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                table_versions.bump(*tables)
+
+        return wrapper
+    return decorator
+
+
+def get_cache_stats() -> dict:
+    """
+    Snapshot of the result cache counters, size and table versions.
+    """
+    return {
+        **asdict(result_cache.stats),
+        "entries": len(result_cache),
+        "max_entries": result_cache.max_entries,
+        "ttl_seconds": CACHE_TTL_SECONDS,
+        "replica_lag_seconds": CACHE_REPLICA_LAG_SECONDS,
+        "enabled": CACHE_ENABLED,
+        "table_versions": table_versions.as_dict(),
+    }
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, BigInteger, String, Numeric, DateTime, text, Boolean, ForeignKey
-from sqlalchemy.dialects.postgresql import CITEXT, TEXT
+from sqlalchemy.dialects.postgresql import BYTEA, CITEXT, TEXT
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
 
@@ -62,6 +62,9 @@ class Session(Base):
     
     session_id = Column(BigInteger, primary_key=True, autoincrement=True)
     guest_id = Column(BigInteger, ForeignKey('guests.guest_id'), nullable=False)
+    # rolling summary of every message pair up to summary_through_message_id
+    summary = Column(TEXT, nullable=True)
+    summary_through_message_id = Column(BigInteger, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -74,5 +77,6 @@ class MessagePair(Base):
     guest_id = Column(BigInteger, ForeignKey('guests.guest_id'), nullable=False)
     user_message = Column(TEXT, nullable=False)
     ai_message = Column(TEXT, nullable=False)
+    transcript = Column(BYTEA, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
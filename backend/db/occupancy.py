@@ -0,0 +1,225 @@
+import os
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.schemas.reservation import ReservationSchema
+
+logger = logging.getLogger(__name__)
+
+OCCUPANCY_HORIZON_DAYS = int(os.getenv("OCCUPANCY_HORIZON_DAYS", "365"))
+# how many days before today the matrix starts, so recent stays still count
+OCCUPANCY_LOOKBACK_DAYS = int(os.getenv("OCCUPANCY_LOOKBACK_DAYS", "7"))
+OCCUPANCY_REFRESH_SECONDS = float(os.getenv("OCCUPANCY_REFRESH_SECONDS", "300"))
+
+
+def _night(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+class OccupancyMatrix:
+    """
+    In-process rooms x nights occupancy counts.
+
+    counts[room, night] is the number of active reservations holding that
+    room on that night; a room-night is free when it is 0. A stay occupies
+    the nights check_in.date() up to (not including) check_out.date(), and
+    at least one night.
+
+    Built from the reservations table (see build) and kept current by the
+    ReservationRepository write methods. Each worker process has its own copy,
+    so the app lifespan also rebuilds it every OCCUPANCY_REFRESH_SECONDS to
+    pick up writes made by other processes.
+    """
+
+    def __init__(self):
+        self.origin: Optional[date] = None
+        self.horizon_days = 0
+        self.counts = np.zeros((0, 0), dtype=np.uint16)
+        self.room_index: dict[int, int] = {}
+        self.type_rows: dict[str, np.ndarray] = {}
+        # reservation_id -> (row, first night, end night) currently applied
+        self._applied: dict[int, tuple[int, int, int]] = {}
+        # one per running build: writes applied while its reads are in flight
+        self._journals: list[list[tuple[str, object]]] = []
+
+    @property
+    def is_built(self) -> bool:
+        return self.origin is not None
+
+    async def build(
+        self,
+        db: AsyncSession,
+        origin: Optional[date] = None,
+        horizon_days: int = OCCUPANCY_HORIZON_DAYS
+    ) -> None:
+        """
+        (Re)build the whole matrix from the rooms and reservations tables.
+
+        apply/remove calls made while the reads are in flight are journaled
+        and replayed on the new matrix, so a write racing the rebuild is not lost.
+        Replaying is idempotent, so writes the reads already saw are harmless.
+        """
+        # imported here to avoid a cycle: the reservation repository updates this module
+        from backend.db.repositories.room import RoomRepository
+        from backend.db.repositories.reservation import ReservationRepository
+
+        if origin is None:
+            origin = datetime.now(timezone.utc).date() - timedelta(days=OCCUPANCY_LOOKBACK_DAYS)
+        window_start = datetime.combine(origin, datetime.min.time(), tzinfo=timezone.utc)
+        window_end = window_start + timedelta(days=horizon_days)
+
+        journal: list[tuple[str, object]] = []
+        self._journals.append(journal)
+        try:
+            rooms = await RoomRepository(db=db).list_rooms()
+            reservations = await ReservationRepository(db=db).list_active_reservations_between(
+                window_start, window_end
+            )
+        finally:
+            self._journals.remove(journal)
+
+        room_index = {room.room_id: row for row, room in enumerate(rooms)}
+        type_rows: dict[str, list[int]] = {}
+        for row, room in enumerate(rooms):
+            type_rows.setdefault(room.room_type, []).append(row)
+
+        self.origin = origin
+        self.horizon_days = horizon_days
+        self.room_index = room_index
+        self.type_rows = {room_type: np.array(rows, dtype=np.intp) for room_type, rows in type_rows.items()}
+
+        spans = [self._span(r) for r in reservations]
+        spans = [(r.reservation_id, span) for r, span in zip(reservations, spans) if span is not None]
+
+        # difference array: +1 at the first night, -1 after the last, then a running sum
+        diff = np.zeros((len(rooms), horizon_days + 1), dtype=np.int32)
+        if spans:
+            rows, starts, ends = (np.array(col, dtype=np.intp) for col in zip(*(span for _, span in spans)))
+            np.add.at(diff, (rows, starts), 1)
+            np.add.at(diff, (rows, ends), -1)
+        self.counts = np.cumsum(diff[:, :-1], axis=1).astype(np.uint16)
+        self._applied = dict(spans)
+
+        for action, value in journal:
+            if action == "apply":
+                self.apply(value)
+            else:
+                self.remove(value)
+
+        logger.info(
+            "Built occupancy matrix: %s rooms x %s nights from %s (%s reservations)",
+            len(rooms), horizon_days, origin, len(spans)
+        )
+
+    def _span(self, reservation: ReservationSchema) -> Optional[tuple[int, int, int]]:
+        """
+        Map a reservation to (row, first night, end night) clipped to the matrix,
+        or None if it is inactive, outside the window or on an unknown room.
+        """
+        row = self.room_index.get(reservation.room_id)
+        if row is None or reservation.status == "cancelled":
+            return None
+
+        first = (_night(reservation.check_in) - self.origin).days
+        end = max((_night(reservation.check_out) - self.origin).days, first + 1)
+        first, end = max(first, 0), min(end, self.horizon_days)
+        if first >= end:
+            return None
+        return row, first, end
+
+    def apply(self, reservation: ReservationSchema) -> None:
+        """
+        Record a created or updated reservation, replacing whatever
+        was previously applied for the same reservation_id.
+        """
+        for journal in self._journals:
+            journal.append(("apply", reservation))
+        if not self.is_built:
+            return
+        self._release(reservation.reservation_id)
+
+        span = self._span(reservation)
+        if span is None:
+            return
+        row, first, end = span
+        self.counts[row, first:end] += 1
+        self._applied[reservation.reservation_id] = span
+
+    def remove(self, reservation_id: int) -> None:
+        """
+        Release the room-nights held by a deleted or cancelled reservation.
+        """
+        for journal in self._journals:
+            journal.append(("remove", reservation_id))
+        self._release(reservation_id)
+
+    def _release(self, reservation_id: int) -> None:
+        span = self._applied.pop(reservation_id, None)
+        if span is None:
+            return
+        row, first, end = span
+        self.counts[row, first:end] -= 1
+
+    def free_counts(self, start: date, end: date, room_type: Optional[str] = None) -> dict[str, list[int]]:
+        """
+        Number of free rooms per room_type for each night in [start, end).
+        Raises ValueError if the window is empty or outside the matrix.
+        """
+        if not self.is_built:
+            raise ValueError("Occupancy matrix has not been built yet")
+        if start >= end:
+            raise ValueError("start must be before end")
+
+        first = (start - self.origin).days
+        last = (end - self.origin).days
+        if first < 0 or last > self.horizon_days:
+            horizon_end = self.origin + timedelta(days=self.horizon_days)
+            raise ValueError(f"Availability is only known between {self.origin} and {horizon_end}")
+
+        if room_type is not None:
+            if room_type not in self.type_rows:
+                raise ValueError(f"Unknown room type {room_type}")
+            types = {room_type: self.type_rows[room_type]}
+        else:
+            types = self.type_rows
+
+        window = self.counts[:, first:last] == 0
+        return {
+            name: np.count_nonzero(window[rows], axis=0).tolist()
+            for name, rows in types.items()
+        }
+
+
+occupancy = OccupancyMatrix()
+
+
+async def build_occupancy() -> None:
+    """
+    Build the shared matrix on its own session. Failures are logged, not
+    raised, so the app still starts; the availability service builds lazily.
+    """
+    from backend.db import session as db_session
+
+    if db_session.routing_session_factory is None:
+        db_session.init_engine()
+    try:
+        async with db_session.routing_session_factory() as db:
+            await occupancy.build(db)
+    except Exception:
+        logger.exception("Failed to build occupancy matrix")
+
+
+async def refresh_occupancy_periodically(interval: float = OCCUPANCY_REFRESH_SECONDS) -> None:
+    """
+    Rebuild the shared matrix every `interval` seconds. Run as a background task.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        await build_occupancy()
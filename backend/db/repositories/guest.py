@@ -1,24 +1,47 @@
+import os
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from typing import AsyncIterator, Optional
 from backend.schemas.guest import GuestSchema
 from backend.db.models import Guest 
+from backend.db.cache import cached, invalidates
+
+# guest lookups back authentication on every request; kept short since
+# guests changed by other processes are only picked up when this expires
+GUEST_CACHE_TTL_SECONDS = float(os.getenv("GUEST_CACHE_TTL_SECONDS", "60"))
 
 class GuestRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def list_guests(self) -> list[GuestSchema]:
+    async def list_guests(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> list[GuestSchema]:
         """
-        Fetch all guests from the database and return them
-        as a list of GuestSchema.
+        Fetch guests from the database ordered by guest_id, starting after
+        after_id and returning at most limit rows, as a list of GuestSchema.
         """
-        result = await self.db.execute(select(Guest))
+        stmt = select(Guest).order_by(Guest.guest_id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(Guest.guest_id > after_id)
+
+        result = await self.db.execute(stmt)
         rows = result.scalars().all()
 
         guest_schemas = [GuestSchema.model_validate(r) for r in rows]
 
         return guest_schemas
     
+    async def stream_guests(self, batch_size: int = 1000) -> AsyncIterator[list[GuestSchema]]:
+        """
+        Stream every guest ordered by guest_id through a server-side cursor,
+        yielding batches of at most batch_size GuestSchemas.
+        """
+        result = await self.db.stream_scalars(
+            select(Guest).order_by(Guest.guest_id).execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            yield [GuestSchema.model_validate(r) for r in rows]
+
+    @cached("guests", ttl=GUEST_CACHE_TTL_SECONDS)
     async def get_guest_by_id(self, guest_id: int) -> GuestSchema:
         """
         Fetch a guest by their ID from the database
@@ -32,6 +55,7 @@ class GuestRepository:
         
         return GuestSchema.model_validate(row)
     
+    @cached("guests", ttl=GUEST_CACHE_TTL_SECONDS)
     async def get_guest_by_email(self, email: str) -> GuestSchema:
         """
         Fetch a guest by their email from the database
@@ -45,6 +69,7 @@ class GuestRepository:
         
         return GuestSchema.model_validate(row)
     
+    @invalidates("guests")
     async def create_guest(self, guest: GuestSchema) -> GuestSchema:
         """
         Create a new guest in the database
@@ -57,6 +82,7 @@ class GuestRepository:
         
         return GuestSchema.model_validate(new_guest)
     
+    @invalidates("guests")
     async def delete_guest(self, email: int) -> bool:
         """
         Delete a guest by their email from the database.
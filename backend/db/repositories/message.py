@@ -1,17 +1,30 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
+from typing import AsyncIterator, Optional
 
 from backend.schemas.message import MessageSchema, MessagePairSchema
 from backend.db.models import MessagePair
 
+
+def _to_message_pair(row: MessagePair) -> MessagePairSchema:
+    return MessagePairSchema(
+        message_id=row.message_id,
+        guest_id=row.guest_id,
+        session_id=row.session_id,
+        user_message=MessageSchema(content=row.user_message, role="user"),
+        ai_message=MessageSchema(content=row.ai_message, role="assistant"),
+        transcript=row.transcript,
+    )
+
+
 class MessageRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def add_message(self, message: MessagePairSchema) -> bool:
         """
-        Add a new message pair to the database and return
-        it as a MessagePairSchema.
+        Add a new message pair to the database and set the
+        generated message_id on the given MessagePairSchema.
         
         We'll store only the 'content' in user_message / ai_message columns
         and rely on the 'role' field in your Pydantic model if needed for the app logic.
@@ -20,45 +33,70 @@ class MessageRepository:
             guest_id=message.guest_id,
             session_id=message.session_id,
             user_message=message.user_message.content,   
-            ai_message=message.ai_message.content        
+            ai_message=message.ai_message.content,
+            transcript=message.transcript
         )
 
         self.db.add(new_message_pair)
         await self.db.commit()
         await self.db.refresh(new_message_pair)
+        message.message_id = new_message_pair.message_id
 
         return True
     
-    async def list_messages(self) -> list[MessagePairSchema]:
+    async def add_messages(self, messages: list[MessagePairSchema]) -> list[int]:
+        """
+        Insert many message pairs with a single multi-row INSERT ... RETURNING,
+        commit once, set each generated message_id on its MessagePairSchema
+        and return the ids in input order.
+        """
+        if not messages:
+            return []
+
+        result = await self.db.execute(
+            insert(MessagePair).returning(MessagePair.message_id, sort_by_parameter_order=True),
+            [
+                {
+                    "guest_id": m.guest_id,
+                    "session_id": m.session_id,
+                    "user_message": m.user_message.content,
+                    "ai_message": m.ai_message.content,
+                    "transcript": m.transcript,
+                }
+                for m in messages
+            ]
+        )
+        message_ids = list(result.scalars().all())
+        await self.db.commit()
+
+        for message, message_id in zip(messages, message_ids):
+            message.message_id = message_id
+        return message_ids
+
+    async def list_messages(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> list[MessagePairSchema]:
         """
-        Fetch all messages from the database and return them
-        as a list of MessagePairSchema.
+        Fetch messages from the database ordered by message_id, starting after
+        after_id and returning at most limit rows, as a list of MessagePairSchema.
         """
-        result = await self.db.execute(select(MessagePair))
+        stmt = select(MessagePair).order_by(MessagePair.message_id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(MessagePair.message_id > after_id)
+
+        result = await self.db.execute(stmt)
         rows = result.scalars().all()
 
-        message_pairs = []
-        for row in rows:
-            message_pairs.append(
-                MessagePairSchema(
-                    message_id=row.message_id,
-                    guest_id=row.guest_id,
-                    session_id=row.session_id,
-                    user_message=MessageSchema(
-                        content=row.user_message,
-                        role="user", 
-                        created_at=None,
-                        updated_at=None,
-                    ),
-                    ai_message=MessageSchema(
-                        content=row.ai_message,
-                        role="assistant", 
-                        created_at=None,
-                        updated_at=None,
-                    )
-                )
-            )
-        return message_pairs
+        return [_to_message_pair(row) for row in rows]
+
+    async def stream_messages(self, batch_size: int = 1000) -> AsyncIterator[list[MessagePairSchema]]:
+        """
+        Stream every message pair ordered by message_id through a server-side
+        cursor, yielding batches of at most batch_size MessagePairSchemas.
+        """
+        result = await self.db.stream_scalars(
+            select(MessagePair).order_by(MessagePair.message_id).execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            yield [_to_message_pair(row) for row in rows]
 
     async def get_messages_by_session_id(self, session_id: int) -> list[MessagePairSchema]:
         """
@@ -84,11 +122,61 @@ class MessageRepository:
                     ai_message=MessageSchema(
                         content=row.ai_message,
                         role="assistant",
-                    )
+                    ),
+                    transcript=row.transcript
                 )
             )
         return message_pairs
 
+    async def get_recent_messages_by_session_id(
+        self,
+        session_id: int,
+        limit: int,
+        after_id: Optional[int] = None
+    ) -> list[MessagePairSchema]:
+        """
+        Fetch the most recent limit message pairs for a session (only those
+        after after_id, if given), returned oldest first so they can be
+        replayed as conversation history.
+        """
+        stmt = (
+            select(MessagePair)
+            .where(MessagePair.session_id == session_id)
+            .order_by(MessagePair.message_id.desc())
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(MessagePair.message_id > after_id)
+
+        result = await self.db.execute(stmt)
+        rows = result.scalars().all()
+
+        return [_to_message_pair(row) for row in reversed(rows)]
+
+    async def get_messages_by_session_id_after(
+        self,
+        session_id: int,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> list[MessagePairSchema]:
+        """
+        Fetch message pairs for a session ordered by message_id, starting
+        after after_id and returning at most limit rows.
+        """
+        stmt = (
+            select(MessagePair)
+            .where(MessagePair.session_id == session_id)
+            .order_by(MessagePair.message_id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(MessagePair.message_id > after_id)
+
+        result = await self.db.execute(stmt)
+        rows = result.scalars().all()
+
+        return [_to_message_pair(row) for row in rows]
+
     async def delete_messages_by_session_id(self, session_id: int) -> bool:
         """
         Delete all messages for a specific session from the database.
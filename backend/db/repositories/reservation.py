@@ -1,27 +1,122 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from backend.schemas.reservation import ReservationSchema
 from backend.db.models import Reservation
+from backend.db.cache import cached, invalidates
+from backend.db.occupancy import occupancy
+from backend.db.repositories.room import stay_range
+
+# SQLSTATE of an ex_reservations_room_stay violation (migration 010)
+EXCLUSION_VIOLATION = "23P01"
+
+
+class RoomUnavailableError(ValueError):
+    """
+    Another active reservation already holds the room for an overlapping stay.
+    """
+
+
+def _is_room_conflict(error: IntegrityError) -> bool:
+    return getattr(error.orig, "sqlstate", None) == EXCLUSION_VIOLATION
+
 
 class ReservationRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def list_reservations(self) -> list[ReservationSchema]:
-        result = await self.db.execute(select(Reservation))
+    async def list_reservations(
+        self,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> list[ReservationSchema]:
+        """
+        Keyset paginated: rows ordered by reservation_id, starting after after_id.
+        """
+        stmt = select(Reservation).order_by(Reservation.reservation_id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(Reservation.reservation_id > after_id)
+
+        result = await self.db.execute(stmt)
+        rows = result.scalars().all()
+        return [ReservationSchema.model_validate(r) for r in rows]
+
+    async def stream_reservations(self, batch_size: int = 1000) -> AsyncIterator[list[ReservationSchema]]:
+        """
+        Stream every reservation ordered by reservation_id through a server-side cursor,
+        yielding batches of at most batch_size ReservationSchemas.
+        """
+        result = await self.db.stream_scalars(
+            select(Reservation).order_by(Reservation.reservation_id).execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            yield [ReservationSchema.model_validate(r) for r in rows]
+
+    @cached("reservations")
+    async def list_reservations_by_guest_id(
+        self,
+        guest_id: int,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> list[ReservationSchema]:
+        """
+        Keyset paginated: rows ordered by reservation_id, starting after after_id.
+        """
+        stmt = (
+            select(Reservation)
+            .where(Reservation.guest_id == guest_id)
+            .order_by(Reservation.reservation_id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(Reservation.reservation_id > after_id)
+
+        result = await self.db.execute(stmt)
+        rows = result.scalars().all()
+        return [ReservationSchema.model_validate(r) for r in rows]
+
+    async def list_active_reservations_between(self, start: datetime, end: datetime) -> list[ReservationSchema]:
+        """
+        Fetch every non-cancelled reservation whose stay overlaps [start, end).
+        """
+        result = await self.db.execute(
+            select(Reservation).where(
+                Reservation.status != "cancelled",
+                stay_range(Reservation.check_in, Reservation.check_out).op("&&")(stay_range(start, end))
+            )
+        )
         rows = result.scalars().all()
         return [ReservationSchema.model_validate(r) for r in rows]
 
-    async def list_reservations_by_guest_id(self, guest_id: int) -> list[ReservationSchema]:
+    async def get_reservation_by_id(self, reservation_id: int) -> ReservationSchema:
         result = await self.db.execute(
-            select(Reservation).where(Reservation.guest_id == guest_id)
+            select(Reservation).where(Reservation.reservation_id == reservation_id)
+        )
+        row = result.scalars().first()
+
+        if not row:
+            raise ValueError(f"Reservation with id={reservation_id} not found")
+
+        return ReservationSchema.model_validate(row)
+
+    async def get_reservations_by_ids(self, reservation_ids: list[int]) -> list[ReservationSchema]:
+        """
+        Fetch every reservation whose id is in reservation_ids with a single IN query.
+        Ids that don't exist are simply missing from the result.
+        """
+        if not reservation_ids:
+            return []
+
+        result = await self.db.execute(
+            select(Reservation).where(Reservation.reservation_id.in_(set(reservation_ids)))
         )
         rows = result.scalars().all()
         return [ReservationSchema.model_validate(r) for r in rows]
 
+    @invalidates("reservations")
     async def create_reservation(self, reservation: ReservationSchema) -> ReservationSchema:
         if reservation.check_in >= reservation.check_out:
             raise ValueError("check_in must be before check_out")
@@ -34,11 +129,60 @@ class ReservationRepository:
             status=reservation.status,
         )
         self.db.add(new_reservation)
-        await self.db.commit()
+        try:
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            if _is_room_conflict(e):
+                raise RoomUnavailableError(f"Room {reservation.room_id} is no longer available for the requested date range.") from e
+            raise
         await self.db.refresh(new_reservation)
 
-        return ReservationSchema.model_validate(new_reservation)
+        created = ReservationSchema.model_validate(new_reservation)
+        occupancy.apply(created)
+
+        return created
+
+    @invalidates("reservations")
+    async def create_reservations(self, reservations: list[ReservationSchema]) -> list[ReservationSchema]:
+        """
+        Insert many reservations with a single multi-row INSERT ... RETURNING
+        and commit once. Nothing is written if any reservation is invalid,
+        and RoomUnavailableError is raised if any room is already held for an
+        overlapping stay.
+        """
+        for reservation in reservations:
+            if reservation.check_in >= reservation.check_out:
+                raise ValueError("check_in must be before check_out")
 
+        try:
+            result = await self.db.execute(
+                insert(Reservation).returning(Reservation, sort_by_parameter_order=True),
+                [
+                    {
+                        "guest_id": r.guest_id,
+                        "room_id": r.room_id,
+                        "check_in": r.check_in,
+                        "check_out": r.check_out,
+                        "status": r.status,
+                    }
+                    for r in reservations
+                ]
+            )
+            created = [ReservationSchema.model_validate(r) for r in result.scalars().all()]
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            if _is_room_conflict(e):
+                raise RoomUnavailableError("A requested room is no longer available for the requested date range.") from e
+            raise
+
+        for reservation in created:
+            occupancy.apply(reservation)
+
+        return created
+
+    @invalidates("reservations")
     async def update_reservation(
         self,
         reservation_id: int,
@@ -81,13 +225,24 @@ class ReservationRepository:
             row.status = new_status
 
         # 3) Commit changes
-        await self.db.commit()
+        room_id = row.room_id
+        try:
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            if _is_room_conflict(e):
+                raise RoomUnavailableError(f"Room {room_id} is no longer available for the requested date range.") from e
+            raise
         await self.db.refresh(row)
 
-        print(f"Updated reservation: {ReservationSchema.model_validate(row)}")
+        updated = ReservationSchema.model_validate(row)
+        occupancy.apply(updated)
 
-        return ReservationSchema.model_validate(row)
+        print(f"Updated reservation: {updated}")
+
+        return updated
     
+    @invalidates("reservations")
     async def delete_reservation(self, reservation_id: int) -> bool:
         result = await self.db.execute(
             select(Reservation).where(Reservation.reservation_id == reservation_id)
@@ -100,8 +255,9 @@ class ReservationRepository:
 
         print(f"\n\nrow: {ReservationSchema.model_validate(row)}\n\n")
 
-        self.db.delete(row)
+        await self.db.delete(row)
 
         await self.db.commit()
+        occupancy.remove(reservation_id)
 
         return True
\ No newline at end of file
@@ -1,12 +1,40 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, literal_column, and_, exists
+from datetime import datetime
+from typing import Optional
 from backend.schemas.room import RoomSchema
-from backend.db.models import Room 
+from backend.db.models import Room, Reservation
+from backend.db.cache import cached
+
+
+def stay_range(check_in, check_out):
+    """
+    Half-open [check_in, check_out) tstzrange. The bounds are a literal so the
+    expression matches ix_reservations_active_stay_gist.
+    """
+    return func.tstzrange(check_in, check_out, literal_column("'[)'"))
+
+
+def _overlapping_reservation(check_in: datetime, check_out: datetime, exclude_reservation_id: Optional[int] = None):
+    """
+    EXISTS clause matching an active reservation on the outer room
+    that overlaps [check_in, check_out).
+    """
+    conditions = [
+        Reservation.room_id == Room.room_id,
+        Reservation.status != "cancelled",
+        stay_range(Reservation.check_in, Reservation.check_out).op("&&")(stay_range(check_in, check_out)),
+    ]
+    if exclude_reservation_id is not None:
+        conditions.append(Reservation.reservation_id != exclude_reservation_id)
+
+    return exists().where(and_(*conditions))
 
 class RoomRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @cached("rooms")
     async def list_rooms(self) -> list[RoomSchema]:
         """
         Fetch all rooms from the database and return them
@@ -19,6 +47,7 @@ class RoomRepository:
 
         return room_schemas
 
+    @cached("rooms")
     async def list_rooms_by_type(self, room_type: str) -> list[RoomSchema]:
         """
         Fetch rooms of a specific type from the database
@@ -31,18 +60,87 @@ class RoomRepository:
 
         return room_schemas
     
-    async def list_available_rooms_by_type(self, room_type: str) -> list[RoomSchema]:
+    async def list_available_rooms_by_type(
+        self,
+        room_type: str,
+        check_in: Optional[datetime] = None,
+        check_out: Optional[datetime] = None,
+        exclude_reservation_id: Optional[int] = None
+    ) -> list[RoomSchema]:
         """
-        Fetch available rooms of a specific type from the database
-        and return them as a list of RoomSchema.
+        Fetch rooms of a specific type that have no active reservation
+        overlapping [check_in, check_out) and return them as a list of RoomSchema.
+        Without dates every room of the type is returned.
         """
-        result = await self.db.execute(select(Room).where(Room.room_type == room_type))
+        stmt = select(Room).where(Room.room_type == room_type).order_by(Room.room_id)
+        if check_in is not None and check_out is not None:
+            stmt = stmt.where(~_overlapping_reservation(check_in, check_out, exclude_reservation_id))
+
+        result = await self.db.execute(stmt)
         rows = result.scalars().all()
 
         room_schemas = [RoomSchema.model_validate(r) for r in rows]
 
         return room_schemas
 
+    async def find_available_rooms(
+        self,
+        room_type: str,
+        check_in: datetime,
+        check_out: datetime,
+        limit: int,
+        exclude_reservation_id: Optional[int] = None,
+        prefer_room_id: Optional[int] = None
+    ) -> list[RoomSchema]:
+        """
+        Pick up to `limit` free rooms of the given type for [check_in, check_out),
+        preferring prefer_room_id when it is free.
+
+        This is only a snapshot: a concurrent booking may take a returned room
+        before the caller commits. The ex_reservations_room_stay constraint
+        rejects the second booking, which ReservationRepository raises as
+        RoomUnavailableError.
+        """
+        ordering = [Room.room_id]
+        if prefer_room_id is not None:
+            ordering.insert(0, (Room.room_id == prefer_room_id).desc())
+
+        stmt = (
+            select(Room)
+            .where(
+                Room.room_type == room_type,
+                ~_overlapping_reservation(check_in, check_out, exclude_reservation_id)
+            )
+            .order_by(*ordering)
+            .limit(limit)
+        )
+
+        result = await self.db.execute(stmt)
+        rows = result.scalars().all()
+
+        return [RoomSchema.model_validate(r) for r in rows]
+
+    async def find_available_room(
+        self,
+        room_type: str,
+        check_in: datetime,
+        check_out: datetime,
+        exclude_reservation_id: Optional[int] = None,
+        prefer_room_id: Optional[int] = None
+    ) -> Optional[RoomSchema]:
+        """
+        Pick one free room of the given type for [check_in, check_out)
+        (see find_available_rooms). Returns None if no room is free.
+        """
+        rooms = await self.find_available_rooms(
+            room_type, check_in, check_out, 1, exclude_reservation_id, prefer_room_id
+        )
+        if not rooms:
+            return None
+
+        return rooms[0]
+
+    @cached("rooms")
     async def get_room_by_room_id(self, room_id: str) -> RoomSchema:
         """
         Fetch a room by its room number from the database
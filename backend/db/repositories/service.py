@@ -2,11 +2,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from backend.schemas.service import ServiceSchema
 from backend.db.models import Service 
+from backend.db.cache import cached
 
 class ServiceRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @cached("services")
     async def list_services(self) -> list[ServiceSchema]:
         """
         Fetch all rooms from the database and return them
@@ -19,6 +21,7 @@ class ServiceRepository:
 
         return room_schemas
     
+    @cached("services")
     async def get_service_by_id(self, service_id: int) -> ServiceSchema:
         """
         Fetch a single service by its id and return it as a ServiceSchema.
@@ -28,4 +31,18 @@ class ServiceRepository:
 
         service_schema = ServiceSchema.model_validate(row)
 
-        return service_schema
\ No newline at end of file
+        return service_schema
+
+    @cached("services")
+    async def get_services_by_ids(self, service_ids: list[int]) -> list[ServiceSchema]:
+        """
+        Fetch every service whose id is in service_ids with a single IN query.
+        Ids that don't exist are simply missing from the result.
+        """
+        if not service_ids:
+            return []
+
+        result = await self.db.execute(select(Service).where(Service.service_id.in_(set(service_ids))))
+        rows = result.scalars().all()
+
+        return [ServiceSchema.model_validate(r) for r in rows]
@@ -1,12 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, insert
+from sqlalchemy.exc import IntegrityError
 from backend.schemas.service import ServiceOrderSchema
 from backend.db.models import ServiceOrders 
+from backend.db.cache import cached, invalidates
 
 class ServiceOrderRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @cached("service_orders")
     async def list_service_order_by_reservation_id(self, reservation_id: int) -> list[ServiceOrderSchema]:
         """
         Fetch all service order for a particular reservation from the database and return them
@@ -31,6 +34,7 @@ class ServiceOrderRepository:
 
         return service_order_schema
     
+    @invalidates("service_orders")
     async def create_service_order(self, service_order: ServiceOrderSchema) -> ServiceOrderSchema:
         """
         Create a new service order in the database and return it as a ServiceOrderSchema.
@@ -48,6 +52,39 @@ class ServiceOrderRepository:
 
         return ServiceOrderSchema.model_validate(service_order_model)
     
+    @invalidates("service_orders")
+    async def create_service_orders(self, service_orders: list[ServiceOrderSchema]) -> list[ServiceOrderSchema]:
+        """
+        Create many service orders with a single multi-row INSERT ... RETURNING,
+        commit once and return them as ServiceOrderSchemas in input order.
+        Raises ValueError, with nothing written, if a row breaks a constraint
+        (e.g. its reservation was deleted after the caller checked it).
+        """
+        if not service_orders:
+            return []
+
+        try:
+            result = await self.db.execute(
+                insert(ServiceOrders).returning(ServiceOrders, sort_by_parameter_order=True),
+                [
+                    {
+                        "reservation_id": o.reservation_id,
+                        "service_id": o.service_id,
+                        "quantity": o.quantity,
+                        "status": o.status,
+                    }
+                    for o in service_orders
+                ]
+            )
+            created = [ServiceOrderSchema.model_validate(r) for r in result.scalars().all()]
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            raise ValueError("Cannot create orders. A reservation or service no longer exists.") from e
+
+        return created
+
+    @invalidates("service_orders")
     async def delete_service_order(self, order_id: int) -> ServiceOrderSchema:
         """
         Delete a service order from the database and return it as a ServiceOrderSchema.
@@ -62,6 +99,7 @@ class ServiceOrderRepository:
 
         return service_order_schema
     
+    @invalidates("service_orders")
     async def delete_service_orders_by_reservation_id(
         self, reservation_id: int
     ) -> bool:
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from typing import Optional
 from backend.schemas.session import SessionSchema
 from backend.db.models import Session 
 
@@ -7,12 +8,16 @@ class SessionRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def list_sessions(self) -> list[SessionSchema]:
+    async def list_sessions(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> list[SessionSchema]:
         """
-        Fetch all sessions from the database and return them
-        as a list of SessionSchema.
+        Fetch sessions from the database ordered by session_id, starting after
+        after_id and returning at most limit rows, as a list of SessionSchema.
         """
-        result = await self.db.execute(select(Session))
+        stmt = select(Session).order_by(Session.session_id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(Session.session_id > after_id)
+
+        result = await self.db.execute(stmt)
         rows = result.scalars().all()
 
         session_schemas = [SessionSchema.model_validate(r) for r in rows]
@@ -56,6 +61,24 @@ class SessionRepository:
 
         return session_schemas
     
+    async def update_session_summary(self, session_id: int, summary: str, through_message_id: int) -> bool:
+        """
+        Store the rolling summary for a session. Only moves forward: returns
+        False if the stored summary already covers through_message_id.
+        """
+        result = await self.db.execute(
+            update(Session)
+            .where(Session.session_id == session_id)
+            .where(
+                (Session.summary_through_message_id.is_(None))
+                | (Session.summary_through_message_id < through_message_id)
+            )
+            .values(summary=summary, summary_through_message_id=through_message_id)
+        )
+        await self.db.commit()
+
+        return result.rowcount > 0
+
     async def delete_sessions(self, guest_id: int) -> bool:
         """
         Delete all sessions for a specific guest from the database.
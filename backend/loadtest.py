@@ -0,0 +1,398 @@
+"""
+Load generator for a running app: concurrent guests sending a mix of
+/chat, reservation, service and service order requests.
+
+    ADMIN_API_TOKEN=secret CHAT_MODEL=stub uv run uvicorn main:app --port 8080
+    ADMIN_API_TOKEN=secret uv run python -m backend.loadtest --guests 20 --duration 60 --output run.json
+
+Closed loop (default): each guest waits for its response, thinks, then sends
+the next request. Open loop (--rate): requests arrive at a fixed average
+rate whether or not earlier ones finished, which shows queueing under load.
+The JSON report has throughput, latency percentiles, chat time to first
+token and error counts per endpoint.
+
+Two limits of the chat numbers:
+- /chat is hard-wired to guest 1 and session 1. Every simulated guest's chat
+  turn queues on that guest's lock and grows one shared history. Chat
+  latency is therefore one busy guest's latency, not many independent guests'.
+- The app's response cache answers repeats of the fixed prompts. The report
+  records whether it was enabled and its hits and misses during the run.
+  Use --unique-prompts, or start the app with CHAT_RESPONSE_CACHE_ENABLED=false,
+  to measure model turns only.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy
+
+DEFAULT_MIX = "chat=0.4,reservations=0.2,services=0.2,orders=0.2"
+
+CHAT_PROMPTS = [
+    "What services do you offer?",
+    "Can you show me my reservations?",
+    "What time is checkout?",
+    "Do I have any service orders on my booking?",
+    "Hi, I'd like some help with my stay.",
+]
+
+
+@dataclass
+class Sample:
+    scenario: str
+    ok: bool
+    latency: float
+    ttft: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class Fixtures:
+    """
+    Ids the scenarios pick from, read from the app before the run starts.
+    """
+    guest_ids: List[int] = field(default_factory=list)
+    reservation_ids: List[int] = field(default_factory=list)
+    service_ids: List[int] = field(default_factory=list)
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, fixtures: Fixtures, mix: Dict[str, float], args: argparse.Namespace):
+        self.client = client
+        self.fixtures = fixtures
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.samples: List[Sample] = []
+        self.chat_turns = 0
+        self.scenarios: Dict[str, Callable[[], Awaitable[Optional[float]]]] = {
+            "chat": self.chat,
+            "reservations": self.reservations,
+            "services": self.services,
+            "orders": self.orders,
+        }
+        unknown = set(mix) - set(self.scenarios)
+        if unknown:
+            raise ValueError(f"Unknown scenarios in --mix: {', '.join(sorted(unknown))}")
+        self.names = list(mix)
+        self.weights = list(mix.values())
+
+    ####################
+    # Scenarios
+    ####################
+
+    async def chat(self) -> Optional[float]:
+        """
+        One /chat turn. Returns the time to the first delta frame.
+        """
+        started = time.perf_counter()
+        ttft = None
+        message = self.random.choice(CHAT_PROMPTS)
+        self.chat_turns += 1
+        if self.args.unique_prompts:
+            # never a repeat, so the response cache cannot answer it
+            message = f"{message} (turn {self.chat_turns})"
+        payload = {"message": message}
+        async with self.client.stream("POST", "/chat", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                frame = json.loads(line)
+                if frame["type"] == "delta" and ttft is None:
+                    ttft = time.perf_counter() - started
+                elif frame["type"] == "error":
+                    raise ChatFrameError(frame.get("error", "error frame"))
+        return ttft
+
+    async def reservations(self) -> None:
+        guest_id = self.random.choice(self.fixtures.guest_ids)
+        response = await self.client.get(f"/reservations/{guest_id}")
+        response.raise_for_status()
+
+    async def services(self) -> None:
+        response = await self.client.get("/services")
+        response.raise_for_status()
+
+    async def orders(self) -> None:
+        """
+        Read a reservation's service orders; with --write-share, sometimes
+        create an order and delete it again so the data set does not grow.
+        """
+        reservation_id = self.random.choice(self.fixtures.reservation_ids)
+        if self.fixtures.service_ids and self.random.random() < self.args.write_share:
+            response = await self.client.post("/serviceorders", json={
+                "reservation_id": reservation_id,
+                "service_id": self.random.choice(self.fixtures.service_ids),
+                "quantity": 1,
+                "status": "pending",
+            })
+            response.raise_for_status()
+            response = await self.client.delete(f"/serviceorders/{response.json()['order_id']}")
+            response.raise_for_status()
+            return
+        response = await self.client.get(f"/serviceorders/by_reservation/{reservation_id}")
+        response.raise_for_status()
+
+    ####################
+    # Drivers
+    ####################
+
+    async def request(self) -> None:
+        name = self.random.choices(self.names, self.weights)[0]
+        started = time.perf_counter()
+        try:
+            ttft = await self.scenarios[name]()
+            self.samples.append(Sample(name, True, time.perf_counter() - started, ttft=ttft))
+        except Exception as e:
+            self.samples.append(Sample(name, False, time.perf_counter() - started, error=_error_kind(e)))
+
+    def think(self) -> float:
+        mean = self.args.think_time
+        return self.random.expovariate(1 / mean) if mean > 0 else 0
+
+    async def closed_loop(self, deadline: float) -> None:
+        async def guest():
+            while time.perf_counter() < deadline:
+                await self.request()
+                await asyncio.sleep(self.think())
+
+        await asyncio.gather(*(guest() for _ in range(self.args.guests)))
+
+    async def open_loop(self, deadline: float) -> None:
+        # at most --guests requests in flight; arrivals beyond that are dropped and counted
+        in_flight = asyncio.Semaphore(self.args.guests)
+        tasks = set()
+
+        async def arrival():
+            try:
+                await self.request()
+            finally:
+                in_flight.release()
+
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(self.random.expovariate(self.args.rate))
+            if in_flight.locked():
+                self.samples.append(Sample("dropped", False, 0, error="client_saturated"))
+                continue
+            await in_flight.acquire()
+            task = asyncio.create_task(arrival())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+class ChatFrameError(Exception):
+    """
+    The chat stream ended with an error frame.
+    """
+
+
+def _error_kind(e: Exception) -> str:
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"http_{e.response.status_code}"
+    if isinstance(e, ChatFrameError):
+        return "chat_error_frame"
+    if isinstance(e, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(e, httpx.TransportError):
+        return "connection"
+    return type(e).__name__
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("--mix needs at least one positive weight")
+    return mix
+
+
+def percentiles(values: List[float]) -> Optional[dict]:
+    """
+    Milliseconds: p50/p95/p99, mean and max.
+    """
+    if not values:
+        return None
+    p50, p95, p99 = numpy.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": round(p50 * 1000, 1),
+        "p95_ms": round(p95 * 1000, 1),
+        "p99_ms": round(p99 * 1000, 1),
+        "mean_ms": round(float(numpy.mean(values)) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+def summarize(samples: List[Sample], elapsed: float) -> dict:
+    """
+    Per-scenario and overall throughput, latency, TTFT and errors.
+    """
+    by_scenario: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_scenario[sample.scenario].append(sample)
+
+    def block(group: List[Sample]) -> dict:
+        ok = [s for s in group if s.ok]
+        ttfts = [s.ttft for s in ok if s.ttft is not None]
+        result = {
+            "requests": len(group),
+            "ok": len(ok),
+            "errors": len(group) - len(ok),
+            "error_rate": round((len(group) - len(ok)) / len(group), 4) if group else 0,
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0,
+            "latency": percentiles([s.latency for s in ok]),
+            "error_kinds": dict(Counter(s.error for s in group if not s.ok)),
+        }
+        if ttfts:
+            result["ttft"] = percentiles(ttfts)
+        return result
+
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "total": block(samples),
+        "scenarios": {name: block(group) for name, group in sorted(by_scenario.items())},
+    }
+
+
+async def load_fixtures(client: httpx.AsyncClient, admin_token: Optional[str]) -> Fixtures:
+    fixtures = Fixtures()
+
+    if not admin_token:
+        raise RuntimeError("Listing reservations needs the app's ADMIN_API_TOKEN; set it or pass --admin-token")
+    response = await client.get("/reservations", params={"limit": 100}, headers={"X-Admin-Token": admin_token})
+    response.raise_for_status()
+    reservations = response.json()["items"]
+    fixtures.reservation_ids = [r["reservation_id"] for r in reservations]
+    fixtures.guest_ids = sorted({r["guest_id"] for r in reservations})
+
+    response = await client.get("/services")
+    response.raise_for_status()
+    fixtures.service_ids = [s["service_id"] for s in response.json()]
+
+    if not fixtures.reservation_ids:
+        raise RuntimeError("The app has no reservations to drive reservation and order traffic")
+    return fixtures
+
+
+async def response_cache_stats(client: httpx.AsyncClient) -> Optional[dict]:
+    """
+    The app's /metrics/response_cache counters, or None if it does not expose them.
+    """
+    try:
+        response = await client.get("/metrics/response_cache")
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError:
+        return None
+
+
+def response_cache_report(before: Optional[dict], after: Optional[dict]) -> Optional[dict]:
+    """
+    Whether the app's response cache was on, and its hits and misses between the two snapshots.
+    """
+    if before is None or after is None:
+        return None
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return {
+        "enabled": after["enabled"],
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.guests, max_keepalive_connections=args.guests)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        fixtures = await load_fixtures(client, args.admin_token)
+        test = LoadTest(client, fixtures, mix, args)
+
+        if args.warmup > 0:
+            await test.closed_loop(time.perf_counter() + args.warmup)
+            test.samples.clear()
+
+        cache_before = await response_cache_stats(client)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        if args.rate:
+            await test.open_loop(deadline)
+        else:
+            await test.closed_loop(deadline)
+        elapsed = time.perf_counter() - started
+        cache_after = await response_cache_stats(client)
+
+    return {
+        "commit": _git_commit(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "base_url": args.base_url,
+            "mode": "open" if args.rate else "closed",
+            "guests": args.guests,
+            "rate": args.rate,
+            "duration": args.duration,
+            "think_time": args.think_time,
+            "mix": mix,
+            "write_share": args.write_share,
+            "seed": args.seed,
+            "unique_prompts": args.unique_prompts,
+        },
+        "response_cache": response_cache_report(cache_before, cache_after),
+        **summarize(test.samples, elapsed),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m backend.loadtest", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--admin-token", default=os.getenv("ADMIN_API_TOKEN"), help="X-Admin-Token for listing reservations, default $ADMIN_API_TOKEN")
+    parser.add_argument("--guests", type=int, default=10, help="concurrent guests (closed loop) or max in flight (open loop)")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=0, help="unmeasured closed-loop seconds first")
+    parser.add_argument("--rate", type=float, default=0, help="open loop: mean arrivals per second; 0 = closed loop")
+    parser.add_argument("--think-time", type=float, default=1.0, help="closed loop: mean seconds between a guest's requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights, default {DEFAULT_MIX}")
+    parser.add_argument("--write-share", type=float, default=0.0, help="share of order requests that create and delete an order")
+    parser.add_argument("--unique-prompts", action="store_true", help="make every chat prompt unique so the response cache cannot answer it")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
+
+from backend.db.session import get_read_db_session
+from backend.schemas.availability import AvailabilitySchema
+from backend.services.availability import AvailabilityService
+
+router = APIRouter()
+
+
+@router.get("/availability", response_model=AvailabilitySchema)
+async def get_availability(
+    start: date,
+    end: date,
+    room_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db_session)
+) -> AvailabilitySchema:
+    """
+    Return free room counts per room_type for each night in [start, end).
+    """
+    availability_service = AvailabilityService(db=db)
+    try:
+        return await availability_service.get_availability(start, end, room_type)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
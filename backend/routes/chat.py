@@ -1,17 +1,54 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy.ext.asyncio import AsyncSession
 import json
-from backend.db.session import get_db_session
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Optional
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from backend.db.session import open_read_session
 from backend.services.chat import ChatService
+from backend.services.streaming import (
+    CHAT_SSE_HEARTBEAT_SECONDS,
+    make_frame,
+    ndjson_frames,
+    protocol_frames,
+    sse_events
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.post("/chat")
-async def post_chat(
-    request: Request,
-    db: AsyncSession = Depends(get_db_session)
-) -> StreamingResponse:
+async def post_chat(request: Request) -> StreamingResponse:
+    data = await request.json()
+    user_content = data["message"]
+
+    # hard code for local testing. these will come from the cookies
+    session_id = 1
+    guest_id = 1
+    full_name = "John Tester"
+    email = "test@email.org"
+
+    # Chat events for one turn. It opens its own session:
+    # FastAPI closes dependency sessions before a streamed body is sent.
+    async def events():
+        async with open_read_session() as db:
+            chat_service = ChatService(db=db, guest_id=guest_id, full_name=full_name, email=email)
+            async for event in chat_service.send_message_stream(session_id, guest_id, user_content):
+                yield event
+
+    # versioned NDJSON frames: coalesced text deltas, then a final "done" frame
+    return StreamingResponse(ndjson_frames(events()), media_type="application/x-ndjson")
+
+
+
+@router.post("/chat/sse")
+async def post_chat_sse(request: Request) -> StreamingResponse:
+    """
+    The /chat turn as text/event-stream: token, tool_start, tool_end, done and
+    error events, with heartbeat comments while the assistant is busy.
+    """
     data = await request.json()
     user_content = data["message"]
 
@@ -21,11 +58,96 @@ async def post_chat(
     full_name = "John Tester"
     email = "test@email.org"
 
-    chat_service = ChatService(db=db, guest_id=guest_id, full_name=full_name, email=email)
+    async def events():
+        async with open_read_session() as db:
+            chat_service = ChatService(db=db, guest_id=guest_id, full_name=full_name, email=email)
+            async for event in chat_service.send_message_stream(
+                session_id, guest_id, user_content, heartbeat=CHAT_SSE_HEARTBEAT_SECONDS
+            ):
+                yield event
+
+    return StreamingResponse(
+        sse_events(events()),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # nginx and compatible proxies: pass each event through unbuffered
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+
+@router.websocket("/ws/chat")
+async def ws_chat(websocket: WebSocket):
+    """
+    Multi-turn chat over one WebSocket. The guest, DB session and ChatService
+    (with its warm caches) are set up once and reused for every turn.
+
+    Client messages: {"type": "message", "message": "..."} starts a turn,
+    {"type": "cancel"} stops the running one. Server messages are the /chat
+    protocol frames, each tagged with the turn number; a cancelled turn ends
+    with a "cancelled" frame.
+    """
+    await websocket.accept()
+
+    # hard code for local testing. these will come from the cookies
+    session_id = 1
+    guest_id = 1
+    full_name = "John Tester"
+    email = "test@email.org"
+
+    async def send(frame: dict) -> None:
+        await websocket.send_text(json.dumps(frame, default=str))
+
+    async with open_read_session() as db:
+        chat_service = ChatService(db=db, guest_id=guest_id, full_name=full_name, email=email)
+        turn: Optional[asyncio.Task] = None
+        turn_number = 0
+
+        async def run_turn(number: int, user_content: str) -> None:
+            seq = 0
+            events = chat_service.send_message_stream(session_id, guest_id, user_content)
+            frames = protocol_frames(events)
+            try:
+                async for frame in frames:
+                    seq = frame["seq"]
+                    await send({**frame, "turn": number})
+            except asyncio.CancelledError:
+                with suppress(Exception):
+                    await send({**make_frame(seq + 1, "cancelled"), "turn": number})
+            finally:
+                # stops the model run and finishes its trace before the next turn starts
+                await frames.aclose()
+                await events.aclose()
+                # give the connection back between turns; the session object stays warm
+                await db.close()
+
+        try:
+            while True:
+                data = await websocket.receive_json()
+                kind = data.get("type", "message")
+
+                if kind == "cancel":
+                    if turn is not None and not turn.done():
+                        turn.cancel()
+                    continue
 
-    # An async generator that yields partial text
-    async def streamer():
-        async for chunk in chat_service.send_message_stream(session_id, guest_id, user_content):
-            yield json.dumps({"message": chunk}) + "\n"
+                if kind != "message" or not data.get("message"):
+                    await send(make_frame(0, "error", error="Expected {\"type\": \"message\", \"message\": ...} or {\"type\": \"cancel\"}"))
+                    continue
+                if turn is not None and not turn.done():
+                    await send(make_frame(0, "error", error="A turn is already in progress"))
+                    continue
 
-    return StreamingResponse(streamer(), media_type="application/json")
+                turn_number += 1
+                turn = asyncio.create_task(run_turn(turn_number, data["message"]))
+        except WebSocketDisconnect:
+            pass
+        except Exception:
+            logger.exception("Chat WebSocket failed")
+        finally:
+            if turn is not None and not turn.done():
+                turn.cancel()
+                with suppress(asyncio.CancelledError):
+                    await turn
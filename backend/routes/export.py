@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from backend.db.session import open_read_session
+from backend.services.auth import validate_admin
+from backend.services.export import ExportService, ExportTable, ExportFormat
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+@router.get("/export/{table}", dependencies=[Depends(validate_admin)])
+async def export_table(
+    table: ExportTable,
+    format: ExportFormat = "ndjson",
+    gzip: bool = False
+) -> StreamingResponse:
+    """
+    Stream a full dump of reservations, guests or messages as NDJSON or CSV,
+    optionally gzip-compressed, without loading the table into memory. Admin only.
+    """
+    # the body is sent after request dependencies have closed,
+    # so the stream opens and owns its own session
+    async def streamer():
+        async with open_read_session() as db:
+            async for chunk in ExportService(db=db).export(table, format, gzip):
+                yield chunk
+
+    filename = f"{table}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        streamer(),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from backend.db.session import get_read_db_session
+from backend.services.auth import validate_admin
+from backend.schemas.guest import GuestSchema
+from backend.schemas.pagination import PageSchema, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from backend.services.guest import GuestService
+
+router = APIRouter()
+
+
+@router.get("/guests", dependencies=[Depends(validate_admin)], response_model=PageSchema[GuestSchema])
+async def list_guests(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db_session)
+) -> PageSchema[GuestSchema]:
+    """
+    Retrieve one page of guests (admin only). Pass next_cursor back as cursor for the next page.
+    """
+    guest_service = GuestService(db=db)
+    try:
+        return await guest_service.list_guests(cursor=cursor, limit=limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
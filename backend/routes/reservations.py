@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 from datetime import datetime
 
-from backend.db.session import get_db_session
+from backend.db.session import get_db_session, get_read_db_session
 from backend.schemas.reservation import ReservationSchema
 from backend.schemas.guest import GuestSchema
+from backend.schemas.pagination import PageSchema, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from backend.services.auth import validate_admin
 from backend.services.reservation import ReservationService
 
 from pydantic import BaseModel
@@ -22,22 +24,61 @@ class CreateReservationRequest(BaseModel):
     check_in: datetime
     check_out: datetime
 
+class GroupReservationRequest(BaseModel):
+    guest_id: int
+    full_name: str
+    email: str
+    # room_type -> number of rooms, e.g. {"single": 30, "double": 10}
+    rooms: Dict[str, int]
+    check_in: datetime
+    check_out: datetime
+
 class UpdateReservationRequest(BaseModel):
     check_in: Optional[datetime] = None
     check_out: Optional[datetime] = None
     room_type: Optional[str] = None
 
 
-@router.get("/reservations/{guest_id}", response_model=List[ReservationSchema])
+@router.get("/reservations", dependencies=[Depends(validate_admin)], response_model=PageSchema[ReservationSchema])
+async def list_reservations(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db_session)
+) -> PageSchema[ReservationSchema]:
+    """
+    Retrieve one page of all reservations (admin only). Pass next_cursor back as cursor for the next page.
+    """
+    reservation_service = ReservationService(db=db)
+    try:
+        return await reservation_service.list_reservations(cursor=cursor, limit=limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+@router.get(
+    "/reservations/{guest_id}",
+    response_model=Union[List[ReservationSchema], PageSchema[ReservationSchema]]
+)
 async def get_reservations_for_guest(
     guest_id: int, 
-    db: AsyncSession = Depends(get_db_session)
-) -> List[ReservationSchema]:
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db_session)
+) -> Union[List[ReservationSchema], PageSchema[ReservationSchema]]:
     """
-    Retrieve all reservations for a given guest_id.
+    Retrieve all reservations for a given guest_id, as a plain list.
+    With limit or cursor, retrieve one page instead (DEFAULT_PAGE_SIZE by
+    default); pass next_cursor back as cursor for the next page.
     """
     reservation_service = ReservationService(db=db)
-    return await reservation_service.get_reservations_for_guest(guest_id)
+    if cursor is None and limit is None:
+        return await reservation_service.get_reservations_for_guest(guest_id)
+    try:
+        return await reservation_service.list_reservations_for_guest(
+            guest_id, cursor=cursor, limit=limit or DEFAULT_PAGE_SIZE
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
 
 
 @router.post("/reservations", response_model=ReservationSchema)
@@ -70,6 +111,35 @@ async def create_reservation(
     return new_res
 
 
+@router.post("/reservations/bulk", response_model=List[ReservationSchema])
+async def create_group_reservation(
+    req: GroupReservationRequest,
+    db: AsyncSession = Depends(get_db_session)
+) -> List[ReservationSchema]:
+    """
+    Book a block of rooms across room types for one date range, all or nothing.
+    """
+    reservation_service = ReservationService(db=db)
+
+    guest = GuestSchema(
+        guest_id=req.guest_id,
+        full_name=req.full_name,
+        email=req.email
+    )
+
+    try:
+        new_reservations = await reservation_service.create_group_reservation(
+            guest=guest,
+            rooms=req.rooms,
+            check_in=req.check_in,
+            check_out=req.check_out
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    return new_reservations
+
+
 @router.patch("/reservations/{reservation_id}", response_model=ReservationSchema)
 async def modify_reservation(
     reservation_id: int,
@@ -2,12 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from backend.db.session import get_db_session
+from backend.db.session import get_db_session, get_read_db_session
 from backend.schemas.service import ServiceSchema
 from backend.schemas.service import ServiceOrderSchema
 from backend.services.service_orders import ServiceOrderService
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 router = APIRouter()
 
@@ -15,13 +15,13 @@ router = APIRouter()
 class CreateServiceOrderRequest(BaseModel):
     reservation_id: int
     service_id: int
-    quantity: int
+    quantity: int = Field(gt=0)
     status: str = "pending"
 
 
 @router.get("/services", response_model=List[ServiceSchema])
 async def list_all_services(
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_read_db_session)
 ) -> List[ServiceSchema]:
     """
     Return a list of all available services from the database.
@@ -33,7 +33,7 @@ async def list_all_services(
 @router.get("/services/{service_id}", response_model=ServiceSchema)
 async def get_service_by_id(
     service_id: int, 
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_read_db_session)
 ) -> ServiceSchema:
     """
     Return a single service by its ID.
@@ -67,10 +67,34 @@ async def create_service_order(
     return order
 
 
+@router.post("/serviceorders/batch", response_model=List[ServiceOrderSchema])
+async def create_service_orders(
+    req: List[CreateServiceOrderRequest],
+    db: AsyncSession = Depends(get_db_session)
+) -> List[ServiceOrderSchema]:
+    """
+    Create many service orders in one request and one transaction.
+    """
+    service_order_service = ServiceOrderService(db=db)
+    orders = [
+        ServiceOrderSchema(
+            reservation_id=r.reservation_id,
+            service_id=r.service_id,
+            quantity=r.quantity,
+            status=r.status
+        )
+        for r in req
+    ]
+    try:
+        return await service_order_service.create_service_orders(orders)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
 @router.get("/serviceorders/by_reservation/{reservation_id}", response_model=List[ServiceOrderSchema])
 async def list_service_orders_for_reservation(
     reservation_id: int,
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_read_db_session)
 ) -> List[ServiceOrderSchema]:
     """
     List all service orders for a particular reservation_id.
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from backend.db.session import get_read_db_session
+from backend.services.auth import validate_admin
+from backend.schemas.session import SessionSchema
+from backend.schemas.message import MessagePairSchema
+from backend.schemas.pagination import PageSchema, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from backend.services.session import SessionService
+
+router = APIRouter()
+
+
+@router.get("/sessions", dependencies=[Depends(validate_admin)], response_model=PageSchema[SessionSchema])
+async def list_sessions(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db_session)
+) -> PageSchema[SessionSchema]:
+    """
+    Retrieve one page of chat sessions (admin only). Pass next_cursor back as cursor for the next page.
+    """
+    session_service = SessionService(db=db)
+    try:
+        return await session_service.list_sessions(cursor=cursor, limit=limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+@router.get("/messages", dependencies=[Depends(validate_admin)], response_model=PageSchema[MessagePairSchema])
+async def list_messages(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db_session)
+) -> PageSchema[MessagePairSchema]:
+    """
+    Retrieve one page of message pairs (admin only). Pass next_cursor back as cursor for the next page.
+    """
+    session_service = SessionService(db=db)
+    try:
+        return await session_service.list_messages(cursor=cursor, limit=limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+
+from backend.schemas.trace import TraceSchema
+from backend.services.auth import validate_admin
+from backend.services.tracing import CHAT_TRACE_RECENT_RUNS, trace_sink
+
+router = APIRouter()
+
+
+@router.get("/traces", dependencies=[Depends(validate_admin)], response_model=List[TraceSchema])
+async def get_traces(
+    limit: int = Query(20, ge=1, le=CHAT_TRACE_RECENT_RUNS),
+    session_id: Optional[int] = None
+) -> List[TraceSchema]:
+    """
+    Return the most recent chat run traces held in memory, newest first.
+    Traces include prompts and tool arguments, so this is admin only.
+    """
+    return trace_sink.recent_traces(limit, session_id)
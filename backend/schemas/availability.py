@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Dict, List
+
+class AvailabilitySchema(BaseModel):
+    start: date
+    end: date
+    nights: List[date]
+    # room_type -> number of free rooms for each night in `nights`
+    free_rooms: Dict[str, List[int]]
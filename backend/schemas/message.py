@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class MessageSchema(BaseModel):
@@ -13,7 +13,9 @@ class MessagePairSchema(BaseModel):
     session_id: int
     user_message: MessageSchema
     ai_message: MessageSchema
-    
+    # zlib-compressed ModelMessage JSON for the whole turn (see services.history);
+    # internal, so left out of dumps and exports
+    transcript: Optional[bytes] = Field(default=None, exclude=True)
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,49 @@
+import base64
+import json
+from pydantic import BaseModel
+from typing import Callable, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+class PageSchema(BaseModel, Generic[T]):
+    items: List[T]
+    # pass back as ?cursor= to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(after_id: int) -> str:
+    """
+    Opaque cursor token for keyset pagination.
+    """
+    raw = json.dumps({"after_id": after_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Turn a cursor token back into the last seen id. Raises ValueError if malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after_id = json.loads(raw)["after_id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(after_id, int):
+        raise ValueError("Invalid pagination cursor")
+    return after_id
+
+
+def build_page(items: List[T], limit: int, key: Callable[[T], int]) -> PageSchema[T]:
+    """
+    Build a page from up to limit + 1 rows fetched in key order.
+    The extra row only signals that another page exists.
+    """
+    if len(items) > limit:
+        items = items[:limit]
+        return PageSchema(items=items, next_cursor=encode_cursor(key(items[-1])))
+    return PageSchema(items=items, next_cursor=None)
@@ -1,8 +1,11 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class SessionSchema(BaseModel):
     session_id: int = None
     guest_id: int
+    summary: Optional[str] = None
+    summary_through_message_id: Optional[int] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class TraceEventSchema(BaseModel):
+    kind: str
+    at: datetime
+    data: Dict[str, Any] = {}
+
+class TraceSchema(BaseModel):
+    run_id: str
+    session_id: int
+    guest_id: int
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    events: List[TraceEventSchema] = []
+    dropped_events: int = 0
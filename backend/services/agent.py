@@ -0,0 +1,448 @@
+import os
+import time
+import asyncio
+import inspect
+import logging
+import functools
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+from weakref import WeakValueDictionary
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic_ai import Agent, RunContext
+
+from backend.db.session import open_read_session, pin_to_primary
+from backend.schemas.service import ServiceOrderSchema, ServiceSchema
+from backend.schemas.guest import GuestSchema
+from backend.schemas.reservation import ReservationSchema
+from backend.services.reservation import ReservationService
+from backend.services.service_orders import ServiceOrderService
+from backend.services.history import PromptTokenReport, estimate_tokens
+from backend.services.streaming import ChatEvent
+from backend.services.stub_model import resolve_model
+from backend.services.tracing import RunTrace, to_jsonable
+
+logger = logging.getLogger(__name__)
+
+# "stub" selects the offline stand-in model (see stub_model)
+CHAT_MODEL = os.getenv("CHAT_MODEL", "openai:gpt-4o")
+
+T = TypeVar("T")
+
+# one lock per guest, shared by every run in the process; dropped once unused
+_guest_locks: "WeakValueDictionary[int, asyncio.Lock]" = WeakValueDictionary()
+
+
+def guest_lock(guest_id: int) -> asyncio.Lock:
+    lock = _guest_locks.get(guest_id)
+    if lock is None:
+        lock = _guest_locks[guest_id] = asyncio.Lock()
+    return lock
+
+
+class RunMemo:
+    """
+    Read results shared by everything in one chat run: the turn setup, the
+    system prompt and the read tools. Each key is loaded at most once until a
+    mutating tool invalidates it. Concurrent callers share the same load.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, asyncio.Future] = {}
+        self.loads = 0
+        self.hits = 0
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.loads += 1
+            entry = self._entries[key] = asyncio.ensure_future(load())
+        else:
+            self.hits += 1
+        try:
+            return await entry
+        except BaseException:
+            # failures are not memoized; the next caller tries again
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            raise
+
+    def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def invalidate_kind(self, kind: str) -> None:
+        """
+        Drop every entry whose key starts with kind, e.g. all service order lists.
+        """
+        for key in [k for k in self._entries if isinstance(k, tuple) and k[0] == kind]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"loads": self.loads, "hits": self.hits}
+
+
+@dataclass
+class ChatDeps:
+    """
+    Everything one chat turn's tools and system prompt need. Passed to the
+    shared agent through `deps`, so nothing per-request lives on the agent.
+    """
+    guest: GuestSchema
+    db: AsyncSession
+    reservation_service: ReservationService
+    service_order_service: ServiceOrderService
+    available_services: List[ServiceSchema] = field(default_factory=list)
+    reservations: List[ReservationSchema] = field(default_factory=list)
+    summary: Optional[str] = None
+    token_report: PromptTokenReport = field(default_factory=PromptTokenReport)
+    trace: Optional[RunTrace] = None
+    # set while a turn is streaming; tools report progress through emit
+    events: Optional[asyncio.Queue] = None
+    # replaced at the start of every turn
+    memo: RunMemo = field(default_factory=RunMemo)
+    # set by the first write; later reads go to the primary so they see it
+    wrote: bool = False
+
+    @classmethod
+    def for_guest(cls, db: AsyncSession, guest: GuestSchema) -> "ChatDeps":
+        return cls(
+            guest=guest,
+            db=db,
+            reservation_service=ReservationService(db=db),
+            service_order_service=ServiceOrderService(db=db)
+        )
+
+    async def read(self, query: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        """
+        Run a read on its own pooled session. The turn's session cannot be
+        used concurrently, so this is what lets read tools run in parallel.
+        """
+        async with open_read_session() as db:
+            if self.wrote:
+                pin_to_primary(db)
+            return await query(db)
+
+    async def load_services(self) -> List[ServiceSchema]:
+        return await self.memo.get(
+            ("services",),
+            lambda: self.read(lambda db: ServiceOrderService(db=db).list_all_services())
+        )
+
+    async def load_reservations(self) -> List[ReservationSchema]:
+        guest_id = self.guest.guest_id
+        self.reservations = await self.memo.get(
+            ("reservations", guest_id),
+            lambda: self.read(lambda db: ReservationService(db=db).get_reservations_for_guest(guest_id))
+        )
+        return self.reservations
+
+    async def load_service_orders(self, reservation_id: int) -> List[ServiceOrderSchema]:
+        return await self.memo.get(
+            ("service_orders", reservation_id),
+            lambda: self.read(
+                lambda db: ServiceOrderService(db=db).list_service_orders_by_reservation_id(reservation_id)
+            )
+        )
+
+    def reservations_changed(self, reservation_id: Optional[int] = None) -> None:
+        self.memo.invalidate(("reservations", self.guest.guest_id))
+        if reservation_id is not None:
+            self.memo.invalidate(("service_orders", reservation_id))
+
+    def emit(self, event: ChatEvent) -> None:
+        if self.events is not None:
+            self.events.put_nowait(event)
+
+    def summary_prompt(self) -> str:
+        if not self.summary:
+            return ""
+        return f"""
+            Summary of the earlier conversation with this guest:
+            {self.summary}
+            """
+
+    def system_prompt(self) -> str:
+        return f"""
+            "You are a hotel AI agent assistant for WhipSplash. WhipSplash offers three types of rooms"
+            " - single, double, and suite. You can help guests create, modify, or cancel reservations,"
+            " and add service orders to their reservations, such as: {self.available_services}."
+            " all services in the available_services list are available for guests to order."
+            " The guest you are assisting is: {self.guest}."
+            " Use the get_reservations tool to see all reservations for that guest."
+            " We do not rely solely on message history for reservation data."
+            """ + self.summary_prompt()
+
+
+def _observed(tool: Callable) -> Callable:
+    """
+    Wrap a tool so each call is recorded in the run trace and reported to
+    the turn's event stream as tool_start / tool_end.
+    """
+    signature = inspect.signature(tool)
+
+    @functools.wraps(tool)
+    async def wrapper(ctx: RunContext[ChatDeps], *args, **kwargs):
+        arguments = signature.bind(ctx, *args, **kwargs).arguments
+        arguments = to_jsonable({k: v for k, v in arguments.items() if k != "ctx"})
+        deps = ctx.deps
+
+        if deps.trace is not None:
+            deps.trace.record("tool_call", tool=ctx.tool_name, run_step=ctx.run_step, retry=ctx.retry, args=arguments)
+        deps.emit(ChatEvent("tool_start", {"tool": ctx.tool_name, "args": arguments}))
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await tool(ctx, *args, **kwargs)
+            ok = True
+            return result
+        finally:
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            if deps.trace is not None:
+                deps.trace.record("tool_result", tool=ctx.tool_name, ok=ok, elapsed_ms=elapsed_ms)
+            deps.emit(ChatEvent("tool_end", {"tool": ctx.tool_name, "ok": ok, "elapsed_ms": elapsed_ms}))
+
+    return wrapper
+
+
+def _serialized(tool: Callable) -> Callable:
+    """
+    Run a mutating tool under the guest's lock, on the turn's own session.
+    Read tools run in parallel on pooled sessions; writes for one guest run
+    one at a time, across all of that guest's concurrent runs.
+    """
+    @functools.wraps(tool)
+    async def wrapper(ctx: RunContext[ChatDeps], *args, **kwargs):
+        deps = ctx.deps
+        async with guest_lock(deps.guest.guest_id):
+            try:
+                return await tool(ctx, *args, **kwargs)
+            finally:
+                deps.wrote = True
+
+    return wrapper
+
+
+def build_agent() -> Agent[ChatDeps, str]:
+    """
+    Build the chat agent and register its system prompt and tools. The model
+    is resolved on first use, so the app can start without provider credentials.
+    """
+    agent = Agent(
+        resolve_model(CHAT_MODEL),
+        deps_type=ChatDeps,
+        end_strategy="exhaustive",
+        retries=2,
+        # read tools run concurrently on their own sessions, writes are serialized (see _serialized)
+        model_settings={
+            "parallel_tool_calls": True
+        },
+        defer_model_check=True
+    )
+
+    ####################
+    # Reservation Tools
+    ####################
+
+    @agent.system_prompt
+    async def get_current_user(ctx: RunContext[ChatDeps]) -> str:
+        deps = ctx.deps
+
+        if len(deps.available_services) == 0 :
+            deps.available_services = await deps.load_services()
+
+        await deps.load_reservations()
+
+        system_prompt = deps.system_prompt()
+        deps.token_report.system_prompt = estimate_tokens(system_prompt) - deps.token_report.summary
+        return system_prompt
+
+    @agent.tool
+    @_observed
+    @_serialized
+    async def create_reservation(
+        ctx: RunContext[ChatDeps],
+        room_type: str,
+        check_in: datetime,
+        check_out: datetime
+    ) -> ReservationSchema:
+        """
+        Create a new reservation with the (already known) guest,
+        plus room_type, check_in, check_out.
+
+        This tool calls the underlying:
+        ReservationService.create_reservation(...)
+        """
+
+        deps = ctx.deps
+        new_reservation = await deps.reservation_service.create_reservation(
+            deps.guest, room_type, check_in, check_out
+        )
+        deps.reservations_changed()
+
+        return new_reservation
+
+    @agent.tool
+    @_observed
+    async def get_reservations(
+        ctx: RunContext[ChatDeps]
+    ) -> List[ReservationSchema]:
+        """
+        Get all reservations for the guest, calling:
+        ReservationService.get_reservations_for_guest(guest_id)
+        """
+
+        return await ctx.deps.load_reservations()
+
+    @agent.tool
+    @_observed
+    @_serialized
+    async def modify_reservation(
+        ctx: RunContext[ChatDeps],
+        reservation_id: int,
+        check_in: datetime = None,
+        check_out: datetime = None,
+        room_type: str = None
+    ) -> ReservationSchema:
+        """
+        Modify an existing reservation's dates or room_type.
+        Calls: ReservationService.modify_reservation(...)
+        """
+
+        deps = ctx.deps
+        modified_reservation = await deps.reservation_service.modify_reservation(
+            reservation_id, check_in, check_out, room_type
+        )
+        deps.reservations_changed()
+
+        return modified_reservation
+
+    @agent.tool
+    @_observed
+    @_serialized
+    async def cancel_reservation(
+        ctx: RunContext[ChatDeps],
+        reservation_id: int
+    ) -> bool:
+        """
+        Cancel an existing reservation by reservation_id.
+        Calls: ReservationService.cancel_reservation(...)
+        """
+
+        deps = ctx.deps
+        try:
+            return await deps.reservation_service.cancel_reservation(reservation_id)
+        finally:
+            deps.reservations_changed(reservation_id)
+
+    ###########################
+    # Service Order Tools
+    ###########################
+
+    @agent.tool
+    @_observed
+    async def list_all_services(
+        ctx: RunContext[ChatDeps]
+    ) -> List[ServiceSchema]:
+        """
+        List all available hotel services. Be sure to list the names of the services for the user.
+        Calls: ServiceOrderService.list_all_services()
+        """
+
+        return await ctx.deps.load_services()
+
+    @agent.tool
+    @_observed
+    @_serialized
+    async def create_service_order(
+        ctx: RunContext[ChatDeps],
+        reservation_id: int,
+        service_id: int,
+        quantity: int,
+        status: str = "pending"
+    ) -> ServiceOrderSchema:
+        """
+        Create a new service order for a reservation,
+        calling: ServiceOrderService.create_service_order(...)
+        """
+
+        deps = ctx.deps
+        try:
+            return await deps.service_order_service.create_service_order(
+                reservation_id=reservation_id,
+                service_id=service_id,
+                quantity=quantity,
+                status="pending"
+            )
+        finally:
+            deps.memo.invalidate(("service_orders", reservation_id))
+
+    @agent.tool
+    @_observed
+    async def list_service_orders_by_reservation_id(
+        ctx: RunContext[ChatDeps],
+        reservation_id: int
+    ) -> List[ServiceOrderSchema]:
+        """
+        List all service orders for a given reservation.
+        Calls: ServiceOrderService.list_service_orders_by_reservation_id(...)
+        """
+
+        return await ctx.deps.load_service_orders(reservation_id)
+
+    @agent.tool
+    @_observed
+    @_serialized
+    async def delete_service_order(
+        ctx: RunContext[ChatDeps],
+        order_id: int
+    ) -> bool:
+        """
+        Delete a single service order by its order_id.
+        Calls: ServiceOrderService.delete_service_order(...)
+        """
+
+        deps = ctx.deps
+        try:
+            return await deps.service_order_service.delete_service_order(order_id)
+        finally:
+            # the order's reservation is not known here
+            deps.memo.invalidate_kind("service_orders")
+
+    @agent.tool
+    @_observed
+    @_serialized
+    async def delete_service_orders_for_reservation(
+        ctx: RunContext[ChatDeps],
+        reservation_id: int
+    ) -> bool:
+        """
+        Delete all service orders for a given reservation.
+        Calls: ServiceOrderService.delete_service_orders_for_reservation(...)
+        """
+
+        deps = ctx.deps
+        try:
+            return await deps.service_order_service.delete_service_orders_for_reservation(reservation_id)
+        finally:
+            deps.memo.invalidate(("service_orders", reservation_id))
+
+    return agent
+
+
+# shared by every request; built once by init_agent (app lifespan) or on first use
+chat_agent: Optional[Agent[ChatDeps, str]] = None
+
+
+def init_agent() -> Agent[ChatDeps, str]:
+    global chat_agent
+    if chat_agent is None:
+        chat_agent = build_agent()
+        logger.info("Built chat agent with %s tools", len(chat_agent._function_tools))
+    return chat_agent
+
+
+def get_agent() -> Agent[ChatDeps, str]:
+    return chat_agent if chat_agent is not None else init_agent()
@@ -1,6 +1,12 @@
 from fastapi import Depends, HTTPException, status, Request
-from fastapi.security import APIKeyCookie
-from typing import Optional
+from fastapi.security import APIKeyCookie, APIKeyHeader
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+import hashlib
+import hmac
+import logging
+import time
 import jwt
 import os
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,28 +17,81 @@ from .auth_exceptions import InvalidTokenException, handle_invalid_token
 
 load_dotenv()  
 
+logger = logging.getLogger(__name__)
+
 cookie_security = APIKeyCookie(name="access-token", auto_error=False)
+admin_token_security = APIKeyHeader(name="X-Admin-Token", auto_error=False)
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+# upper bound for caching tokens issued without an exp claim
+AUTH_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "300"))
+# shared secret for operator endpoints (bulk listings, exports, traces); unset disables them
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
 
-def create_access_token(guest_id: int, email: str) -> str:
+
+class VerifiedTokenCache:
     """
-    Create a JWT access token for the guest.
+    LRU of tokens whose signature and claims already checked out, keyed by
+    the token's sha256 so raw tokens are never kept. Entries expire with the
+    token's exp claim (capped at AUTH_TOKEN_CACHE_TTL_SECONDS without one).
     """
 
-    print(f"secret key: {SECRET_KEY}  algorithm: {ALGORITHM}")
+    def __init__(self, max_entries: int = AUTH_TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, str, float]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Tuple[int, str]]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        guest_id, email, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return guest_id, email
+
+    def put(self, token: str, guest_id: int, email: str, exp: Optional[float]) -> None:
+        expires_at = time.time() + AUTH_TOKEN_CACHE_TTL_SECONDS
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
 
+        key = self._key(token)
+        self._entries[key] = (guest_id, email, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache()
+
+
+def create_access_token(guest_id: int, email: str) -> str:
+    """
+    Create a JWT access token for the guest, valid for ACCESS_TOKEN_EXPIRE_MINUTES.
+    """
+    issued_at = datetime.now(timezone.utc)
     payload = {
         "guest_id": guest_id,
         "email": email,
+        "iat": issued_at,
+        "exp": issued_at + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     }
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
-
-
-    print(f"Created token for guest_id {guest_id} with email {email}")
-
-    print(f"Token: {token}")
+    logger.debug("Created token for guest_id %s", guest_id)
 
     return token
 
@@ -54,21 +113,33 @@ async def validate_guest(
     """
     Validate the guest based on the provided token.
     Raises InvalidTokenException if anything fails.
+
+    Verified tokens and guests are cached, so repeat requests
+    normally need neither a JWT decode nor a DB query.
     """
     if not token:
         raise InvalidTokenException("Missing token in cookie")  
-    # decode token
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
-    except jwt.PyJWTError:
-        raise InvalidTokenException("Token decode error")
+    # fast path: a token we already verified and that has not expired
+    claims = verified_tokens.get(token)
+    if claims is None:
+        # decode token (also checks exp when present)
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
-    guest_id = payload.get("guest_id")
-    email = payload.get("email")
-    if not guest_id or not email:
-        raise InvalidTokenException("Invalid token: missing guest_id/email")
+        except jwt.PyJWTError:
+            raise InvalidTokenException("Token decode error")
 
+        guest_id = payload.get("guest_id")
+        email = payload.get("email")
+        if not guest_id or not email:
+            raise InvalidTokenException("Invalid token: missing guest_id/email")
+
+        verified_tokens.put(token, guest_id, email, payload.get("exp"))
+    else:
+        guest_id, email = claims
+
+    # served from the repository cache in the steady state; guest writes invalidate it
     guest_repo = GuestRepository(db=async_session)
     guest = await guest_repo.get_guest_by_id(guest_id=guest_id)
     
@@ -76,3 +147,20 @@ async def validate_guest(
         raise InvalidTokenException("Token email does not match guest")
     
     return guest
+
+
+async def validate_admin(token: Optional[str] = Depends(admin_token_security)) -> None:
+    """
+    Allow the request only if the X-Admin-Token header matches ADMIN_API_TOKEN.
+    Operator endpoints are closed while ADMIN_API_TOKEN is not set.
+    """
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled",
+        )
+    if not token or not hmac.compare_digest(token.encode("utf-8"), ADMIN_API_TOKEN.encode("utf-8")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+        )
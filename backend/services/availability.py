@@ -0,0 +1,39 @@
+import logging
+from datetime import date, timedelta
+from typing import Optional
+
+from backend.db.occupancy import occupancy
+from backend.schemas.availability import AvailabilitySchema
+
+logger = logging.getLogger(__name__)
+
+class AvailabilityService:
+    """
+    Answers "how many rooms are free" questions from the in-process
+    occupancy matrix instead of querying reservations.
+
+    Exposed methods (AI-agent friendly):
+    - get_availability(...)
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    async def get_availability(
+        self,
+        start: date,
+        end: date,
+        room_type: Optional[str] = None
+    ) -> AvailabilitySchema:
+        """
+        Return the number of free rooms per room_type for every night in [start, end).
+        Raises ValueError for an empty window, a window outside the matrix,
+        or an unknown room_type.
+        """
+        if not occupancy.is_built:
+            await occupancy.build(self.db)
+
+        free_rooms = occupancy.free_counts(start, end, room_type)
+        nights = [start + timedelta(days=i) for i in range((end - start).days)]
+
+        return AvailabilitySchema(start=start, end=end, nights=nights, free_rooms=free_rooms)
@@ -1,27 +1,35 @@
-import asyncio
+import re
 import json
+import asyncio
 import logging
-from typing import AsyncGenerator, List, Literal
-from datetime import datetime
+from contextlib import suppress
+from dataclasses import asdict
+from typing import AsyncGenerator, List, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic_ai import Agent, RunContext
-from pydantic_ai.messages import (
-    ModelMessage, 
-    ModelRequest, 
-    UserPromptPart, 
-    ModelResponse, 
-    TextPart
-)
+from pydantic_ai.messages import ModelMessage, ModelResponse, SystemPromptPart
+from pydantic_ai.result import Usage
 from dotenv import load_dotenv
 
 from backend.db.repositories.message import MessageRepository
+from backend.db.repositories.session import SessionRepository
 from backend.schemas.message import MessageSchema, MessagePairSchema
-from backend.schemas.service import ServiceOrderSchema, ServiceSchema
 from backend.schemas.guest import GuestSchema
-from backend.schemas.reservation import ReservationSchema
-from backend.services.reservation import ReservationService
-from backend.services.service_orders import ServiceOrderService
+from backend.services.agent import ChatDeps, RunMemo, get_agent
+from backend.services.history import (
+    CHAT_HISTORY_MAX_PAIRS,
+    CHAT_HISTORY_TOKEN_BUDGET,
+    PromptTokenReport,
+    encode_transcript,
+    estimate_message_tokens,
+    estimate_tokens,
+    fit_to_budget,
+    to_model_messages
+)
+from backend.services.streaming import ChatEvent
+from backend.services.persistence import message_writer
+from backend.services.response_cache import last_reply, response_cache
+from backend.services.tracing import trace_sink
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -30,255 +38,178 @@ class ChatService:
     def __init__(self, db: AsyncSession, guest_id: int, full_name: str, email: str):
         self.db = db
         self.message_repo = MessageRepository(db=db)
-        self.reservation_service = ReservationService(db=db)
-        self.service_order_service = ServiceOrderService(db=db)
-        self.available_services: List[ServiceSchema] = []
+        self.session_repo = SessionRepository(db=db)
 
         self.guest = GuestSchema(
             guest_id=guest_id,
             full_name=full_name,
             email=email
         )
-        self.reservations: List[ReservationSchema] = []
-
-        self.agent = Agent(
-            "openai:gpt-4o",
-            end_strategy="exhaustive",
-            retries=2,
-            model_settings={
-                "parallel_tool_calls": False  
-            }
-        )
+        self.deps = ChatDeps.for_guest(db=db, guest=self.guest)
+        self.summary_through_message_id: Optional[int] = None
+
+        # process-wide agent; tools reach this request's state through self.deps
+        self.agent = get_agent()
 
-        self._register_tools()
+    @property
+    def token_report(self) -> PromptTokenReport:
+        return self.deps.token_report
 
-    def _register_tools(self):
+    async def _load_summary(self, session_id: int) -> None:
         """
-        Turn each service method into a "tool" function, 
-        which the AI can call when it needs that functionality.
+        Load the session's rolling summary (see SummaryService). Turns it
+        covers are not replayed as history.
         """
-
-        ####################
-        # Reservation Tools
-        ####################
-
-        @self.agent.system_prompt
-        async def get_current_user():
-
-            if len(self.available_services) == 0 :
-                self.available_services = await self.service_order_service.list_all_services()
-            
-            if len(self.reservations) == 0:
-                self.reservations = await self.reservation_service.get_reservations_for_guest(self.guest.guest_id)
-
-            system_prompt = f"""
-            "You are a hotel AI agent assistant for WhipSplash. WhipSplash offers three types of rooms"
-            " - single, double, and suite. You can help guests create, modify, or cancel reservations,"
-            " and add service orders to their reservations, such as: {self.available_services}."
-            " all services in the available_services list are available for guests to order."
-            " The guest you are assisting is: {self.guest}."
-            " Use the get_reservations tool to see all reservations for that guest."
-            " We do not rely solely on message history for reservation data."
-            """
-            return system_prompt
-
-        @self.agent.tool
-        async def create_reservation(
-            ctx: RunContext[GuestSchema],
-            room_type: str,
-            check_in: datetime,
-            check_out: datetime
-        ) -> ReservationSchema:
-            """
-            Create a new reservation with the (already known) guest, 
-            plus room_type, check_in, check_out.
-
-            This tool calls the underlying:
-            ReservationService.create_reservation(...)
-            """
-            data = str(ctx)
-            with open("tool_use.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-
-            new_reservation = await self.reservation_service.create_reservation(
-                self.guest, room_type, check_in, check_out
-            )
-            self.reservations = await self.reservation_service.get_reservations_for_guest(self.guest.guest_id)
-
-            return new_reservation
-
-        @self.agent.tool
-        async def get_reservations(
-            ctx: RunContext[GuestSchema]
-        ) -> List[ReservationSchema]:
-            """
-            Get all reservations for the guest, calling:
-            ReservationService.get_reservations_for_guest(guest_id)
-            """
-            data = str(ctx)
-            with open("tool_use.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-
-            reservations = await self.reservation_service.get_reservations_for_guest(self.guest.guest_id)
-            self.reservations = reservations
-            return reservations
-
-        @self.agent.tool
-        async def modify_reservation(
-            ctx: RunContext[GuestSchema],
-            reservation_id: int,
-            check_in: datetime = None,
-            check_out: datetime = None,
-            room_type: str = None
-        ) -> ReservationSchema:
-            """
-            Modify an existing reservation's dates or room_type.
-            Calls: ReservationService.modify_reservation(...)
-            """
-            data = str(ctx)
-            with open("tool_use.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-
-            modified_reservation = await self.reservation_service.modify_reservation(
-                reservation_id, check_in, check_out, room_type
-            )
-            self.reservations = await self.reservation_service.get_reservations_for_guest(self.guest.guest_id)
-
-            return modified_reservation
-
-        @self.agent.tool
-        async def cancel_reservation(
-            ctx: RunContext[GuestSchema],
-            reservation_id: int
-        ) -> bool:
-            """
-            Cancel an existing reservation by reservation_id.
-            Calls: ReservationService.cancel_reservation(...)
-            """
-            return await self.reservation_service.cancel_reservation(reservation_id)
-
-        ###########################
-        # Service Order Tools
-        ###########################
-
-        @self.agent.tool
-        async def list_all_services(
-            ctx: RunContext[GuestSchema]
-        ) -> List[ServiceSchema]:
-            """
-            List all available hotel services. Be sure to list the names of the services for the user.
-            Calls: ServiceOrderService.list_all_services()
-            """
-            data = str(ctx)
-            with open("tool_use.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-
-            return await self.service_order_service.list_all_services()
-
-        @self.agent.tool
-        async def create_service_order(
-            ctx: RunContext[GuestSchema],
-            reservation_id: int,
-            service_id: int,
-            quantity: int,
-            status: str = "pending"
-        ) -> ServiceOrderSchema:
-            """
-            Create a new service order for a reservation, 
-            calling: ServiceOrderService.create_service_order(...)
-            """
-            data = str(ctx)
-            with open("tool_use.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-
-            return await self.service_order_service.create_service_order(
-                reservation_id=reservation_id,
-                service_id=service_id,
-                quantity=quantity,
-                status="pending"
-            )
-
-        @self.agent.tool
-        async def list_service_orders_by_reservation_id(
-            ctx: RunContext[GuestSchema],
-            reservation_id: int
-        ) -> List[ServiceOrderSchema]:
-            """
-            List all service orders for a given reservation.
-            Calls: ServiceOrderService.list_service_orders_by_reservation_id(...)
-            """
-            data = str(ctx)
-            with open("tool_use.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-
-            return await self.service_order_service.list_service_orders_by_reservation_id(reservation_id)
-
-        @self.agent.tool
-        async def delete_service_order(
-            ctx: RunContext[GuestSchema],
-            order_id: int
-        ) -> bool:
-            """
-            Delete a single service order by its order_id.
-            Calls: ServiceOrderService.delete_service_order(...)
-            """
-            return await self.service_order_service.delete_service_order(order_id)
-
-        @self.agent.tool
-        async def delete_service_orders_for_reservation(
-            ctx: RunContext[GuestSchema],
-            reservation_id: int
-        ) -> bool:
-            """
-            Delete all service orders for a given reservation.
-            Calls: ServiceOrderService.delete_service_orders_for_reservation(...)
-            """
-            return await self.service_order_service.delete_service_orders_for_reservation(reservation_id)
+        try:
+            session = await self.session_repo.get_session_by_id(session_id)
+        except ValueError:
+            return
+        self.deps.summary = session.summary
+        self.summary_through_message_id = session.summary_through_message_id
+        self.token_report.summary = estimate_tokens(self.deps.summary_prompt())
+
+    async def _load_history(self, session_id: int) -> List[ModelMessage]:
+        """
+        Load the most recent message pairs for the session, in order,
+        trimmed to CHAT_HISTORY_TOKEN_BUDGET. Call after the services and
+        reservations are loaded, since they go into the system prompt.
+        """
+        # turns still waiting in the write-behind queue come after anything in the
+        # DB. Snapshot them before the query, so a pair written meanwhile is in
+        # the query's result (and skipped below by its new id) or in the
+        # snapshot, never missing from both
+        pending = message_writer.pending(session_id)
+        recent_pairs = await self.message_repo.get_recent_messages_by_session_id(
+            session_id, CHAT_HISTORY_MAX_PAIRS, after_id=self.summary_through_message_id
+        )
+        stored_ids = {pair.message_id for pair in recent_pairs}
+        pending = [p for p in pending if p.message_id not in stored_ids]
+        recent_pairs = (recent_pairs + pending)[-CHAT_HISTORY_MAX_PAIRS:]
+        kept_pairs = fit_to_budget(recent_pairs, CHAT_HISTORY_TOKEN_BUDGET)
+        message_history = to_model_messages(kept_pairs)
+
+        self.token_report.history = estimate_message_tokens(message_history)
+        self.token_report.history_pairs = len(kept_pairs)
+        self.token_report.dropped_pairs = len(recent_pairs) - len(kept_pairs)
+
+        # the agent only adds system prompts to a fresh conversation,
+        # so a replayed history has to carry its own
+        if message_history:
+            system_prompt = self.deps.system_prompt()
+            self.token_report.system_prompt = estimate_tokens(system_prompt) - self.token_report.summary
+            message_history[0].parts.insert(0, SystemPromptPart(content=system_prompt))
+        return message_history
 
     async def send_message_stream(
         self,
         session_id: int,
         guest_id: int,
-        user_content: str
-    ) -> AsyncGenerator[str, None]:
+        user_content: str,
+        heartbeat: Optional[float] = None
+    ) -> AsyncGenerator[ChatEvent, None]:
         """
-        1) Load message history from DB for session_id
-        2) Call agent.run_stream(...) with user prompt + message history
-        3) Yield partial text as it arrives
-        4) On completion, store new user+AI messages in the DB
+        1) Load the session summary and the recent message history it does not
+           cover for session_id, within the token budget
+        2) Answer from the response cache if the same question was already
+           answered in the same state; otherwise call agent.run_stream(...)
+           with user prompt + message history
+        3) Yield a "delta" event with the new text as it arrives
+        4) On completion, queue the turn (its full transcript, tool calls
+           included, plus the user and final AI text) for a background write,
+           which also folds older turns into the summary, and yield a "done" event
+
+        Tool calls yield "tool_start" / "tool_end" events. If heartbeat is set,
+        a "heartbeat" event is yielded whenever that many seconds pass quietly.
         """
+        deps = self.deps
+        deps.token_report = PromptTokenReport()
+        deps.trace = trace_sink.start_run(session_id=session_id, guest_id=guest_id)
+
+        # the turn runs in its own task and reports through a queue, so tool
+        # events raised while the agent is still inside run_stream reach the
+        # client as they happen; closing this generator cancels the turn
+        events: asyncio.Queue = asyncio.Queue()
+        deps.events = events
+
+        async def produce():
+            try:
+                async for event in self._run_turn(session_id, guest_id, user_content):
+                    events.put_nowait(event)
+            finally:
+                events.put_nowait(None)
+
+        turn = asyncio.create_task(produce())
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ChatEvent("heartbeat")
+                    continue
+                if event is None:
+                    break
+                yield event
+            # re-raises whatever ended the turn early
+            await turn
+        except Exception as e:
+            deps.trace.record("error", error=repr(e))
+            raise
+        finally:
+            if not turn.done():
+                turn.cancel()
+                deps.trace.record("cancelled")
+                with suppress(asyncio.CancelledError):
+                    await turn
+            deps.events = None
+            trace_sink.finish(deps.trace)
+
+    async def _run_turn(
+        self,
+        session_id: int,
+        guest_id: int,
+        user_content: str
+    ) -> AsyncGenerator[ChatEvent, None]:
+        deps = self.deps
+        # reads are shared by the setup below, the system prompt and the tools
+        deps.memo = RunMemo()
+
+        # every turn, so a long-lived session (/ws/chat) sees catalog changes;
+        # the services read is cached
+        deps.available_services = await deps.load_services()
+
+        await deps.load_reservations()
+        await self._load_summary(session_id)
+        message_history = await self._load_history(session_id)
+        previous_reply = last_reply(message_history)
+        # give the connection back before the model run: read tools check out
+        # their own, and mutating tools reopen this session when they need it
+        await self.db.close()
+
+        cached_text = response_cache.get(
+            user_content, deps.available_services, deps.reservations, self.guest, previous_reply
+        )
+        if cached_text is not None:
+            async for event in self._replay_cached(session_id, guest_id, user_content, cached_text):
+                yield event
+            return
 
-
-        prior_pairs = await self.message_repo.get_messages_by_session_id(session_id)
-        message_history = []
-        for pair in prior_pairs:
-    
-            user_req = ModelRequest(parts=[UserPromptPart(content=pair.user_message.content)])
-            message_history.append(user_req)
- 
-            ai_resp = ModelResponse(parts=[TextPart(content=pair.ai_message.content)])
-            message_history.append(ai_resp)
-
-        print(f"Loaded {len(message_history)} messages from DB")
-        if not self.available_services:
-            self.available_services = await self.service_order_service.list_all_services()
-        
-        self.reservations = await self.reservation_service.get_reservations_for_guest(self.guest.guest_id)
-
-        improved_prompt = f"""
+        context = f"""
         <system prompt>
         these services are available for guests to choose:
-        {self.available_services}
+        {deps.available_services}
         this guest currently has these reservations:
-        {self.reservations}
+        {deps.reservations}
         <user prompt>
-        {user_content}
         """
+        improved_prompt = f"""{context}{user_content}
+        """
+        self.token_report.context = estimate_tokens(context)
+        self.token_report.user_prompt = estimate_tokens(user_content)
 
         async with self.agent.run_stream(
             user_prompt=improved_prompt,
             message_history=message_history,
-            deps=[self.guest, self.reservations]
+            deps=deps
         ) as result:
 
             final_text = ""
@@ -287,34 +218,91 @@ class ChatService:
             if result.is_structured:
                 async for structured_message in result.stream_structured(debounce_by=0.01):
                     final_text += "Received function call"
-                    yield "Received function call"  # or do something more robust
+                    yield ChatEvent("delta", {"text": "Received function call"})  # or do something more robust
             else:
-                # Just text streaming
-                async for text_chunk in result.stream_text(delta=False, debounce_by=0.01):
-                    final_text += text_chunk
-                    yield text_chunk
+                # stream_text(delta=True) skips recording the final response, so
+                # take the cumulative text and send on only what is new
+                async for text in result.stream_text(delta=False, debounce_by=0.01):
+                    if len(text) > len(final_text):
+                        yield ChatEvent("delta", {"text": text[len(final_text):]})
+                    final_text = text
+
+        logger.info(
+            "Chat turn input tokens (estimated): history=%s (%s pairs, %s dropped) "
+            "summary=%s system_prompt=%s context=%s user=%s total=%s",
+            self.token_report.history,
+            self.token_report.history_pairs,
+            self.token_report.dropped_pairs,
+            self.token_report.summary,
+            self.token_report.system_prompt,
+            self.token_report.context,
+            self.token_report.user_prompt,
+            self.token_report.total
+        )
 
         # The conversation is done; gather new messages from the result
         new_msgs = result.new_messages()
 
-        # For debugging: save the entire conversation to a file
-        raw_bytes = result.all_messages_json()
-        data = json.loads(raw_bytes)  
-        with open("all_messages.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        # For debugging: keep the new messages and token counts with the run trace
+        deps.trace.record(
+            "run_complete",
+            prompt_tokens=asdict(self.token_report),
+            usage=asdict(result.usage()),
+            memo=deps.memo.stats(),
+            new_messages=json.loads(result.new_messages_json())
+        )
 
-        # If we have exactly two new messages (user+assistant), store them in DB
-        if len(new_msgs) == 2:
-            user_m = new_msgs[0]
-            ai_m = new_msgs[1]
+        response_cache.put(
+            user_content, deps.available_services, deps.reservations, self.guest,
+            new_msgs, final_text, previous_reply
+        )
 
-            user_schema = MessageSchema(content=user_m.parts[0].content, role="user")
-            ai_schema = MessageSchema(content=ai_m.parts[0].content, role="assistant")
+        # Queue every completed turn, tool calls and results included, so later
+        # turns replay them instead of calling the tools again. The write happens
+        # in the background, so the turn ends without waiting for the DB
+        if new_msgs and isinstance(new_msgs[-1], ModelResponse):
+            # store what the guest typed, not the system prompt or the injected
+            # context, so replayed history only costs the conversation itself
+            user_schema = MessageSchema(content=user_content, role="user")
+            ai_schema = MessageSchema(content=final_text, role="assistant")
 
-            new_pair = MessagePairSchema(
+            message_writer.submit(MessagePairSchema(
                 guest_id=guest_id,
                 session_id=session_id,
                 user_message=user_schema,
                 ai_message=ai_schema,
-            )
-            await self.message_repo.add_message(new_pair)
+                transcript=encode_transcript(new_msgs, user_content)
+            ))
+
+        yield ChatEvent("done", {
+            "session_id": session_id,
+            "usage": asdict(result.usage())
+        })
+
+    async def _replay_cached(
+        self,
+        session_id: int,
+        guest_id: int,
+        user_content: str,
+        text: str
+    ) -> AsyncGenerator[ChatEvent, None]:
+        """
+        Answer from the response cache: stream the stored text word by word,
+        store the turn like any other and finish without calling the model.
+        """
+        self.deps.trace.record("response_cache_hit", chars=len(text))
+        for chunk in re.findall(r"\s*\S+\s*", text):
+            yield ChatEvent("delta", {"text": chunk})
+
+        message_writer.submit(MessagePairSchema(
+            guest_id=guest_id,
+            session_id=session_id,
+            user_message=MessageSchema(content=user_content, role="user"),
+            ai_message=MessageSchema(content=text, role="assistant")
+        ))
+
+        yield ChatEvent("done", {
+            "session_id": session_id,
+            "usage": asdict(Usage()),
+            "cached": True
+        })
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+import zlib
+import logging
+from typing import AsyncIterator, Literal
+
+from pydantic import BaseModel
+
+from backend.db.repositories.guest import GuestRepository
+from backend.db.repositories.message import MessageRepository
+from backend.db.repositories.reservation import ReservationRepository
+
+logger = logging.getLogger(__name__)
+
+ExportTable = Literal["reservations", "guests", "messages"]
+ExportFormat = Literal["ndjson", "csv"]
+
+
+def _flatten(row: dict, prefix: str = "") -> dict:
+    """
+    Flatten nested dicts into dotted keys for CSV, e.g. user_message.content.
+    """
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+class ExportService:
+    """
+    Streams full table dumps as NDJSON or CSV, optionally gzip-compressed.
+    Rows come from server-side cursors in batches, so memory use does not
+    depend on table size.
+
+    Exposed methods:
+    - export(...)
+    """
+
+    def __init__(self, db, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+        self.guest_repo = GuestRepository(db=db)
+        self.message_repo = MessageRepository(db=db)
+        self.reservation_repo = ReservationRepository(db=db)
+
+    def _batches(self, table: ExportTable) -> AsyncIterator[list[BaseModel]]:
+        if table == "reservations":
+            return self.reservation_repo.stream_reservations(self.batch_size)
+        if table == "guests":
+            return self.guest_repo.stream_guests(self.batch_size)
+        if table == "messages":
+            return self.message_repo.stream_messages(self.batch_size)
+        raise ValueError(f"Unknown export table {table}")
+
+    async def _encode(self, table: ExportTable, fmt: ExportFormat) -> AsyncIterator[str]:
+        header_written = False
+        async for batch in self._batches(table):
+            rows = [item.model_dump(mode="json") for item in batch]
+            if fmt == "ndjson":
+                yield "".join(json.dumps(row) + "\n" for row in rows)
+                continue
+
+            buffer = io.StringIO()
+            flat_rows = [_flatten(row) for row in rows]
+            writer = csv.DictWriter(buffer, fieldnames=list(flat_rows[0]))
+            if not header_written:
+                writer.writeheader()
+                header_written = True
+            writer.writerows(flat_rows)
+            yield buffer.getvalue()
+
+    async def export(self, table: ExportTable, fmt: ExportFormat = "ndjson", compress: bool = False) -> AsyncIterator[bytes]:
+        """
+        Yield the encoded dump of `table` one batch at a time.
+        With compress=True the stream is a single gzip member.
+        """
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        async for text in self._encode(table, fmt):
+            data = text.encode("utf-8")
+            if compressor is None:
+                yield data
+            else:
+                compressed = compressor.compress(data)
+                if compressed:
+                    yield compressed
+        if compressor is not None:
+            yield compressor.flush()
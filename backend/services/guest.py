@@ -0,0 +1,23 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.db.repositories.guest import GuestRepository
+from backend.schemas.guest import GuestSchema
+from backend.schemas.pagination import PageSchema, DEFAULT_PAGE_SIZE, build_page, decode_cursor
+
+class GuestService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.guest_repository = GuestRepository(db=db)
+
+    async def list_guests(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> PageSchema[GuestSchema]:
+        """
+        Return one page of guests ordered by guest_id.
+        Raises ValueError for a malformed cursor.
+        """
+        guests = await self.guest_repository.list_guests(after_id=decode_cursor(cursor), limit=limit + 1)
+
+        return build_page(guests, limit, key=lambda g: g.guest_id)
@@ -0,0 +1,158 @@
+import os
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    SystemPromptPart,
+    ToolCallPart,
+    ToolReturnPart,
+    RetryPromptPart,
+    UserPromptPart,
+    ModelResponse,
+    TextPart
+)
+
+from backend.schemas.message import MessagePairSchema
+
+# token budget for replayed conversation history, per chat turn
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "4000"))
+# upper bound on pairs fetched from the DB before the budget is applied
+CHAT_HISTORY_MAX_PAIRS = int(os.getenv("CHAT_HISTORY_MAX_PAIRS", "50"))
+
+# rough average for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+# role / separator overhead the API adds around every message
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate (about 4 characters per token).
+    Good enough for budgeting without pulling in a tokenizer.
+    """
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def encode_transcript(messages: List[ModelMessage], user_content: str) -> bytes:
+    """
+    Serialize one turn's messages, tool calls and returns included, as
+    zlib-compressed JSON for messages.transcript.
+
+    System prompts are dropped and the user prompt is replaced by what the
+    guest typed: both are rebuilt fresh on every turn, so storing them would
+    only replay stale context.
+    """
+    stored: List[ModelMessage] = []
+    prompt_seen = False
+    for message in messages:
+        if isinstance(message, ModelRequest):
+            parts = []
+            for part in message.parts:
+                if isinstance(part, SystemPromptPart):
+                    continue
+                if isinstance(part, UserPromptPart) and not prompt_seen:
+                    part = UserPromptPart(content=user_content, timestamp=part.timestamp)
+                    prompt_seen = True
+                parts.append(part)
+            message = ModelRequest(parts=parts)
+        stored.append(message)
+    return zlib.compress(ModelMessagesTypeAdapter.dump_json(stored))
+
+
+def decode_transcript(transcript: bytes) -> List[ModelMessage]:
+    return ModelMessagesTypeAdapter.validate_json(zlib.decompress(transcript))
+
+
+def _part_text(part) -> Optional[str]:
+    if isinstance(part, (SystemPromptPart, UserPromptPart, TextPart)):
+        return part.content
+    if isinstance(part, ToolCallPart):
+        return part.tool_name + part.args_as_json_str()
+    if isinstance(part, ToolReturnPart):
+        return part.model_response_str()
+    if isinstance(part, RetryPromptPart):
+        return part.model_response()
+    return None
+
+
+def estimate_message_tokens(messages: List[ModelMessage]) -> int:
+    return sum(
+        estimate_tokens(_part_text(part)) + TOKENS_PER_MESSAGE
+        for message in messages
+        for part in message.parts
+    )
+
+
+def pair_messages(pair: MessagePairSchema) -> List[ModelMessage]:
+    """
+    The model messages for one stored pair: the full transcript when there is
+    one, otherwise (rows from before transcripts) the user and assistant text.
+    """
+    if pair.transcript is not None:
+        return decode_transcript(pair.transcript)
+    return [
+        ModelRequest(parts=[UserPromptPart(content=pair.user_message.content)]),
+        ModelResponse(parts=[TextPart(content=pair.ai_message.content)]),
+    ]
+
+
+def estimate_pair_tokens(pair: MessagePairSchema) -> int:
+    if pair.transcript is not None:
+        return estimate_message_tokens(decode_transcript(pair.transcript))
+    return (
+        estimate_tokens(pair.user_message.content)
+        + estimate_tokens(pair.ai_message.content)
+        + 2 * TOKENS_PER_MESSAGE
+    )
+
+
+def fit_to_budget(pairs: List[MessagePairSchema], budget: int) -> List[MessagePairSchema]:
+    """
+    Keep the newest pairs whose combined estimate fits in budget,
+    preserving their original (oldest first) order.
+    """
+    kept = []
+    used = 0
+    for pair in reversed(pairs):
+        cost = estimate_pair_tokens(pair)
+        if used + cost > budget:
+            break
+        kept.append(pair)
+        used += cost
+    kept.reverse()
+    return kept
+
+
+def to_model_messages(pairs: List[MessagePairSchema]) -> List[ModelMessage]:
+    """
+    Replay message pairs in order, including the tool calls and results of
+    every turn that has a transcript, so the model does not re-run them.
+    """
+    messages: List[ModelMessage] = []
+    for pair in pairs:
+        messages.extend(pair_messages(pair))
+    return messages
+
+
+@dataclass
+class PromptTokenReport:
+    """
+    Estimated input tokens for one chat turn, split by where they came from.
+    """
+    history: int = 0
+    summary: int = 0
+    system_prompt: int = 0
+    context: int = 0
+    user_prompt: int = 0
+    history_pairs: int = 0
+    dropped_pairs: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.history + self.summary + self.system_prompt + self.context + self.user_prompt
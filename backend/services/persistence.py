@@ -0,0 +1,208 @@
+import os
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Deque, List, Optional, Tuple
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.db.repositories.message import MessageRepository
+from backend.schemas.message import MessagePairSchema
+from backend.services.summary import schedule_compaction
+
+logger = logging.getLogger(__name__)
+
+# a batch is written once this many turns are waiting...
+CHAT_PERSIST_BATCH_SIZE = int(os.getenv("CHAT_PERSIST_BATCH_SIZE", "50"))
+# ...or once the oldest has waited this long
+CHAT_PERSIST_FLUSH_SECONDS = float(os.getenv("CHAT_PERSIST_FLUSH_SECONDS", "0.25"))
+# a failed batch is rewritten one turn at a time; turns the database rejects
+# are dropped at once, others are retried on later flushes, then dropped (and logged)
+CHAT_PERSIST_MAX_ATTEMPTS = int(os.getenv("CHAT_PERSIST_MAX_ATTEMPTS", "3"))
+
+
+@dataclass
+class WriterStats:
+    submitted: int = 0
+    written: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    dropped: int = 0
+
+
+class MessageWriter:
+    """
+    Write-behind queue for finished chat turns. submit() only queues the
+    pair; a background task writes queued pairs with one multi-row INSERT
+    per batch, on a timer or as soon as a full batch is waiting.
+
+    Queued pairs have no message_id yet. Until they are written, readers
+    get them from pending() so the next turn still sees them as history.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = CHAT_PERSIST_BATCH_SIZE,
+        interval: float = CHAT_PERSIST_FLUSH_SECONDS,
+        max_attempts: int = CHAT_PERSIST_MAX_ATTEMPTS,
+        session_factory: Optional[Callable[[], AsyncSession]] = None
+    ):
+        # defaults to the app's primary session factory, looked up on each flush
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.stats = WriterStats()
+        self._queue: Deque[MessagePairSchema] = deque()
+        # the batch being written; still pending until its commit is done
+        self._in_flight: List[MessagePairSchema] = []
+        self._attempts = 0
+        self._lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, pair: MessagePairSchema) -> None:
+        """
+        Queue a finished turn for writing. Never blocks.
+        """
+        self._queue.append(pair)
+        self.stats.submitted += 1
+        self._ensure_running()
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self, session_id: int) -> List[MessagePairSchema]:
+        """
+        Turns for the session that are queued or being written, oldest first.
+        """
+        return [p for p in (*self._in_flight, *self._queue) if p.session_id == session_id]
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self.run())
+
+    async def flush(self) -> int:
+        """
+        Write up to one batch. Returns how many pairs were written.
+        """
+        async with self._lock:
+            if not self._in_flight:
+                while self._queue and len(self._in_flight) < self.batch_size:
+                    self._in_flight.append(self._queue.popleft())
+                self._attempts = 0
+            batch = self._in_flight
+            if not batch:
+                return 0
+
+            try:
+                # its own primary session: the turn's session may be closed by now
+                async with self._session_factory()() as db:
+                    await MessageRepository(db=db).add_messages(batch)
+            except Exception:
+                # one bad row fails the whole INSERT; find it so the rest are kept
+                logger.warning("Failed to write %s chat turns in one batch, writing them one by one", len(batch), exc_info=True)
+                self.stats.failed_batches += 1
+                written, retry = await self._write_each(batch)
+            else:
+                written, retry = batch, []
+                self.stats.batches += 1
+
+            self.stats.written += len(written)
+            self._in_flight = retry
+            if retry:
+                self._attempts += 1
+                if self._attempts < self.max_attempts:
+                    logger.error("Failed to write %s chat turns, will retry", len(retry))
+                else:
+                    logger.error("Dropping %s chat turns after %s attempts", len(retry), self._attempts)
+                    self.stats.dropped += len(retry)
+                    self._in_flight = []
+
+        for session_id in {pair.session_id for pair in written}:
+            schedule_compaction(session_id)
+        return len(written)
+
+    async def _write_each(self, batch: List[MessagePairSchema]) -> Tuple[List[MessagePairSchema], List[MessagePairSchema]]:
+        """
+        Write each pair in its own transaction. Returns the written pairs and
+        those worth retrying; pairs the database rejects are dropped.
+        """
+        written, retry = [], []
+        for pair in batch:
+            try:
+                async with self._session_factory()() as db:
+                    await MessageRepository(db=db).add_messages([pair])
+            except (IntegrityError, DataError):
+                # e.g. the session was deleted meanwhile; retrying cannot help
+                logger.exception("Dropping chat turn for session %s rejected by the database", pair.session_id)
+                self.stats.dropped += 1
+            except Exception:
+                retry.append(pair)
+            else:
+                written.append(pair)
+        return written, retry
+
+    def _session_factory(self) -> Callable[[], AsyncSession]:
+        from backend.db import session as db_session
+
+        if self.session_factory is not None:
+            return self.session_factory
+        if db_session.async_session_factory is None:
+            db_session.init_engine()
+        return db_session.async_session_factory
+
+    async def drain(self) -> None:
+        """
+        Write everything queued so far. Called on shutdown before the engine is disposed.
+        """
+        while self._queue or self._in_flight:
+            if not await self.flush() and self._in_flight:
+                # a failing batch: give the database a moment before the next attempt
+                await asyncio.sleep(self.interval)
+
+    async def run(self) -> None:
+        """
+        Flush whenever a full batch is waiting or `interval` seconds have passed.
+        Started on the first submit; runs until cancelled.
+        """
+        wakeup = self._wakeup
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            while self._queue or self._in_flight:
+                written = await self.flush()
+                if not written or len(self._queue) < self.batch_size:
+                    break
+
+    async def close(self) -> None:
+        """
+        Stop the background task and write whatever is still queued.
+        """
+        if self._task is not None:
+            # not in the middle of a write, so no batch is cut off after its commit
+            async with self._lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.drain()
+
+    def get_stats(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "queued": len(self._queue),
+            "in_flight": len(self._in_flight),
+            "batch_size": self.batch_size,
+            "flush_seconds": self.interval,
+        }
+
+
+message_writer = MessageWriter()
@@ -1,16 +1,21 @@
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+from backend.db.session import pin_to_primary
 from backend.db.repositories.guest import GuestRepository
 from backend.db.repositories.room import RoomRepository
-from backend.db.repositories.reservation import ReservationRepository
+from backend.db.repositories.reservation import ReservationRepository, RoomUnavailableError
 from backend.schemas.guest import GuestSchema
 from backend.schemas.room import RoomSchema
 from backend.schemas.reservation import ReservationSchema
+from backend.schemas.pagination import PageSchema, DEFAULT_PAGE_SIZE, build_page, decode_cursor
 
 logger = logging.getLogger(__name__)
 
+# times a booking looks for another room after a concurrent booking took the one it picked
+ROOM_CONFLICT_ATTEMPTS = 3
+
 class ReservationService:
     """
     A service layer class for managing reservations, 
@@ -18,7 +23,10 @@ class ReservationService:
     
     Exposed methods (AI-agent friendly):
     - create_reservation(...)
+    - create_group_reservation(...)
     - get_reservations_for_guest(...)
+    - list_reservations(...)
+    - list_reservations_for_guest(...)
     - modify_reservation(...)
     - cancel_reservation(...)
     """
@@ -46,29 +54,98 @@ class ReservationService:
         3) Create the reservation record.
         4) Mark the room as unavailable if needed.
         """
+        # availability must be checked against the primary, not a lagging replica
+        pin_to_primary(self.db)
 
         try:
             existing_guest = await self.guest_repo.get_guest_by_id(guest.guest_id)
         except ValueError:
             raise ValueError(f"Guest with id={guest.guest_id} not found. Please create the guest first.")
 
-        available_rooms = await self.room_repo.list_available_rooms_by_type(room_type)
-        if not available_rooms:
-            raise ValueError(f"No available {room_type} rooms for the requested date range.")
+        if check_in >= check_out:
+            raise ValueError("check_in must be before check_out")
+
+        for _ in range(ROOM_CONFLICT_ATTEMPTS):
+            # 2) First free room of the type for [check_in, check_out)
+            selected_room = await self.room_repo.find_available_room(room_type, check_in, check_out)
+            if selected_room is None:
+                break
+
+            # 3) Create the reservation; the exclusion constraint rejects it
+            # if a concurrent booking took the room first
+            new_reservation = ReservationSchema(
+                guest_id=existing_guest.guest_id,
+                room_id=selected_room.room_id,
+                check_in=check_in,
+                check_out=check_out,
+                status="booked"
+            )
+            try:
+                return await self.reservation_repo.create_reservation(new_reservation)
+            except RoomUnavailableError:
+                logger.info("Room %s was booked concurrently; looking for another", selected_room.room_id)
+
+        raise ValueError(f"No available {room_type} rooms for the requested date range.")
+
+    async def create_group_reservation(
+        self,
+        guest: GuestSchema,
+        rooms: Dict[str, int],
+        check_in: datetime,
+        check_out: datetime
+    ) -> List[ReservationSchema]:
+        """
+        Books a block of rooms for one guest and date range in a single
+        transaction, e.g. rooms={"single": 30, "double": 10}.
 
-        selected_room = available_rooms[0]  # For simplicity, pick the first available
+        Steps:
+        1) Check the guest exists.
+        2) Pick enough free rooms of every requested type.
+        3) Insert all reservations with one multi-row INSERT and commit once.
+        If any room type cannot be satisfied nothing is booked and ValueError is raised.
+        If a concurrent booking takes one of the picked rooms first, the block
+        is rejected as a whole and picked again.
+        """
+        pin_to_primary(self.db)
 
-        # 3) Create the reservation
-        new_reservation = ReservationSchema(
-            guest_id=existing_guest.guest_id,
-            room_id=selected_room.room_id,
-            check_in=check_in,
-            check_out=check_out,
-            status="booked"
-        )
-        created_reservation = await self.reservation_repo.create_reservation(new_reservation)
+        if check_in >= check_out:
+            raise ValueError("check_in must be before check_out")
+        if not rooms or any(quantity < 1 for quantity in rooms.values()):
+            raise ValueError("Every requested room type needs a quantity of at least 1")
 
-        return created_reservation
+        try:
+            existing_guest = await self.guest_repo.get_guest_by_id(guest.guest_id)
+        except ValueError:
+            raise ValueError(f"Guest with id={guest.guest_id} not found. Please create the guest first.")
+
+        for _ in range(ROOM_CONFLICT_ATTEMPTS):
+            # 2) Free rooms for each type
+            new_reservations = []
+            for room_type, quantity in rooms.items():
+                free_rooms = await self.room_repo.find_available_rooms(room_type, check_in, check_out, quantity)
+                if len(free_rooms) < quantity:
+                    raise ValueError(
+                        f"Only {len(free_rooms)} of {quantity} {room_type} rooms are available for the requested date range."
+                    )
+                new_reservations.extend(
+                    ReservationSchema(
+                        guest_id=existing_guest.guest_id,
+                        room_id=room.room_id,
+                        check_in=check_in,
+                        check_out=check_out,
+                        status="booked"
+                    )
+                    for room in free_rooms
+                )
+
+            # 3) One INSERT ... RETURNING for the whole block; the exclusion
+            # constraint rejects it if any room was booked concurrently
+            try:
+                return await self.reservation_repo.create_reservations(new_reservations)
+            except RoomUnavailableError:
+                logger.info("A room in a group booking was booked concurrently; picking rooms again")
+
+        raise ValueError("The requested rooms were booked by someone else in the meantime. Please try again.")
 
     async def get_reservations_for_guest(self, guest_id: int) -> List[ReservationSchema]:
         """
@@ -76,6 +153,33 @@ class ReservationService:
         """
         return await self.reservation_repo.list_reservations_by_guest_id(guest_id)
 
+    async def list_reservations(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> PageSchema[ReservationSchema]:
+        """
+        Return one page of all reservations, ordered by reservation_id.
+        Raises ValueError for a malformed cursor.
+        """
+        rows = await self.reservation_repo.list_reservations(after_id=decode_cursor(cursor), limit=limit + 1)
+        return build_page(rows, limit, key=lambda r: r.reservation_id)
+
+    async def list_reservations_for_guest(
+        self,
+        guest_id: int,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> PageSchema[ReservationSchema]:
+        """
+        Return one page of the guest's reservations, ordered by reservation_id.
+        Raises ValueError for a malformed cursor.
+        """
+        rows = await self.reservation_repo.list_reservations_by_guest_id(
+            guest_id, after_id=decode_cursor(cursor), limit=limit + 1
+        )
+        return build_page(rows, limit, key=lambda r: r.reservation_id)
+
     async def modify_reservation(
         self,
         reservation_id: int,
@@ -87,23 +191,40 @@ class ReservationService:
         Modify an existing reservation, allowing new check_in, check_out, or room_type.
 
         Steps:
-        1) If room_type is changing, find an available room of that type.
-        2) Call the repository's update_reservation with the relevant fields.
-        3) If we changed room_id, mark the old room as available, and the new one as unavailable (for real system).
-        We'll do a simpler approach here for demonstration.
+        1) Resolve the effective dates and room type from the existing reservation.
+        2) If dates or room_type change, find a room of that type that is free for
+           the new dates, keeping the current room when it still fits.
+        3) Call the repository's update_reservation with the relevant fields.
         """
 
-        # 1) If the user wants to change room_type, pick a new available room
+        pin_to_primary(self.db)
+
+        existing = await self.reservation_repo.get_reservation_by_id(reservation_id)
+        new_check_in = check_in or existing.check_in
+        new_check_out = check_out or existing.check_out
+        if new_check_in >= new_check_out:
+            raise ValueError("check_in must be before check_out")
+
+        # 2) Re-check availability whenever the stay or the room type changes
         new_room_id = None
-        if room_type is not None:
-            # find an available room of that type
-            available_rooms = await self.room_repo.list_available_rooms_by_type(room_type)
-            if not available_rooms:
+        if room_type is not None or check_in is not None or check_out is not None:
+            if room_type is None:
+                current_room = await self.room_repo.get_room_by_room_id(existing.room_id)
+                room_type = current_room.room_type
+
+            new_room = await self.room_repo.find_available_room(
+                room_type,
+                new_check_in,
+                new_check_out,
+                exclude_reservation_id=reservation_id,
+                prefer_room_id=existing.room_id
+            )
+            if new_room is None:
                 raise ValueError(f"No available {room_type} rooms for the requested date range.")
-            new_room = available_rooms[0]
-            new_room_id = new_room.room_id
+            if new_room.room_id != existing.room_id:
+                new_room_id = new_room.room_id
 
-        # 2) Update the reservation with new check_in/check_out/room_id
+        # 3) Update the reservation with new check_in/check_out/room_id
         updated = await self.reservation_repo.update_reservation(
             reservation_id=reservation_id,
             new_check_in=check_in,
@@ -119,6 +240,7 @@ class ReservationService:
         Cancels (deletes) an existing reservation from the database.
         Returns True if successful.
         """
+        pin_to_primary(self.db)
         res = await self.reservation_repo.delete_reservation(reservation_id)
 
         print(f"\n\nReservation with id={reservation_id} was cancelled successfully.\n\n")
@@ -0,0 +1,225 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from typing import Iterable, List, Optional, Sequence
+
+from pydantic import BaseModel
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart, ToolCallPart
+
+from backend.db.cache import ResultCache, TableVersions
+from backend.schemas.guest import GuestSchema
+from backend.schemas.reservation import ReservationSchema
+from backend.schemas.service import ServiceSchema
+
+CHAT_RESPONSE_CACHE_ENABLED = os.getenv("CHAT_RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CHAT_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_RESPONSE_CACHE_MAX_ENTRIES", "512"))
+CHAT_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("CHAT_RESPONSE_CACHE_TTL_SECONDS", "600"))
+
+# tools whose results describe one guest; an answer that used them is only
+# reused for that guest while their reservations are unchanged
+GUEST_TOOLS = frozenset({"get_reservations", "list_service_orders_by_reservation_id"})
+# tools that may be part of a cached turn; anything else changes state
+CACHEABLE_TOOLS = GUEST_TOOLS | {"list_all_services"}
+
+# prompts this short ("and the spa?", "book it") lean on the previous reply
+FOLLOW_UP_MAX_WORDS = 3
+# words that point back into the conversation: affirmatives and pronouns
+FOLLOW_UP_WORDS = frozenset({
+    "yes", "yeah", "yep", "no", "nope", "ok", "okay", "sure",
+    "it", "its", "that", "this", "these", "those", "them", "they", "one", "ones",
+    "there", "same", "other", "another", "else", "instead",
+})
+# phrases in an answer that lean on earlier turns
+BACK_REFERENCES = ("as i mentioned", "as mentioned", "mentioned earlier", "earlier", "previously", "as before", "you asked", "above")
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+_WHITESPACE = re.compile(r"\s+")
+_WORDS = re.compile(r"\w+")
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Case-, whitespace- and trailing-punctuation-insensitive form of a prompt,
+    so "What services do you offer?" and "what services do you offer" match.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+def is_follow_up(prompt: str) -> bool:
+    """
+    Conservative check for prompts that only make sense after the previous
+    reply: short ones, or ones with an affirmative or a pronoun. A false
+    positive only keys the answer to this conversation.
+    """
+    words = _WORDS.findall(normalize_prompt(prompt))
+    return len(words) <= FOLLOW_UP_MAX_WORDS or not FOLLOW_UP_WORDS.isdisjoint(words)
+
+
+def state_hash(items: Iterable[BaseModel]) -> str:
+    payload = json.dumps([item.model_dump(mode="json", exclude={"created_at", "updated_at"}) for item in items], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    Exact-match cache of final chat answers.
+
+    A key is the normalized prompt and a hash of the service catalog. Follow-up
+    prompts, and answers that refer back to earlier turns, are also keyed by
+    a hash of the previous assistant reply, so "yes, book it" never matches
+    a different conversation while a self-contained question is answered
+    whatever came before it. Answers that depend on the guest are also keyed
+    by guest and a hash of their reservations. Every prompt carries the guest's
+    reservations, so an answer is only shared across guests when the prompt
+    had none, no guest tool was called and the answer does not quote the guest;
+    shared answers are only served to guests who have no reservations either.
+    Only turns that called nothing but read tools are stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CHAT_RESPONSE_CACHE_MAX_ENTRIES,
+        ttl: float = CHAT_RESPONSE_CACHE_TTL_SECONDS,
+        enabled: bool = CHAT_RESPONSE_CACHE_ENABLED
+    ):
+        self.ttl = ttl
+        self.enabled = enabled
+        # entries depend on no tables: staleness is handled by the state hashes in the key
+        self._cache = ResultCache(TableVersions(), max_entries=max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def _keys(
+        prompt: str,
+        services: Sequence[ServiceSchema],
+        reservations: Sequence[ReservationSchema],
+        guest: GuestSchema,
+        context: Optional[str]
+    ):
+        base = (normalize_prompt(prompt), state_hash(services), context)
+        return base + (None,), base + ((guest.guest_id, state_hash(reservations)),)
+
+    @staticmethod
+    def _context(previous_reply: Optional[str]) -> str:
+        return hashlib.sha256((previous_reply or "").encode("utf-8")).hexdigest()[:16]
+
+    def get(
+        self,
+        prompt: str,
+        services: Sequence[ServiceSchema],
+        reservations: Sequence[ReservationSchema],
+        guest: GuestSchema,
+        previous_reply: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        The cached answer for this prompt and state, or None.
+        """
+        if not self.enabled:
+            return None
+        # an answer stored for this conversation first, then one for any
+        contexts = [self._context(previous_reply)]
+        if not is_follow_up(prompt):
+            contexts.append(None)
+        for context in contexts:
+            shared_key, guest_key = self._keys(prompt, services, reservations, guest, context)
+            keys = (shared_key, guest_key) if not reservations else (guest_key,)
+            for key in keys:
+                hit, text = self._cache.get(key)
+                if hit:
+                    self.hits += 1
+                    return text
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        prompt: str,
+        services: Sequence[ServiceSchema],
+        reservations: Sequence[ReservationSchema],
+        guest: GuestSchema,
+        new_messages: List[ModelMessage],
+        text: str,
+        previous_reply: Optional[str] = None
+    ) -> bool:
+        """
+        Store a finished turn's answer if it is safe to reuse. Returns True if stored.
+        """
+        if not self.enabled or not text:
+            return False
+
+        tools = {
+            part.tool_name
+            for message in new_messages if isinstance(message, ModelResponse)
+            for part in message.parts if isinstance(part, ToolCallPart)
+        }
+        if not tools <= CACHEABLE_TOOLS:
+            return False
+
+        in_context = is_follow_up(prompt) or _refers_back(text)
+        context = self._context(previous_reply) if in_context else None
+        shared_key, guest_key = self._keys(prompt, services, reservations, guest, context)
+        shared = not reservations and not tools & GUEST_TOOLS and not _mentions_guest(text, guest, reservations)
+        self._cache.put(shared_key if shared else guest_key, text, (), (), self.ttl)
+        self.stores += 1
+        return True
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = self.misses = self.stores = 0
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "stores": self.stores,
+            "expired": self._cache.stats.expired,
+            "evictions": self._cache.stats.evictions,
+            "entries": len(self._cache),
+            "max_entries": self._cache.max_entries,
+            "ttl_seconds": self.ttl,
+            "enabled": self.enabled,
+        }
+
+
+def _mentions_guest(text: str, guest: GuestSchema, reservations: Sequence[ReservationSchema]) -> bool:
+    """
+    Conservative check for answers that quote the guest: their name, email
+    or reservation dates. A false positive only narrows the entry to this guest.
+    """
+    lowered = text.casefold()
+    needles = [guest.email, *guest.full_name.split()]
+    for reservation in reservations:
+        needles += [reservation.check_in.date().isoformat(), reservation.check_out.date().isoformat()]
+    return any(needle and needle.casefold() in lowered for needle in needles)
+
+
+def _refers_back(text: str) -> bool:
+    """
+    Conservative check for answers that lean on earlier turns ("as I mentioned").
+    A false positive only keys the answer to this conversation.
+    """
+    lowered = text.casefold()
+    return any(phrase in lowered for phrase in BACK_REFERENCES)
+
+
+def last_reply(message_history: List[ModelMessage]) -> Optional[str]:
+    """
+    Text of the most recent assistant reply in a replayed history.
+    """
+    for message in reversed(message_history):
+        if isinstance(message, ModelResponse):
+            texts = [part.content for part in message.parts if isinstance(part, TextPart)]
+            if texts:
+                return "".join(texts)
+    return None
+
+
+response_cache = ResponseCache()
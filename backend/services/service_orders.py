@@ -1,7 +1,9 @@
 import logging
 from typing import List, Optional
 
+from backend.db.session import pin_to_primary
 from backend.db.repositories.service import ServiceRepository
+from backend.db.repositories.reservation import ReservationRepository
 from backend.db.repositories.service_order import ServiceOrderRepository
 from backend.schemas.service import ServiceSchema, ServiceOrderSchema
 
@@ -16,6 +18,7 @@ class ServiceOrderService:
     - list_all_services(...)
     - get_service_by_id(...)
     - create_service_order(...)
+    - create_service_orders(...)
     - list_service_orders_by_reservation_id(...)
     - update_service_order(...)
     - delete_service_order(...)
@@ -26,6 +29,7 @@ class ServiceOrderService:
         self.db = db
         self.service_repo = ServiceRepository(db=db)
         self.service_order_repo = ServiceOrderRepository(db=db)
+        self.reservation_repo = ReservationRepository(db=db)
 
     async def list_all_services(self) -> List[ServiceSchema]:
         """
@@ -69,6 +73,34 @@ class ServiceOrderService:
         created = await self.service_order_repo.create_service_order(new_order)
         return created
 
+    async def create_service_orders(self, orders: List[ServiceOrderSchema]) -> List[ServiceOrderSchema]:
+        """
+        Create a batch of service orders in one transaction.
+        Quantities must be positive, and the service and reservation ids are
+        validated with one query each first; if anything is invalid nothing
+        is created and ValueError is raised.
+        """
+        if any(order.quantity < 1 for order in orders):
+            raise ValueError("Cannot create orders. Every quantity must be at least 1.")
+
+        # the reservation check must not miss a reservation a replica has not seen yet
+        pin_to_primary(self.db)
+
+        requested_ids = {order.service_id for order in orders}
+        known_services = await self.service_repo.get_services_by_ids(list(requested_ids))
+        known_ids = {service.service_id for service in known_services}
+        missing_ids = sorted(requested_ids - known_ids)
+        if missing_ids:
+            raise ValueError(f"Cannot create orders. Services with ids={missing_ids} not found.")
+
+        requested_reservations = {order.reservation_id for order in orders}
+        known_reservations = await self.reservation_repo.get_reservations_by_ids(list(requested_reservations))
+        missing_reservations = sorted(requested_reservations - {r.reservation_id for r in known_reservations})
+        if missing_reservations:
+            raise ValueError(f"Cannot create orders. Reservations with ids={missing_reservations} not found.")
+
+        return await self.service_order_repo.create_service_orders(orders)
+
     async def list_service_orders_by_reservation_id(self, reservation_id: int) -> List[ServiceOrderSchema]:
         """
         Return all service orders associated with a particular reservation_id.
@@ -81,6 +113,7 @@ class ServiceOrderService:
         Delete a single service order by its order_id. 
         Returns True if successfully deleted; otherwise raises ValueError.
         """
+        pin_to_primary(self.db)
         order = await self.service_order_repo.get_service_order_by_order_id(order_id)
         if not order:
             raise ValueError(f"Service order with id={order_id} not found.")
@@ -1,13 +1,18 @@
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.db.repositories.session import SessionRepository
 from backend.db.repositories.guest import GuestRepository
+from backend.db.repositories.message import MessageRepository
 from backend.schemas.session import SessionSchema
+from backend.schemas.message import MessagePairSchema
+from backend.schemas.pagination import PageSchema, DEFAULT_PAGE_SIZE, build_page, decode_cursor
 
 class SessionService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.guest_repository = GuestRepository(db=db)
         self.session_repository = SessionRepository(db=db)
+        self.message_repository = MessageRepository(db=db)
 
     async def create_session(self, guest_id: int) -> SessionSchema:
         """
@@ -35,4 +40,30 @@ class SessionService:
         """
         sessions = await self.session_repository.get_sessions_by_guest_id(guest_id)
 
-        return sessions
\ No newline at end of file
+        return sessions
+
+    async def list_sessions(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> PageSchema[SessionSchema]:
+        """
+        Return one page of sessions ordered by session_id.
+        Raises ValueError for a malformed cursor.
+        """
+        sessions = await self.session_repository.list_sessions(after_id=decode_cursor(cursor), limit=limit + 1)
+
+        return build_page(sessions, limit, key=lambda s: s.session_id)
+
+    async def list_messages(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> PageSchema[MessagePairSchema]:
+        """
+        Return one page of message pairs across all sessions, ordered by message_id.
+        Raises ValueError for a malformed cursor.
+        """
+        messages = await self.message_repository.list_messages(after_id=decode_cursor(cursor), limit=limit + 1)
+
+        return build_page(messages, limit, key=lambda m: m.message_id)
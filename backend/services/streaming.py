@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+# bump when frames change incompatibly; clients check "v" on every frame
+STREAM_PROTOCOL_VERSION = 1
+# a delta frame is sent once this many characters are buffered...
+CHAT_STREAM_COALESCE_CHARS = int(os.getenv("CHAT_STREAM_COALESCE_CHARS", "48"))
+# ...or once this long has passed since the previous frame
+CHAT_STREAM_COALESCE_SECONDS = float(os.getenv("CHAT_STREAM_COALESCE_SECONDS", "0.05"))
+# SSE keep-alive comment after this many quiet seconds; keeps proxies from
+# timing out long tool calls and surfaces dead clients on the next write
+CHAT_SSE_HEARTBEAT_SECONDS = float(os.getenv("CHAT_SSE_HEARTBEAT_SECONDS", "15"))
+
+# chat event type -> SSE event name
+SSE_EVENT_NAMES = {
+    "delta": "token",
+    "tool_start": "tool_start",
+    "tool_end": "tool_end",
+    "done": "done",
+    "error": "error",
+}
+
+
+@dataclass
+class ChatEvent:
+    """
+    One thing that happened during a chat turn, independent of the wire format.
+    delta: data["text"] is new assistant text.
+    tool_start / tool_end: data["tool"], plus args or ok and elapsed_ms.
+    heartbeat: nothing happened for a while; only sent when asked for.
+    done: data carries usage and session_id (and cached=True for a cached answer);
+    the turn is written in the background.
+    """
+    type: Literal["delta", "tool_start", "tool_end", "heartbeat", "done", "error"]
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class DeltaCoalescer:
+    """
+    Groups text deltas into fewer, larger frames. The first delta goes out
+    immediately (time to first token); after that text is held until
+    max_chars are buffered or max_delay has passed since the last frame,
+    so fast streams are batched by size and slow ones by time. add() only
+    sees time pass when text arrives; callers use due_in() to flush on time
+    while the stream is quiet.
+    """
+
+    def __init__(
+        self,
+        max_chars: int = CHAT_STREAM_COALESCE_CHARS,
+        max_delay: float = CHAT_STREAM_COALESCE_SECONDS
+    ):
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self._buffer: List[str] = []
+        self._size = 0
+        self._last_flush: Optional[float] = None
+
+    def add(self, text: str) -> Optional[str]:
+        """
+        Buffer text; return the coalesced text if a frame is due now.
+        """
+        if not text:
+            return None
+        self._buffer.append(text)
+        self._size += len(text)
+
+        now = time.monotonic()
+        if (
+            self._last_flush is None
+            or self._size >= self.max_chars
+            or now - self._last_flush >= self.max_delay
+        ):
+            return self.flush(now)
+        return None
+
+    def due_in(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds until buffered text is due to be flushed, or None if nothing is buffered.
+        """
+        if not self._buffer:
+            return None
+        if self._last_flush is None:
+            return 0.0
+        now = now if now is not None else time.monotonic()
+        return max(0.0, self._last_flush + self.max_delay - now)
+
+    def flush(self, now: Optional[float] = None) -> Optional[str]:
+        """
+        Return and clear whatever is buffered, or None if nothing is.
+        """
+        if not self._buffer:
+            return None
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._size = 0
+        self._last_flush = now if now is not None else time.monotonic()
+        return text
+
+
+def make_frame(seq: int, type: str, **data: Any) -> Dict[str, Any]:
+    """
+    One protocol frame: {"v": version, "seq": n, "type": ..., **data}.
+    """
+    return {"v": STREAM_PROTOCOL_VERSION, "seq": seq, "type": type, **data}
+
+
+async def protocol_frames(
+    events: AsyncIterator[ChatEvent],
+    coalescer: Optional[DeltaCoalescer] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Turn chat events into versioned protocol frames with increasing seq numbers.
+
+    Delta frames carry only new text and are coalesced; buffered text is
+    always flushed before any other frame, and on its own once max_delay
+    passes with no new event (e.g. while a tool runs). A failure mid-turn
+    ends the stream with an error frame instead of an exception.
+    """
+    coalescer = coalescer or DeltaCoalescer()
+    seq = 0
+
+    def frame(type: str, **data: Any) -> Dict[str, Any]:
+        nonlocal seq
+        seq += 1
+        return make_frame(seq, type, **data)
+
+    # the next event is read in a task so waiting for it can time out
+    # without cancelling the read
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(events.__anext__())
+            try:
+                event = await asyncio.wait_for(asyncio.shield(pending), coalescer.due_in())
+            except TimeoutError:
+                text = coalescer.flush()
+                if text is not None:
+                    yield frame("delta", text=text)
+                continue
+            except StopAsyncIteration:
+                pending = None
+                break
+            pending = None
+
+            if event.type == "heartbeat":
+                continue
+            if event.type == "delta":
+                text = coalescer.add(event.data.get("text", ""))
+                if text is not None:
+                    yield frame("delta", text=text)
+                continue
+
+            text = coalescer.flush()
+            if text is not None:
+                yield frame("delta", text=text)
+            yield frame(event.type, **event.data)
+
+        text = coalescer.flush()
+        if text is not None:
+            yield frame("delta", text=text)
+    except Exception:
+        logger.exception("Chat stream failed")
+        text = coalescer.flush()
+        if text is not None:
+            yield frame("delta", text=text)
+        # details stay in the log and the run trace, not on the wire
+        yield frame("error", error="The assistant could not complete this reply")
+    finally:
+        # closed early (client gone, turn cancelled): stop the read so the
+        # caller can close the event stream
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.wait([pending])
+
+
+async def ndjson_frames(events: AsyncIterator[ChatEvent], coalescer: Optional[DeltaCoalescer] = None) -> AsyncIterator[str]:
+    """
+    Protocol frames as NDJSON lines, for the /chat StreamingResponse.
+    """
+    async for frame in protocol_frames(events, coalescer):
+        yield json.dumps(frame, default=str) + "\n"
+
+
+def encode_sse(seq: int, event: str, data: Dict[str, Any]) -> str:
+    """
+    One Server-Sent Events message; seq doubles as the event id.
+    """
+    return f"id: {seq}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def sse_events(events: AsyncIterator[ChatEvent]) -> AsyncIterator[str]:
+    """
+    Encode chat events as text/event-stream messages: token, tool_start,
+    tool_end, done and error events, with heartbeats sent as SSE comments.
+    Tokens are not coalesced; each one is written as soon as it arrives.
+    """
+    seq = 0
+    try:
+        async for event in events:
+            if event.type == "heartbeat":
+                yield ": heartbeat\n\n"
+                continue
+            seq += 1
+            yield encode_sse(seq, SSE_EVENT_NAMES[event.type], event.data)
+    except Exception:
+        logger.exception("Chat SSE stream failed")
+        seq += 1
+        # details stay in the log and the run trace, not on the wire
+        yield encode_sse(seq, "error", {"error": "The assistant could not complete this reply"})
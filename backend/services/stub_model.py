@@ -0,0 +1,186 @@
+import os
+import re
+import json
+import random
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional, Union
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart
+)
+from pydantic_ai.models import Model
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, DeltaToolCalls, FunctionModel
+
+logger = logging.getLogger(__name__)
+
+# set CHAT_MODEL (or CHAT_SUMMARY_MODEL) to this to run without a provider
+STUB_MODEL_NAME = "stub"
+
+# delay before the first chunk of every model response
+STUB_MODEL_TTFT_SECONDS = float(os.getenv("STUB_MODEL_TTFT_SECONDS", "0.3"))
+# streaming speed after the first chunk; 0 streams as fast as possible
+STUB_MODEL_TOKENS_PER_SECOND = float(os.getenv("STUB_MODEL_TOKENS_PER_SECOND", "50"))
+# share of model requests that fail, like a provider 5xx
+STUB_MODEL_ERROR_RATE = float(os.getenv("STUB_MODEL_ERROR_RATE", "0"))
+# length of a text answer, in words
+STUB_MODEL_RESPONSE_WORDS = int(os.getenv("STUB_MODEL_RESPONSE_WORDS", "40"))
+STUB_MODEL_SEED = os.getenv("STUB_MODEL_SEED")
+
+# prompt keywords -> read tool the stub calls before answering
+TOOL_KEYWORDS = [
+    (re.compile(r"\b(service orders?|orders?)\b"), "list_service_orders_by_reservation_id"),
+    (re.compile(r"\b(reservations?|bookings?|stay|check.?in|check.?out)\b"), "get_reservations"),
+    (re.compile(r"\b(services?|offer|menu)\b"), "list_all_services"),
+]
+
+FILLER = (
+    "Let me know if there is anything else I can help you with during your stay at WhipSplash, "
+    "whether that is a change to your reservation, an extra service or a question about the hotel."
+).split()
+
+
+class StubModelError(RuntimeError):
+    """
+    A simulated provider failure.
+    """
+
+
+def _guest_text(prompt: str) -> str:
+    # ChatService puts the injected context before "<user prompt>"; only what
+    # the guest typed decides which tools to call
+    return prompt.rsplit("<user prompt>", 1)[-1].strip()
+
+
+def _latest_prompt(messages: List[ModelMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, ModelRequest):
+            for part in reversed(message.parts):
+                if isinstance(part, UserPromptPart):
+                    return part.content
+    return ""
+
+
+def _tool_calls(messages: List[ModelMessage], info: AgentInfo) -> List[ToolCallPart]:
+    available = {tool.name for tool in info.function_tools}
+    prompt = _latest_prompt(messages)
+    guest_text = _guest_text(prompt).casefold()
+
+    calls = []
+    for pattern, tool_name in TOOL_KEYWORDS:
+        if tool_name not in available or not pattern.search(guest_text):
+            continue
+        args = {}
+        if tool_name == "list_service_orders_by_reservation_id":
+            # the guest's reservations are in the injected context
+            match = re.search(r"\b(?:reservation|booking)\s*#?(\d+)", guest_text) or re.search(r"reservation_id=(\d+)", prompt)
+            if match is None:
+                continue
+            args = {"reservation_id": int(match.group(1))}
+        calls.append(ToolCallPart.from_raw_args(tool_name, args))
+    return calls
+
+
+def _answer(messages: List[ModelMessage], words: int) -> str:
+    last = messages[-1] if messages else None
+    returns = [p for p in getattr(last, "parts", []) if isinstance(p, ToolReturnPart)]
+
+    if returns:
+        found = []
+        for part in returns:
+            content = part.content
+            count = len(content) if isinstance(content, list) else 1
+            found.append(f"{count} result{'s' if count != 1 else ''} from {part.tool_name}")
+        lead = f"I checked for you and found {', '.join(found)}."
+    else:
+        guest_text = _guest_text(_latest_prompt(messages))
+        lead = f"Thanks for your message about \"{guest_text[:60]}\"." if guest_text else "Hello!"
+
+    text = lead.split()
+    while len(text) < words:
+        text.extend(FILLER[: words - len(text)])
+    return " ".join(text)
+
+
+class StubModel:
+    """
+    Scripted stand-in for the chat model, for load tests and offline runs.
+
+    It calls the real read tools when the guest's message mentions them. It
+    answers tool results with a templated summary, and otherwise with a
+    templated reply of STUB_MODEL_RESPONSE_WORDS words. Time to first token,
+    tokens per second and error rate are configurable.
+    """
+
+    def __init__(
+        self,
+        ttft: float = STUB_MODEL_TTFT_SECONDS,
+        tokens_per_second: float = STUB_MODEL_TOKENS_PER_SECOND,
+        error_rate: float = STUB_MODEL_ERROR_RATE,
+        response_words: int = STUB_MODEL_RESPONSE_WORDS,
+        seed: Optional[str] = STUB_MODEL_SEED
+    ):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.response_words = response_words
+        self._random = random.Random(seed)
+
+    async def _start(self) -> None:
+        await asyncio.sleep(self.ttft)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise StubModelError("Simulated model failure")
+
+    def _plan(self, messages: List[ModelMessage], info: AgentInfo) -> Union[List[ToolCallPart], str]:
+        last = messages[-1] if messages else None
+        answered_tools = any(isinstance(p, ToolReturnPart) for p in getattr(last, "parts", []))
+        if not answered_tools:
+            calls = _tool_calls(messages, info)
+            if calls:
+                return calls
+        return _answer(messages, self.response_words)
+
+    async def respond(self, messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        await self._start()
+        plan = self._plan(messages, info)
+        if isinstance(plan, list):
+            return ModelResponse(parts=plan)
+        if self.tokens_per_second:
+            await asyncio.sleep(len(plan.split()) / self.tokens_per_second)
+        return ModelResponse(parts=[TextPart(content=plan)])
+
+    async def stream(self, messages: List[ModelMessage], info: AgentInfo) -> AsyncIterator[Union[str, DeltaToolCalls]]:
+        await self._start()
+        plan = self._plan(messages, info)
+        if isinstance(plan, list):
+            yield {
+                i: DeltaToolCall(name=call.tool_name, json_args=json.dumps(call.args_as_dict()))
+                for i, call in enumerate(plan)
+            }
+            return
+
+        delay = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        for i, word in enumerate(plan.split(" ")):
+            if i and delay:
+                await asyncio.sleep(delay)
+            yield word if i == 0 else " " + word
+
+    def as_model(self) -> FunctionModel:
+        return FunctionModel(self.respond, stream_function=self.stream)
+
+
+def resolve_model(name: str) -> Union[Model, str]:
+    """
+    The model for an agent: the stub when `name` is STUB_MODEL_NAME,
+    otherwise the name itself, for pydantic-ai to resolve.
+    """
+    if name == STUB_MODEL_NAME:
+        logger.warning("Using the offline stub model; responses are scripted")
+        return StubModel().as_model()
+    return name
@@ -0,0 +1,119 @@
+import os
+import asyncio
+import logging
+from typing import Optional, Set
+
+from pydantic_ai import Agent
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.repositories.message import MessageRepository
+from backend.db.repositories.session import SessionRepository
+from backend.schemas.message import MessagePairSchema
+from backend.services.stub_model import resolve_model
+
+logger = logging.getLogger(__name__)
+
+# most recent pairs always replayed verbatim, never folded into the summary
+CHAT_SUMMARY_KEEP_PAIRS = int(os.getenv("CHAT_SUMMARY_KEEP_PAIRS", "6"))
+# fold only once at least this many pairs have aged out of the recent window
+CHAT_SUMMARY_MIN_PAIRS = int(os.getenv("CHAT_SUMMARY_MIN_PAIRS", "4"))
+CHAT_SUMMARY_MAX_WORDS = int(os.getenv("CHAT_SUMMARY_MAX_WORDS", "250"))
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", "openai:gpt-4o-mini")
+
+summarizer = Agent(
+    resolve_model(CHAT_SUMMARY_MODEL),
+    system_prompt=(
+        "You maintain a running summary of a conversation between a hotel guest and the "
+        "WhipSplash hotel assistant. Merge the new turns into the existing summary. Keep "
+        "facts that matter later: the guest's requests and preferences, reservation and "
+        "service order ids, dates, room types and anything still unresolved. Drop small talk. "
+        f"Answer with the updated summary only, at most {CHAT_SUMMARY_MAX_WORDS} words."
+    ),
+    defer_model_check=True,
+)
+
+
+def _format_turns(pairs: list[MessagePairSchema]) -> str:
+    return "\n".join(
+        f"Guest: {pair.user_message.content}\nAssistant: {pair.ai_message.content}"
+        for pair in pairs
+    )
+
+
+class SummaryService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.message_repo = MessageRepository(db=db)
+        self.session_repo = SessionRepository(db=db)
+
+    async def compact(self, session_id: int) -> bool:
+        """
+        Fold the session's unsummarized pairs that are older than the last
+        CHAT_SUMMARY_KEEP_PAIRS into its rolling summary.
+        Returns True if the summary was updated.
+        """
+        session = await self.session_repo.get_session_by_id(session_id)
+        pairs = await self.message_repo.get_messages_by_session_id_after(
+            session_id,
+            after_id=session.summary_through_message_id,
+            limit=CHAT_SUMMARY_KEEP_PAIRS + CHAT_SUMMARY_MIN_PAIRS * 4
+        )
+
+        to_fold = pairs[:-CHAT_SUMMARY_KEEP_PAIRS] if CHAT_SUMMARY_KEEP_PAIRS else pairs
+        if len(to_fold) < CHAT_SUMMARY_MIN_PAIRS:
+            return False
+
+        prompt = (
+            f"Existing summary:\n{session.summary or '(none yet)'}\n\n"
+            f"New turns:\n{_format_turns(to_fold)}"
+        )
+        result = await summarizer.run(prompt)
+
+        return await self.session_repo.update_session_summary(
+            session_id, result.data.strip(), to_fold[-1].message_id
+        )
+
+
+# session ids with a compaction in flight, and the tasks themselves so they
+# are not garbage collected before they finish
+_compacting: Set[int] = set()
+_tasks: Set[asyncio.Task] = set()
+
+
+async def _compact_in_background(session_id: int) -> None:
+    from backend.db import session as db_session
+
+    if db_session.async_session_factory is None:
+        db_session.init_engine()
+    try:
+        # its own primary session: the request's session is closed by now, and
+        # the summary has to see the pair that was just written
+        async with db_session.async_session_factory() as db:
+            if await SummaryService(db=db).compact(session_id):
+                logger.info("Compacted conversation summary for session %s", session_id)
+    except Exception:
+        logger.exception("Failed to compact conversation summary for session %s", session_id)
+    finally:
+        _compacting.discard(session_id)
+
+
+def schedule_compaction(session_id: int) -> Optional[asyncio.Task]:
+    """
+    Start a background compaction for the session unless one is already running.
+    """
+    if session_id in _compacting:
+        return None
+    _compacting.add(session_id)
+
+    task = asyncio.create_task(_compact_in_background(session_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+async def wait_for_compactions() -> None:
+    """
+    Let in-flight compactions finish. Called on shutdown before the engine is disposed.
+    """
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
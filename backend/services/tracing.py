@@ -0,0 +1,150 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, List, Optional
+
+from backend.schemas.trace import TraceEventSchema, TraceSchema
+
+logger = logging.getLogger(__name__)
+
+CHAT_TRACE_DIR = os.getenv("CHAT_TRACE_DIR", "traces")
+CHAT_TRACE_FILE = "chat_traces.jsonl"
+CHAT_TRACE_MAX_BYTES = int(os.getenv("CHAT_TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+CHAT_TRACE_BACKUPS = int(os.getenv("CHAT_TRACE_BACKUPS", "5"))
+CHAT_TRACE_FLUSH_SECONDS = float(os.getenv("CHAT_TRACE_FLUSH_SECONDS", "1.0"))
+# events kept per run; older ones are dropped (and counted) once the ring is full
+CHAT_TRACE_RUN_EVENTS = int(os.getenv("CHAT_TRACE_RUN_EVENTS", "200"))
+# finished runs kept in memory for GET /traces
+CHAT_TRACE_RECENT_RUNS = int(os.getenv("CHAT_TRACE_RECENT_RUNS", "100"))
+
+
+class RunTrace:
+    """
+    Events recorded during one chat turn, in a fixed-size ring buffer.
+    Recording only appends in memory, so it is safe on the event loop.
+    """
+
+    def __init__(self, session_id: int, guest_id: int, capacity: int = CHAT_TRACE_RUN_EVENTS):
+        self.run_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.guest_id = guest_id
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.events: Deque[TraceEventSchema] = deque(maxlen=capacity)
+        self.dropped_events = 0
+
+    def record(self, kind: str, **data: Any) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.dropped_events += 1
+        self.events.append(TraceEventSchema(kind=kind, at=datetime.now(timezone.utc), data=data))
+
+    def to_schema(self) -> TraceSchema:
+        return TraceSchema(
+            run_id=self.run_id,
+            session_id=self.session_id,
+            guest_id=self.guest_id,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            events=list(self.events),
+            dropped_events=self.dropped_events
+        )
+
+
+class TraceSink:
+    """
+    Collects finished run traces and appends them to size-rotated JSONL files
+    in batches from a background task, with the file I/O in a worker thread.
+    The most recent runs are also kept in memory for the traces endpoint.
+    """
+
+    def __init__(
+        self,
+        directory: str = CHAT_TRACE_DIR,
+        max_bytes: int = CHAT_TRACE_MAX_BYTES,
+        backups: int = CHAT_TRACE_BACKUPS,
+        recent_runs: int = CHAT_TRACE_RECENT_RUNS
+    ):
+        self.path = os.path.join(directory, CHAT_TRACE_FILE)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.recent: Deque[TraceSchema] = deque(maxlen=recent_runs)
+        self._pending: List[TraceSchema] = []
+        self._lock = asyncio.Lock()
+
+    def start_run(self, session_id: int, guest_id: int) -> RunTrace:
+        return RunTrace(session_id=session_id, guest_id=guest_id)
+
+    def finish(self, trace: RunTrace) -> None:
+        """
+        Hand a finished run to the sink. Never blocks; the write happens on the next flush.
+        """
+        trace.finished_at = datetime.now(timezone.utc)
+        schema = trace.to_schema()
+        self.recent.append(schema)
+        self._pending.append(schema)
+
+    def recent_traces(self, limit: int, session_id: Optional[int] = None) -> List[TraceSchema]:
+        """
+        Newest first, optionally only for one session.
+        """
+        traces = [t for t in reversed(self.recent) if session_id is None or t.session_id == session_id]
+        return traces[:limit]
+
+    async def flush(self) -> int:
+        """
+        Write every pending trace in one batch. Returns how many were written.
+        """
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            lines = "".join(trace.model_dump_json() + "\n" for trace in batch)
+            try:
+                await asyncio.to_thread(self._write, lines)
+            except Exception:
+                logger.exception("Failed to write %s chat traces to %s", len(batch), self.path)
+                return 0
+            return len(batch)
+
+    def _write(self, lines: str) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def _rotate(self) -> None:
+        # chat_traces.jsonl -> .1 -> .2 ... the oldest backup is overwritten
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    async def run(self, interval: float = CHAT_TRACE_FLUSH_SECONDS) -> None:
+        """
+        Flush every `interval` seconds. Run as a background task.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+
+trace_sink = TraceSink()
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Best-effort conversion of tool arguments and results for a trace event.
+    """
+    try:
+        return json.loads(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return str(value)
@@ -0,0 +1,69 @@
+"""
+006_add_performance_indexes
+
+Revision ID: 0006_performance_indexes
+Revises: 0005_seed_sessions
+Create Date: 2025-01-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006_performance_indexes'
+down_revision = '0005_seed_sessions'
+branch_labels = None
+depends_on = None
+
+# cancelled reservations do not hold a room
+ACTIVE_RESERVATION_PREDICATE = "status <> 'cancelled'"
+
+INDEXES = [
+    # per-guest lookups: list_reservations_by_guest_id, sessions, auth
+    ('ix_reservations_guest_id', 'reservations', ['guest_id'], None),
+    ('ix_sessions_guest_id', 'sessions', ['guest_id'], None),
+
+    # ordered history per session: (session_id, message_id) serves both the
+    # filter and the ORDER BY message_id without a sort
+    ('ix_messages_session_id_message_id', 'messages', ['session_id', 'message_id'], None),
+
+    ('ix_service_orders_reservation_id', 'service_orders', ['reservation_id'], None),
+    ('ix_rooms_room_type', 'rooms', ['room_type'], None),
+
+    # date range predicates for active reservations, per room and overall
+    (
+        'ix_reservations_active_room_dates',
+        'reservations',
+        ['room_id', 'check_in', 'check_out'],
+        ACTIVE_RESERVATION_PREDICATE,
+    ),
+    (
+        'ix_reservations_active_dates',
+        'reservations',
+        ['check_in', 'check_out'],
+        ACTIVE_RESERVATION_PREDICATE,
+    ),
+]
+
+
+def upgrade():
+    """
+    CREATE INDEX CONCURRENTLY cannot run inside a transaction,
+    so every index is built in an autocommit block.
+    """
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,36 @@
+"""
+007_add_reservation_stay_gist_index
+
+Revision ID: 0007_reservation_stay_gist
+Revises: 0006_performance_indexes
+Create Date: 2025-01-15
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0007_reservation_stay_gist'
+down_revision = '0006_performance_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    GiST index on the [check_in, check_out) stay range of active reservations.
+    Serves the && overlap anti-join in RoomRepository; the expression must stay
+    identical to backend.db.repositories.room.stay_range.
+    """
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reservations_active_stay_gist
+            ON reservations USING gist (tstzrange(check_in, check_out, '[)'))
+            WHERE status <> 'cancelled'
+            """
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_reservations_active_stay_gist")
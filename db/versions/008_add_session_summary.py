@@ -0,0 +1,30 @@
+"""
+008_add_session_summary
+
+Revision ID: 0008_session_summary
+Revises: 0007_reservation_stay_gist
+Create Date: 2025-01-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008_session_summary'
+down_revision = '0007_reservation_stay_gist'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Rolling conversation summary per session. summary covers every
+    message pair up to and including summary_through_message_id.
+    """
+    op.add_column('sessions', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('sessions', sa.Column('summary_through_message_id', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('sessions', 'summary_through_message_id')
+    op.drop_column('sessions', 'summary')
@@ -0,0 +1,29 @@
+"""
+009_add_message_transcript
+
+Revision ID: 0009_message_transcript
+Revises: 0008_session_summary
+Create Date: 2025-01-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0009_message_transcript'
+down_revision = '0008_session_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Full model transcript of each turn, tool calls and returns included,
+    as zlib-compressed JSON. Older rows keep only the text columns.
+    """
+    op.add_column('messages', sa.Column('transcript', postgresql.BYTEA(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('messages', 'transcript')
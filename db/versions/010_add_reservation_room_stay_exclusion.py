@@ -0,0 +1,146 @@
+"""
+010_add_reservation_room_stay_exclusion
+
+Revision ID: 0010_reservation_room_exclusion
+Revises: 0009_message_transcript
+Create Date: 2025-01-18
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0010_reservation_room_exclusion'
+down_revision = '0009_message_transcript'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# give up instead of queueing behind long transactions (and blocking everyone queued behind us)
+LOCK_TIMEOUT = "5s"
+
+# the first active reservation that overlaps an earlier one on the same room
+NEXT_CONFLICT = sa.text(
+    """
+    SELECT later.reservation_id, later.room_id, later.check_in, later.check_out, rooms.room_type
+    FROM reservations later
+    JOIN rooms ON rooms.room_id = later.room_id
+    WHERE later.status <> 'cancelled'
+      AND NOT (later.reservation_id = ANY(:skip))
+      AND EXISTS (
+          SELECT 1 FROM reservations earlier
+          WHERE earlier.room_id = later.room_id
+            AND earlier.reservation_id < later.reservation_id
+            AND earlier.status <> 'cancelled'
+            AND tstzrange(earlier.check_in, earlier.check_out, '[)')
+                && tstzrange(later.check_in, later.check_out, '[)')
+      )
+    ORDER BY later.reservation_id
+    LIMIT 1
+    """
+).bindparams(sa.bindparam("skip", type_=postgresql.ARRAY(sa.BigInteger)))
+
+# a room of the type with no active reservation overlapping the stay
+FREE_ROOM = sa.text(
+    """
+    SELECT rooms.room_id
+    FROM rooms
+    WHERE rooms.room_type = :room_type
+      AND NOT EXISTS (
+          SELECT 1 FROM reservations other
+          WHERE other.room_id = rooms.room_id
+            AND other.reservation_id <> :reservation_id
+            AND other.status <> 'cancelled'
+            AND tstzrange(other.check_in, other.check_out, '[)')
+                && tstzrange(:check_in, :check_out, '[)')
+      )
+    ORDER BY rooms.room_id
+    LIMIT 1
+    """
+)
+
+
+def _move_double_bookings(conn) -> list:
+    """
+    Move each reservation that double-books a room to a free room of the same
+    type; the earliest booking keeps the room. Returns the ids that could not
+    be moved.
+    """
+    stuck = []
+    while True:
+        conflict = conn.execute(NEXT_CONFLICT, {"skip": stuck}).first()
+        if conflict is None:
+            return stuck
+
+        free_room = conn.execute(FREE_ROOM, {
+            "room_type": conflict.room_type,
+            "reservation_id": conflict.reservation_id,
+            "check_in": conflict.check_in,
+            "check_out": conflict.check_out,
+        }).scalar()
+        if free_room is None:
+            stuck.append(conflict.reservation_id)
+            continue
+
+        conn.execute(
+            sa.text("UPDATE reservations SET room_id = :room_id WHERE reservation_id = :reservation_id"),
+            {"room_id": free_room, "reservation_id": conflict.reservation_id}
+        )
+        logger.warning(
+            "Reservation %s double-booked room %s; moved to room %s",
+            conflict.reservation_id, conflict.room_id, free_room
+        )
+
+
+def upgrade():
+    """
+    No two active reservations may hold the same room for overlapping
+    [check_in, check_out) stays. The database enforces this, so concurrent
+    bookings cannot both pass the availability check and double-book a room.
+
+    room_id is compared as a one-point int8range so the constraint only needs
+    the built-in range GiST operator class, not the btree_gist extension.
+
+    Existing double bookings are moved to a free room of the same type first
+    (each is logged); if any cannot be moved the migration stops and lists
+    them, so they can be resolved by hand before running it again.
+
+    Locking: writes to reservations are blocked from the start (SHARE ROW
+    EXCLUSIVE), so no new overlap can appear after the check. Adding the
+    constraint then builds its GiST index under ACCESS EXCLUSIVE, blocking
+    reads too; exclusion constraints cannot use an index built CONCURRENTLY.
+    That takes about as long as building ix_reservations_active_stay_gist
+    did in 007 -- run it in a maintenance window on a large table. Both
+    locks give up after LOCK_TIMEOUT rather than queue behind long transactions.
+    """
+    conn = op.get_bind()
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute("LOCK TABLE reservations IN SHARE ROW EXCLUSIVE MODE")
+
+    stuck = _move_double_bookings(conn)
+    if stuck:
+        raise RuntimeError(
+            "Cannot add ex_reservations_room_stay: reservations "
+            f"{', '.join(str(reservation_id) for reservation_id in stuck)} double-book a room and no other "
+            "room of the same type is free for their stay. Cancel or move them, then rerun the migration."
+        )
+
+    op.execute(
+        """
+        ALTER TABLE reservations
+        ADD CONSTRAINT ex_reservations_room_stay
+        EXCLUDE USING gist (
+            int8range(room_id, room_id, '[]') WITH &&,
+            tstzrange(check_in, check_out, '[)') WITH &&
+        )
+        WHERE (status <> 'cancelled')
+        """
+    )
+
+
+def downgrade():
+    op.execute("ALTER TABLE reservations DROP CONSTRAINT IF EXISTS ex_reservations_room_stay")
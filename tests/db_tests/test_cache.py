@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.cache import result_cache, table_versions
+from backend.db.repositories.reservation import ReservationRepository
+from backend.db.repositories.service import ServiceRepository
+from backend.schemas.reservation import ReservationSchema
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_are_served_from_cache(async_session: AsyncSession):
+    """
+    Tests that a second 'list_services' call in 'ServiceRepository'
+    is a cache hit and returns the same services.
+    """
+    # Arrange
+    result_cache.clear()
+    repo = ServiceRepository(db=async_session)
+
+    # Act
+    first = await repo.list_services()
+    second = await repo.list_services()
+
+    # Assert
+    assert result_cache.stats.misses == 1 and result_cache.stats.hits == 1, "Expected one query, then a hit"
+    assert second == first, "Expected the cached services to match the queried ones"
+    assert second is not first, "Expected callers to get their own list"
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_cached_reads(async_session: AsyncSession):
+    """
+    Tests that 'create_reservation' in 'ReservationRepository' invalidates
+    the cached 'list_reservations_by_guest_id' results.
+    """
+    # Arrange
+    result_cache.clear()
+    repo = ReservationRepository(db=async_session)
+    guest_id = 2
+    before = await repo.list_reservations_by_guest_id(guest_id=guest_id)
+
+    # Act
+    created = await repo.create_reservation(
+        ReservationSchema(
+            guest_id=guest_id,
+            room_id=101,
+            check_in=datetime(2031, 3, 1, tzinfo=timezone.utc),
+            check_out=datetime(2031, 3, 3, tzinfo=timezone.utc),
+            status="booked"
+        )
+    )
+    after = await repo.list_reservations_by_guest_id(guest_id=guest_id)
+
+    # Assert
+    assert len(after) == len(before) + 1, "Expected the new reservation after our own write"
+    assert result_cache.stats.stale == 1, "Expected the cached entry to be invalidated, not expired"
+
+    await repo.delete_reservation(created.reservation_id)
+    assert len(await repo.list_reservations_by_guest_id(guest_id=guest_id)) == len(before)
+
+
+@pytest.mark.asyncio
+async def test_replica_reads_right_after_a_write_are_not_cached(async_session: AsyncSession):
+    """
+    Tests that a 'list_services' read served by a replica is not cached
+    right after a write to services, while a primary read is.
+    """
+    # Arrange
+    result_cache.clear()
+    repo = ServiceRepository(db=async_session)
+    table_versions.bump("services")
+
+    # Act
+    async_session.info["replica"] = object()
+    try:
+        await repo.list_services()
+        await repo.list_services()
+    finally:
+        del async_session.info["replica"]
+    replica_misses = result_cache.stats.misses
+    await repo.list_services()
+    await repo.list_services()
+
+    # Assert
+    assert replica_misses == 2 and result_cache.stats.replica_skips == 2, "Expected replica reads to skip the cache store"
+    assert result_cache.stats.hits == 1, "Expected the primary read to be cached"
@@ -1,7 +1,9 @@
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.schemas.message import MessagePairSchema, MessageSchema
+from backend.schemas.session import SessionSchema
 from backend.db.repositories.message import MessageRepository
+from backend.db.repositories.session import SessionRepository
 
 @pytest.mark.asyncio
 async def test_add_message_returns_message_pair_schema(async_session: AsyncSession):
@@ -69,6 +71,69 @@ async def test_get_messages_by_session_id(async_session: AsyncSession):
     for msg in messages:
         assert msg.session_id == test_session_id, "Expected session_id to match"
 
+@pytest.mark.asyncio
+async def test_get_recent_messages_by_session_id_returns_latest_in_order(async_session: AsyncSession):
+    """
+    Tests that 'get_recent_messages_by_session_id' in 'MessageRepository' returns
+    only the newest pairs for a session, oldest first.
+    """
+    # Arrange
+    repo = MessageRepository(db=async_session)
+    session = await SessionRepository(db=async_session).add_session(SessionSchema(guest_id=1))
+    test_session_id = session.session_id
+    for i in range(3):
+        await repo.add_message(
+            MessagePairSchema(
+                guest_id=1,
+                session_id=test_session_id,
+                user_message=MessageSchema(content=f"question {i}", role="user"),
+                ai_message=MessageSchema(content=f"answer {i}", role="assistant")
+            )
+        )
+
+    # Act
+    messages = await repo.get_recent_messages_by_session_id(session_id=test_session_id, limit=2)
+
+    # Assert
+    assert [m.user_message.content for m in messages] == ["question 1", "question 2"], "Expected the two newest pairs, oldest first"
+    assert messages[0].message_id < messages[1].message_id, "Expected ascending message_id order"
+
+    # Cleanup
+    await repo.delete_messages_by_session_id(session_id=test_session_id)
+
+@pytest.mark.asyncio
+async def test_add_messages_inserts_batch_and_sets_ids(async_session: AsyncSession):
+    """
+    Tests that 'add_messages' in 'MessageRepository' writes every pair in one
+    batch and sets the generated message_ids in input order.
+    """
+    # Arrange
+    repo = MessageRepository(db=async_session)
+    session = await SessionRepository(db=async_session).add_session(SessionSchema(guest_id=1))
+    pairs = [
+        MessagePairSchema(
+            guest_id=1,
+            session_id=session.session_id,
+            user_message=MessageSchema(content=f"batch question {i}", role="user"),
+            ai_message=MessageSchema(content=f"batch answer {i}", role="assistant"),
+            transcript=b"\x00binary"
+        )
+        for i in range(3)
+    ]
+
+    # Act
+    message_ids = await repo.add_messages(pairs)
+    stored = await repo.get_recent_messages_by_session_id(session_id=session.session_id, limit=3)
+
+    # Assert
+    assert message_ids == sorted(message_ids) and len(set(message_ids)) == 3
+    assert [p.message_id for p in pairs] == message_ids, "Expected ids set on the schemas"
+    assert [m.user_message.content for m in stored] == [f"batch question {i}" for i in range(3)]
+    assert stored[0].transcript == b"\x00binary"
+
+    # Cleanup
+    await repo.delete_messages_by_session_id(session_id=session.session_id)
+
 @pytest.mark.asyncio
 async def test_delete_messages_by_session_id(async_session: AsyncSession):
     """
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import text
+
+from backend.db import session as db_session
+from backend.db.models import Session
+
+
+@pytest.mark.asyncio
+async def test_get_db_session_reuses_shared_engine():
+    """
+    Tests that 'get_db_session' lazily creates a single engine and
+    session factory, and that the pool counters track checkouts.
+    """
+    # Arrange
+    await db_session.dispose_engine()
+
+    # Act
+    for _ in range(3):
+        async for session in db_session.get_db_session():
+            await session.execute(text("SELECT 1"))
+    engine = db_session.engine
+    stats = db_session.get_pool_stats()["primary"]
+
+    # Assert
+    assert engine is not None, "Expected get_db_session to initialise the engine"
+    assert stats["checkouts"] == 3, "Expected one checkout per session"
+    assert stats["checkins"] == 3, "Expected every connection to be returned to the pool"
+    assert stats["connects"] == 1, "Expected pooled connections to be reused"
+    assert stats["pool_size"] == db_session.DB_POOL_SIZE
+
+    await db_session.dispose_engine()
+    assert db_session.engine is None, "Expected dispose_engine to drop the engine"
+
+
+@pytest.mark.asyncio
+async def test_read_session_routes_reads_to_replica_and_writes_to_primary():
+    """
+    Tests that 'get_read_db_session' sends SELECTs to a replica and
+    sticks to the primary once the session has written.
+    """
+    # Arrange
+    await db_session.dispose_engine()
+    db_session.init_engine(replica_urls=[db_session.DATABASE_URL])
+    primary = db_session.engine.sync_engine
+    replica = db_session.replica_engines[0].sync_engine
+
+    async for session in db_session.get_read_db_session():
+        # Act / Assert
+        await session.execute(text("SELECT 1"))
+        assert session.sync_session.get_bind(clause=text("SELECT 1")) is replica, "Expected reads on the replica"
+        stats = db_session.get_pool_stats()
+        assert stats["replicas"][0]["checkouts"] == 1, "Expected the read counted on the replica's pool"
+        assert stats["primary"]["checkouts"] == 0, "Expected nothing counted on the primary's pool"
+
+        session.add(Session(guest_id=1))
+        await session.flush()
+        assert session.sync_session.get_bind(clause=text("SELECT 1")) is primary, "Expected reads on the primary after a write"
+        await session.rollback()
+
+    async for session in db_session.get_read_db_session():
+        db_session.pin_to_primary(session)
+        assert session.sync_session.get_bind(clause=text("SELECT 1")) is primary, "Expected pinned sessions on the primary"
+
+    await db_session.dispose_engine()
@@ -1,7 +1,13 @@
+import asyncio
+from datetime import datetime, timezone
+
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from backend.db.repositories.reservation import ReservationRepository
+from backend.db.models import Reservation
+from backend.db.repositories.reservation import ReservationRepository, RoomUnavailableError
+from backend.db.repositories.room import stay_range
 from backend.schemas.reservation import ReservationSchema
 
 
@@ -72,6 +78,9 @@ async def test_create_reservation(async_session: AsyncSession):
     assert isinstance(created_reservation, ReservationSchema)
     assert created_reservation.reservation_id is not None
 
+    # cleanup: the stay would hold room 101 for the next run
+    await repo.delete_reservation(created_reservation.reservation_id)
+
 
 @pytest.mark.asyncio
 async def test_create_reservation_invalid_date(async_session: AsyncSession):
@@ -89,4 +98,113 @@ async def test_create_reservation_invalid_date(async_session: AsyncSession):
     )
 
     with pytest.raises(ValueError, match="check_in must be before check_out"):
-        await repo.create_reservation(new_res)
\ No newline at end of file
+        await repo.create_reservation(new_res)
+
+@pytest.mark.asyncio
+async def test_list_reservations_keyset_pagination(async_session: AsyncSession):
+    """
+    Tests that 'list_reservations' with after_id/limit walks every
+    reservation exactly once, in reservation_id order.
+    """
+    # arrange
+    repo = ReservationRepository(db=async_session)
+    everything = await repo.list_reservations()
+
+    # act
+    paged, after_id = [], None
+    while True:
+        page = await repo.list_reservations(after_id=after_id, limit=3)
+        if not page:
+            break
+        paged.extend(page)
+        after_id = page[-1].reservation_id
+
+    # assert
+    ids = [r.reservation_id for r in paged]
+    assert ids == sorted(ids), "Expected pages in reservation_id order"
+    assert ids == [r.reservation_id for r in everything], "Expected every reservation exactly once"
+
+
+@pytest.mark.asyncio
+async def test_create_reservation_rejects_overlapping_stay_in_same_room(async_session: AsyncSession):
+    """
+    Tests that 'create_reservation' in 'ReservationRepository' raises
+    RoomUnavailableError when an active reservation already holds the room
+    for an overlapping stay, and allows back-to-back and cancelled stays.
+    """
+    # arrange
+    repo = ReservationRepository(db=async_session)
+    stay = dict(guest_id=1, room_id=102, status="booked")
+    first = await repo.create_reservation(
+        ReservationSchema(**stay, check_in="2031-05-01T14:00:00Z", check_out="2031-05-04T12:00:00Z")
+    )
+
+    # act / assert
+    with pytest.raises(RoomUnavailableError):
+        await repo.create_reservation(
+            ReservationSchema(**stay, check_in="2031-05-03T14:00:00Z", check_out="2031-05-05T12:00:00Z")
+        )
+
+    back_to_back = await repo.create_reservation(
+        ReservationSchema(**stay, check_in="2031-05-04T12:00:00Z", check_out="2031-05-06T12:00:00Z")
+    )
+    cancelled = await repo.create_reservation(
+        ReservationSchema(guest_id=1, room_id=102, status="cancelled", check_in="2031-05-02T14:00:00Z", check_out="2031-05-03T12:00:00Z")
+    )
+    assert back_to_back.reservation_id is not None, "Expected a stay starting at the previous check-out to be allowed"
+    assert cancelled.reservation_id is not None, "Expected cancelled reservations not to hold the room"
+
+    # cleanup
+    for reservation in (first, back_to_back, cancelled):
+        await repo.delete_reservation(reservation.reservation_id)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_overlapping_group_bookings_book_each_room_once(async_session: AsyncSession):
+    """
+    Tests that two concurrent 'create_reservations' calls in 'ReservationRepository'
+    for overlapping stays in the same rooms cannot both commit: one raises
+    RoomUnavailableError and writes nothing, and no room ends up double-booked.
+    """
+    # arrange
+    sessions = async_sessionmaker(async_session.bind, expire_on_commit=False)
+    rooms = [103, 104, 105]
+
+    def block(check_in, check_out):
+        return [
+            ReservationSchema(guest_id=1, room_id=room_id, check_in=check_in, check_out=check_out, status="booked")
+            for room_id in rooms
+        ]
+
+    async def book(reservations):
+        async with sessions() as db:
+            return await ReservationRepository(db=db).create_reservations(reservations)
+
+    # act
+    results = await asyncio.gather(
+        book(block("2032-02-01T14:00:00Z", "2032-02-05T12:00:00Z")),
+        book(block("2032-02-03T14:00:00Z", "2032-02-07T12:00:00Z")),
+        return_exceptions=True
+    )
+
+    # assert
+    booked = [r for r in results if isinstance(r, list)]
+    rejected = [r for r in results if isinstance(r, RoomUnavailableError)]
+    assert len(booked) == 1 and len(rejected) == 1, f"Expected exactly one group booking to win, got {results}"
+
+    result = await async_session.execute(
+        select(Reservation).where(
+            Reservation.room_id.in_(rooms),
+            Reservation.status != "cancelled",
+            stay_range(Reservation.check_in, Reservation.check_out).op("&&")(
+                stay_range(datetime(2032, 2, 1, tzinfo=timezone.utc), datetime(2032, 2, 8, tzinfo=timezone.utc))
+            )
+        )
+    )
+    stored = result.scalars().all()
+    assert sorted(r.room_id for r in stored) == rooms, "Expected each room to be booked once, by the winning block"
+
+    # cleanup
+    repo = ReservationRepository(db=async_session)
+    for reservation in booked[0]:
+        await repo.delete_reservation(reservation.reservation_id)
@@ -1,8 +1,12 @@
 import pytest
+import datetime
+from random import randint
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.repositories.room import RoomRepository
+from backend.db.repositories.reservation import ReservationRepository
 from backend.schemas.room import RoomSchema
+from backend.schemas.reservation import ReservationSchema
 
 
 @pytest.mark.asyncio
@@ -146,3 +150,38 @@ async def test_update_room_available_returns_false_for_nonexistent_room(async_se
 
     # Assert
     assert result is False, "Expected update_room_available to return False for a nonexistent room"
+
+
+@pytest.mark.asyncio
+async def test_list_available_rooms_by_type_excludes_overlapping_reservations(async_session: AsyncSession):
+    """
+    Tests that 'list_available_rooms_by_type' with dates leaves out rooms
+    with an overlapping reservation, and treats check_out as exclusive.
+    """
+    # Arrange
+    repo = RoomRepository(db=async_session)
+    reservation_repo = ReservationRepository(db=async_session)
+    check_in = datetime.datetime(2040 + randint(0, 50), 3, 1, 14, tzinfo=datetime.timezone.utc)
+    check_out = check_in + datetime.timedelta(days=3)
+    booked = await reservation_repo.create_reservation(ReservationSchema(
+        guest_id=1, room_id=101, check_in=check_in, check_out=check_out, status="booked"
+    ))
+
+    try:
+        # Act
+        overlapping = await repo.list_available_rooms_by_type(
+            "single", check_in + datetime.timedelta(days=1), check_out + datetime.timedelta(days=1)
+        )
+        back_to_back = await repo.list_available_rooms_by_type(
+            "single", check_out, check_out + datetime.timedelta(days=2)
+        )
+        first_free = await repo.find_available_room("single", check_in, check_out)
+
+        # Assert
+        overlapping_ids = [r.room_id for r in overlapping]
+        assert 101 not in overlapping_ids, "Expected the booked room to be unavailable"
+        assert 102 in overlapping_ids, "Expected a single room without a reservation to be available"
+        assert 101 in [r.room_id for r in back_to_back], "Expected the room to be free from check_out onwards"
+        assert first_free.room_id != 101 and first_free.room_id in overlapping_ids, "Expected a free single room"
+    finally:
+        await reservation_repo.delete_reservation(booked.reservation_id)
@@ -6,7 +6,8 @@ from httpx._transports.asgi import ASGITransport
 from starlette.status import HTTP_401_UNAUTHORIZED
 import time 
 from backend.db.session import get_db_session
-from backend.services.auth import get_token_from_cookie, validate_guest, create_access_token
+from backend.services import auth
+from backend.services.auth import get_token_from_cookie, validate_guest, validate_admin, create_access_token
 
 app = FastAPI()
 
@@ -17,6 +18,10 @@ async def protected_route(
 ):
     return {"success": True, "guest": guest}
 
+@app.get("/admin", dependencies=[Depends(validate_admin)])
+async def admin_route():
+    return {"success": True}
+
 @pytest_asyncio.fixture
 async def client():
     transport = ASGITransport(app=app)
@@ -37,3 +42,78 @@ async def test_cookie_present(client: AsyncClient):
     print(f"Response: {response.text}")
 
     assert response.status_code == 200
+
+
+@pytest.fixture
+def signing_key(monkeypatch):
+    from backend.services import auth
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth, "ALGORITHM", "HS256")
+    auth.verified_tokens.clear()
+    yield auth
+    auth.verified_tokens.clear()
+
+@pytest.mark.asyncio
+async def test_repeat_requests_skip_decode_and_db(client: AsyncClient, signing_key, monkeypatch):
+    """
+    Tests that a second request with the same token is validated from the
+    verified-token and guest caches, without a JWT decode or DB query.
+    """
+    from backend.db.cache import result_cache
+    auth = signing_key
+    decodes = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+
+    token_value = create_access_token(3, "chris.cheeseburger@oddmail.net")
+    claims = real_decode(token_value, "test-secret", algorithms=["HS256"])
+    assert claims["exp"] > claims["iat"], "Expected the token to carry iat/exp"
+
+    client.cookies.set("access-token", token_value)
+    first = await client.get("/protected")
+    hits_before = result_cache.stats.hits
+    second = await client.get("/protected")
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert len(decodes) == 1, "Expected the token to be decoded only once"
+    assert result_cache.stats.hits == hits_before + 1, "Expected the guest to come from the cache"
+
+@pytest.mark.asyncio
+async def test_expired_token_is_rejected(client: AsyncClient, signing_key, monkeypatch):
+    """
+    Tests that a token past its exp claim gets a 401.
+    """
+    monkeypatch.setattr(signing_key, "ACCESS_TOKEN_EXPIRE_MINUTES", -1)
+    client.cookies.set("access-token", create_access_token(3, "chris.cheeseburger@oddmail.net"))
+
+    response = await client.get("/protected")
+
+    assert response.status_code == HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_admin_route_requires_matching_token(client: AsyncClient, monkeypatch):
+    """
+    Tests that 'validate_admin' rejects a missing or wrong X-Admin-Token
+    and lets a matching one through.
+    """
+    monkeypatch.setattr(auth, "ADMIN_API_TOKEN", "s3cret")
+
+    missing = await client.get("/admin")
+    wrong = await client.get("/admin", headers={"X-Admin-Token": "guess"})
+    right = await client.get("/admin", headers={"X-Admin-Token": "s3cret"})
+
+    assert missing.status_code == HTTP_401_UNAUTHORIZED
+    assert wrong.status_code == HTTP_401_UNAUTHORIZED
+    assert right.status_code == 200
+
+@pytest.mark.asyncio
+async def test_admin_route_disabled_without_configured_token(client: AsyncClient, monkeypatch):
+    """
+    Tests that 'validate_admin' refuses every request while ADMIN_API_TOKEN is unset.
+    """
+    monkeypatch.setattr(auth, "ADMIN_API_TOKEN", None)
+
+    response = await client.get("/admin", headers={"X-Admin-Token": ""})
+
+    assert response.status_code == 403
@@ -0,0 +1,94 @@
+import pytest
+import asyncio
+import datetime
+from random import randint
+
+from backend.db.occupancy import OccupancyMatrix, occupancy
+from backend.db.repositories.reservation import ReservationRepository
+from backend.services.availability import AvailabilityService
+from backend.schemas.availability import AvailabilitySchema
+from backend.schemas.reservation import ReservationSchema
+
+@pytest.mark.asyncio
+async def test_get_availability_tracks_reservation_writes(async_session):
+    """
+    Tests 'get_availability' in 'AvailabilityService'.
+    Free counts should drop when a reservation is created and recover
+    when it is deleted, without rebuilding the occupancy matrix.
+    """
+    service = AvailabilityService(db=async_session)
+    reservation_repo = ReservationRepository(db=async_session)
+    await occupancy.build(async_session)
+
+    start = datetime.date.today() + datetime.timedelta(days=randint(30, 300))
+    end = start + datetime.timedelta(days=3)
+
+    before = await service.get_availability(start, end, room_type="suite")
+    assert isinstance(before, AvailabilitySchema)
+    assert len(before.nights) == 3
+    assert list(before.free_rooms) == ["suite"]
+
+    # stay for the first two nights only
+    check_in = datetime.datetime.combine(start, datetime.time(14), tzinfo=datetime.timezone.utc)
+    created = await reservation_repo.create_reservation(ReservationSchema(
+        guest_id=1,
+        room_id=121,
+        check_in=check_in,
+        check_out=check_in + datetime.timedelta(days=2, hours=-2),
+        status="booked"
+    ))
+
+    during = await service.get_availability(start, end, room_type="suite")
+    expected = [before.free_rooms["suite"][0] - 1, before.free_rooms["suite"][1] - 1, before.free_rooms["suite"][2]]
+    assert during.free_rooms["suite"] == expected
+
+    await reservation_repo.delete_reservation(created.reservation_id)
+    after = await service.get_availability(start, end, room_type="suite")
+    assert after.free_rooms == before.free_rooms
+
+@pytest.mark.asyncio
+async def test_get_availability_rejects_window_outside_matrix(async_session):
+    """
+    Tests that 'get_availability' raises ValueError for windows
+    the occupancy matrix does not cover.
+    """
+    service = AvailabilityService(db=async_session)
+    await occupancy.build(async_session)
+
+    far_future = datetime.date.today() + datetime.timedelta(days=5000)
+    with pytest.raises(ValueError):
+        await service.get_availability(far_future, far_future + datetime.timedelta(days=1))
+
+
+@pytest.mark.asyncio
+async def test_occupancy_build_keeps_writes_made_during_its_reads(async_session):
+    """
+    Tests that a reservation applied to 'OccupancyMatrix' while 'build'
+    is waiting on its reads is still counted in the rebuilt matrix.
+    """
+    # Arrange
+    matrix = OccupancyMatrix()
+    await matrix.build(async_session)
+    start = datetime.date.today() + datetime.timedelta(days=randint(30, 300))
+    check_in = datetime.datetime.combine(start, datetime.time(14), tzinfo=datetime.timezone.utc)
+    # only in memory: the rebuild's reads cannot see it
+    reservation = ReservationSchema(
+        reservation_id=10**12,
+        guest_id=1,
+        room_id=121,
+        check_in=check_in,
+        check_out=check_in + datetime.timedelta(days=1),
+        status="booked"
+    )
+    before = matrix.free_counts(start, start + datetime.timedelta(days=1), "suite")["suite"][0]
+
+    # Act
+    rebuild = asyncio.create_task(matrix.build(async_session))
+    await asyncio.sleep(0)
+    matrix.apply(reservation)
+    await rebuild
+
+    # Assert
+    after = matrix.free_counts(start, start + datetime.timedelta(days=1), "suite")["suite"][0]
+    assert after == before - 1, "Expected the write made during the rebuild to survive it"
+    assert matrix._journals == [], "Expected the build to drop its journal"
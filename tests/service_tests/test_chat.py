@@ -1,4 +1,6 @@
+import asyncio
 import pytest
+from types import SimpleNamespace
 import pytest_asyncio
 from fastapi import FastAPI, Depends
 from httpx import AsyncClient
@@ -8,7 +10,12 @@ import time
 from backend.db.session import get_db_session
 from backend.services.auth import get_token_from_cookie, validate_guest, create_access_token
 from backend.schemas.message import MessageSchema
+from backend.services.agent import RunMemo, _serialized
+from backend.schemas.guest import GuestSchema
 from backend.services.chat import ChatService
+from backend.schemas.message import MessagePairSchema
+from backend.services.history import encode_transcript, estimate_pair_tokens, fit_to_budget, to_model_messages
+from pydantic_ai.messages import ModelRequest, ModelResponse, SystemPromptPart, TextPart, ToolCallPart, ToolReturnPart, UserPromptPart
 
 @pytest.mark.asyncio
 async def test_send_message(async_session):
@@ -28,3 +35,125 @@ async def test_send_message(async_session):
 
     # Assert
     assert isinstance(response, MessageSchema), "Expected the added message to match the input message"
+
+
+def test_fit_to_budget_keeps_newest_pairs_in_order():
+    """
+    Tests that 'fit_to_budget' drops the oldest pairs once the
+    token budget is exceeded and keeps the rest in order.
+    """
+    # Arrange
+    pairs = [
+        MessagePairSchema(
+            message_id=i,
+            guest_id=1,
+            session_id=1,
+            user_message=MessageSchema(content="x" * 40, role="user"),
+            ai_message=MessageSchema(content="y" * 40, role="assistant")
+        )
+        for i in range(5)
+    ]
+    budget = estimate_pair_tokens(pairs[0]) * 2
+
+    # Act
+    kept = fit_to_budget(pairs, budget)
+    history = to_model_messages(kept)
+
+    # Assert
+    assert [p.message_id for p in kept] == [3, 4], "Expected only the two newest pairs"
+    assert len(history) == 4, "Expected a request and a response per pair"
+    assert history[0].kind == "request" and history[1].kind == "response"
+
+
+def test_transcript_replays_tool_calls_without_prompt_context():
+    """
+    Tests that a turn stored with 'encode_transcript' replays its tool call and
+    result, with the guest's own text as the prompt and no system prompt.
+    """
+    # Arrange
+    turn = [
+        ModelRequest(parts=[SystemPromptPart(content="system"), UserPromptPart(content="<context> show my bookings")]),
+        ModelResponse(parts=[ToolCallPart.from_raw_args("get_reservations", {}, "call_1")]),
+        ModelRequest(parts=[ToolReturnPart(tool_name="get_reservations", content=[{"reservation_id": 1}], tool_call_id="call_1")]),
+        ModelResponse(parts=[TextPart(content="You have one booking.")]),
+    ]
+    pair = MessagePairSchema(
+        guest_id=1,
+        session_id=1,
+        user_message=MessageSchema(content="show my bookings", role="user"),
+        ai_message=MessageSchema(content="You have one booking.", role="assistant"),
+        transcript=encode_transcript(turn, "show my bookings")
+    )
+
+    # Act
+    replayed = to_model_messages([pair])
+
+    # Assert
+    assert [p.part_kind for m in replayed for p in m.parts] == ["user-prompt", "tool-call", "tool-return", "text"]
+    assert replayed[0].parts[0].content == "show my bookings", "Expected the injected context to be dropped"
+    assert replayed[2].parts[0].content == [{"reservation_id": 1}]
+    assert "transcript" not in pair.model_dump(), "Expected the transcript to stay out of dumps"
+
+
+@pytest.mark.asyncio
+async def test_run_memo_loads_each_read_once_until_invalidated():
+    """
+    Tests that 'RunMemo' shares one load per key, reloads after invalidate
+    and does not keep failed loads.
+    """
+    # Arrange
+    memo = RunMemo()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return len(calls)
+
+    async def fail():
+        raise ValueError("db down")
+
+    # Act
+    first = await memo.get(("reservations", 1), load)
+    second = await memo.get(("reservations", 1), load)
+    memo.invalidate(("reservations", 1))
+    third = await memo.get(("reservations", 1), load)
+    with pytest.raises(ValueError):
+        await memo.get(("services",), fail)
+    retried = await memo.get(("services",), load)
+
+    # Assert
+    assert (first, second, third) == (1, 1, 2), "Expected a reload only after invalidation"
+    assert retried == 3, "Expected a failed load to be retried"
+    assert memo.stats() == {"loads": 4, "hits": 1}
+
+
+@pytest.mark.asyncio
+async def test_serialized_tools_for_one_guest_never_overlap():
+    """
+    Tests that mutating tools wrapped in '_serialized' run one at a time for
+    the same guest and mark the run as having written.
+    """
+    # Arrange
+    running = {1: 0, 2: 0}
+    overlap = {1: 0, 2: 0}
+
+    @_serialized
+    async def write(ctx):
+        guest_id = ctx.deps.guest.guest_id
+        running[guest_id] += 1
+        overlap[guest_id] = max(overlap[guest_id], running[guest_id])
+        await asyncio.sleep(0.01)
+        running[guest_id] -= 1
+
+    def ctx_for(guest_id):
+        guest = GuestSchema(guest_id=guest_id, full_name="John Tester", email="test@email.org")
+        return SimpleNamespace(deps=SimpleNamespace(guest=guest, wrote=False))
+
+    contexts = [ctx_for(1), ctx_for(1), ctx_for(1), ctx_for(2)]
+
+    # Act
+    await asyncio.gather(*(write(ctx) for ctx in contexts))
+
+    # Assert
+    assert overlap[1] == 1, "Expected writes for one guest to be serialized"
+    assert all(ctx.deps.wrote for ctx in contexts), "Expected later reads to be pinned to the primary"
@@ -0,0 +1,37 @@
+import pytest
+import gzip
+import json
+
+from backend.services.export import ExportService
+from backend.db.repositories.reservation import ReservationRepository
+
+@pytest.mark.asyncio
+async def test_export_reservations_ndjson(async_session):
+    """
+    Tests 'export' in 'ExportService'.
+    The NDJSON dump should contain every reservation once, in id order,
+    and the gzip variant should decompress to the same bytes.
+    """
+    service = ExportService(db=async_session, batch_size=3)
+    reservations = await ReservationRepository(db=async_session).list_reservations()
+
+    plain = b"".join([chunk async for chunk in service.export("reservations", "ndjson")])
+    compressed = b"".join([chunk async for chunk in service.export("reservations", "ndjson", compress=True)])
+
+    rows = [json.loads(line) for line in plain.decode().splitlines()]
+    assert [r["reservation_id"] for r in rows] == [r.reservation_id for r in reservations]
+    assert gzip.decompress(compressed) == plain
+
+@pytest.mark.asyncio
+async def test_export_guests_csv_has_single_header(async_session):
+    """
+    Tests that a CSV export written across several batches
+    only writes the header row once.
+    """
+    service = ExportService(db=async_session, batch_size=2)
+
+    dump = b"".join([chunk async for chunk in service.export("guests", "csv")]).decode()
+
+    lines = dump.splitlines()
+    assert lines[0].startswith("guest_id,full_name,email")
+    assert sum(1 for line in lines if line.startswith("guest_id,")) == 1
@@ -0,0 +1,45 @@
+from backend.loadtest import Sample, parse_mix, response_cache_report, summarize
+
+
+def test_summarize_reports_percentiles_ttft_and_error_kinds():
+    """
+    Tests that 'summarize' in the load test harness reports throughput and
+    latency over successful requests, TTFT for chat and errors by kind.
+    """
+    # Arrange
+    samples = [Sample("services", True, latency=(i + 1) / 1000) for i in range(100)]
+    samples += [
+        Sample("chat", True, latency=1.0, ttft=0.2),
+        Sample("chat", False, latency=0.5, error="chat_error_frame"),
+        Sample("services", False, latency=0.1, error="http_500"),
+    ]
+
+    # Act
+    report = summarize(samples, elapsed=10.0)
+
+    # Assert
+    services = report["scenarios"]["services"]
+    assert services["ok"] == 100 and services["error_kinds"] == {"http_500": 1}
+    assert services["throughput_rps"] == 10.0
+    assert services["latency"]["p50_ms"] == 50.5 and services["latency"]["max_ms"] == 100.0
+    assert report["scenarios"]["chat"]["ttft"]["p50_ms"] == 200.0
+    assert "ttft" not in services, "Expected TTFT only for streamed scenarios"
+    assert report["total"]["errors"] == 2
+    assert parse_mix("chat=3,services=1") == {"chat": 3.0, "services": 1.0}
+
+
+def test_response_cache_report_counts_hits_during_the_run():
+    """
+    Tests that 'response_cache_report' in the load test harness reports the
+    cache state and only the hits and misses between the two snapshots.
+    """
+    # Arrange
+    before = {"enabled": True, "hits": 5, "misses": 10}
+    after = {"enabled": True, "hits": 35, "misses": 20}
+
+    # Act
+    report = response_cache_report(before, after)
+
+    # Assert
+    assert report == {"enabled": True, "hits": 30, "misses": 10, "hit_rate": 0.75}
+    assert response_cache_report(None, after) is None, "Expected no block when the app has no cache metrics"
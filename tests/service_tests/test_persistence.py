@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.services import persistence
+from backend.db.repositories.message import MessageRepository
+from backend.db.repositories.session import SessionRepository
+from backend.schemas.message import MessagePairSchema, MessageSchema
+from backend.schemas.session import SessionSchema
+from backend.services import chat
+from backend.services.chat import ChatService
+from backend.services.persistence import MessageWriter
+
+
+@pytest.mark.asyncio
+async def test_message_writer_keeps_turns_pending_until_flushed(async_session, monkeypatch):
+    """
+    Tests that 'MessageWriter' returns from submit at once, reports queued
+    turns as pending and writes them in one batch on flush.
+    """
+    # Arrange
+    session = await SessionRepository(db=async_session).add_session(SessionSchema(guest_id=1))
+    writer = MessageWriter(
+        batch_size=10,
+        interval=60,
+        session_factory=async_sessionmaker(async_session.bind, expire_on_commit=False)
+    )
+    monkeypatch.setattr(persistence, "schedule_compaction", lambda session_id: None)
+    pairs = [
+        MessagePairSchema(
+            guest_id=1,
+            session_id=session.session_id,
+            user_message=MessageSchema(content=f"queued {i}", role="user"),
+            ai_message=MessageSchema(content=f"reply {i}", role="assistant")
+        )
+        for i in range(2)
+    ]
+
+    # Act
+    for pair in pairs:
+        writer.submit(pair)
+    pending_ids = [p.message_id for p in writer.pending(session.session_id)]
+    written = await writer.flush()
+    await writer.close()
+    stored = await MessageRepository(db=async_session).get_messages_by_session_id(session.session_id)
+
+    # Assert
+    assert pending_ids == [None, None], "Expected both turns pending, not yet written"
+    assert written == 2 and all(p.message_id for p in pairs)
+    assert writer.stats.written == 2 and writer.stats.batches == 1, "Expected both turns in one batch"
+    assert writer.pending(session.session_id) == [], "Expected nothing pending after the flush"
+    assert sorted(m.user_message.content for m in stored) == ["queued 0", "queued 1"]
+
+
+@pytest.mark.asyncio
+async def test_message_writer_drops_only_the_rejected_turn_of_a_failed_batch(async_session, monkeypatch):
+    """
+    Tests that when one pair in a batch violates a constraint, 'MessageWriter'
+    still writes the others and drops only the offending pair.
+    """
+    # Arrange
+    session = await SessionRepository(db=async_session).add_session(SessionSchema(guest_id=1))
+    writer = MessageWriter(
+        batch_size=10,
+        interval=60,
+        session_factory=async_sessionmaker(async_session.bind, expire_on_commit=False)
+    )
+    monkeypatch.setattr(persistence, "schedule_compaction", lambda session_id: None)
+
+    def pair(session_id, i):
+        return MessagePairSchema(
+            guest_id=1,
+            session_id=session_id,
+            user_message=MessageSchema(content=f"turn {i}", role="user"),
+            ai_message=MessageSchema(content=f"reply {i}", role="assistant")
+        )
+
+    # a session that no longer exists: its row fails the foreign key
+    pairs = [pair(session.session_id, 0), pair(999999, 1), pair(session.session_id, 2)]
+
+    # Act
+    for p in pairs:
+        writer.submit(p)
+    written = await writer.flush()
+    await writer.close()
+    stored = await MessageRepository(db=async_session).get_messages_by_session_id(session.session_id)
+
+    # Assert
+    assert written == 2, "Expected the two valid turns to be written"
+    assert writer.stats.failed_batches == 1 and writer.stats.dropped == 1, "Expected only the bad turn dropped"
+    assert writer.get_stats()["in_flight"] == 0, "Expected nothing left to retry"
+    assert sorted(m.user_message.content for m in stored) == ["turn 0", "turn 2"]
+
+
+@pytest.mark.asyncio
+async def test_load_history_keeps_a_turn_written_during_the_history_query(async_session, monkeypatch):
+    """
+    Tests that 'ChatService._load_history' still replays a queued turn whose
+    write commits after the history query has read the database.
+    """
+    # Arrange
+    session = await SessionRepository(db=async_session).add_session(SessionSchema(guest_id=1))
+    writer = MessageWriter(
+        batch_size=10,
+        interval=60,
+        session_factory=async_sessionmaker(async_session.bind, expire_on_commit=False)
+    )
+    monkeypatch.setattr(persistence, "schedule_compaction", lambda session_id: None)
+    monkeypatch.setattr(chat, "message_writer", writer)
+    writer.submit(MessagePairSchema(
+        guest_id=1,
+        session_id=session.session_id,
+        user_message=MessageSchema(content="queued", role="user"),
+        ai_message=MessageSchema(content="reply", role="assistant")
+    ))
+
+    service = ChatService(db=async_session, guest_id=1, full_name="John Tester", email="test@email.org")
+    query = service.message_repo.get_recent_messages_by_session_id
+
+    async def query_then_flush(*args, **kwargs):
+        pairs = await query(*args, **kwargs)
+        await writer.flush()
+        return pairs
+
+    monkeypatch.setattr(service.message_repo, "get_recent_messages_by_session_id", query_then_flush)
+
+    # Act
+    await service._load_history(session.session_id)
+    await writer.close()
+
+    # Assert
+    assert writer.stats.written == 1, "Expected the turn to be written during the query"
+    assert service.token_report.history_pairs == 1, "Expected the turn in the history"
@@ -135,4 +135,64 @@ async def test_cancel_reservation(async_session):
 
     # now cancel
     result = await service.cancel_reservation(created.reservation_id)
-    assert result is True, "Expected successful cancellation"
\ No newline at end of file
+    assert result is True, "Expected successful cancellation"
+
+@pytest.mark.asyncio
+async def test_create_group_reservation(async_session):
+    """
+    Tests 'create_group_reservation' in 'ReservationService'.
+    A block across room types should get one distinct room per reservation.
+    """
+    service = ReservationService(db=async_session)
+    guest = GuestSchema(guest_id=1, full_name="John Tester", email="test@email.org")
+
+    check_in = datetime.datetime(2040 + randint(0, 50), 5, 1, 14, tzinfo=zoneinfo.ZoneInfo("UTC"))
+    check_out = check_in + datetime.timedelta(days=2)
+
+    created = await service.create_group_reservation(
+        guest=guest,
+        rooms={"single": 3, "double": 2},
+        check_in=check_in,
+        check_out=check_out
+    )
+
+    try:
+        assert len(created) == 5
+        assert all(isinstance(r, ReservationSchema) and r.reservation_id is not None for r in created)
+        assert len({r.room_id for r in created}) == 5, "Expected every reservation on a different room"
+    finally:
+        # the rooms would stay held for these dates on the next run
+        for reservation in created:
+            await service.reservation_repo.delete_reservation(reservation.reservation_id)
+
+
+@pytest.mark.asyncio
+async def test_create_group_reservation_is_all_or_nothing(async_session):
+    """
+    Tests that 'create_group_reservation' books nothing when
+    one of the requested room types cannot be satisfied.
+    """
+    service = ReservationService(db=async_session)
+    guest = GuestSchema(guest_id=1, full_name="John Tester", email="test@email.org")
+
+    check_in = datetime.datetime(2040 + randint(0, 50), 6, 1, 14, tzinfo=zoneinfo.ZoneInfo("UTC"))
+    check_out = check_in + datetime.timedelta(days=2)
+    before = await service.get_reservations_for_guest(1)
+
+    try:
+        with pytest.raises(ValueError):
+            await service.create_group_reservation(
+                guest=guest,
+                rooms={"single": 2, "suite": 11},
+                check_in=check_in,
+                check_out=check_out
+            )
+
+        after = await service.get_reservations_for_guest(1)
+        assert len(after) == len(before), "Expected no reservations to be created"
+    finally:
+        # if the block was (wrongly) booked, do not leave it holding the rooms
+        before_ids = {r.reservation_id for r in before}
+        for reservation in await service.get_reservations_for_guest(1):
+            if reservation.reservation_id not in before_ids:
+                await service.reservation_repo.delete_reservation(reservation.reservation_id)
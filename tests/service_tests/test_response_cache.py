@@ -0,0 +1,122 @@
+from datetime import datetime
+
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, ToolCallPart, UserPromptPart
+
+from backend.schemas.guest import GuestSchema
+from backend.schemas.reservation import ReservationSchema
+from backend.schemas.service import ServiceSchema
+from backend.services.response_cache import ResponseCache
+
+SERVICES = [ServiceSchema(service_id=1, name="wake up call", description="A call", price=5.0)]
+GUEST = GuestSchema(guest_id=1, full_name="John Tester", email="test@email.org")
+OTHER_GUEST = GuestSchema(guest_id=2, full_name="Jane Other", email="jane@email.org")
+RESERVATIONS = [
+    ReservationSchema(
+        reservation_id=1, guest_id=1, room_id=1, status="confirmed",
+        check_in=datetime(2025, 3, 1), check_out=datetime(2025, 3, 4)
+    )
+]
+
+
+def _turn(*tool_names: str) -> list:
+    messages = [ModelRequest(parts=[UserPromptPart(content="question")])]
+    if tool_names:
+        messages.append(ModelResponse(parts=[ToolCallPart.from_raw_args(name, {}) for name in tool_names]))
+    messages.append(ModelResponse(parts=[TextPart(content="answer")]))
+    return messages
+
+
+def test_response_cache_shares_general_answers_and_scopes_guest_answers():
+    """
+    Tests that 'ResponseCache' serves a general answer to any guest for the
+    same normalized question, but keeps an answer that read the guest's
+    reservations to that guest and their current reservations.
+    """
+    # Arrange
+    cache = ResponseCache(max_entries=10, ttl=60, enabled=True)
+    cache.put("What services do you offer?", SERVICES, [], OTHER_GUEST, _turn("list_all_services"), "We offer wake up calls.")
+    cache.put("When do I check in?", SERVICES, RESERVATIONS, GUEST, _turn("get_reservations"), "On March 1st.")
+
+    # Act
+    shared = cache.get("  what SERVICES do you offer ", SERVICES, [], GUEST)
+    own = cache.get("when do i check in", SERVICES, RESERVATIONS, GUEST)
+    other = cache.get("when do i check in", SERVICES, [], OTHER_GUEST)
+    changed = cache.get("when do i check in", SERVICES, [RESERVATIONS[0].model_copy(update={"room_id": 2})], GUEST)
+    cache.put("Yes, book it", SERVICES, [], GUEST, _turn(), "Booked.", previous_reply="Shall I book the spa?")
+    follow_up = cache.get("yes book it", SERVICES, [], GUEST, previous_reply="Anything else?")
+
+    # Assert
+    assert shared == "We offer wake up calls."
+    assert own == "On March 1st."
+    assert other is None, "Expected a guest-specific answer to stay with that guest"
+    assert changed is None, "Expected a reservation change to invalidate the answer"
+    assert follow_up is None, "Expected a follow-up in a different conversation to miss"
+    assert cache.get_stats()["hits"] == 2 and cache.get_stats()["misses"] == 3
+
+
+def test_response_cache_skips_turns_that_changed_state():
+    """
+    Tests that 'ResponseCache' does not store a turn that called a mutating tool.
+    """
+    # Arrange
+    cache = ResponseCache(max_entries=10, ttl=60, enabled=True)
+
+    # Act
+    stored = cache.put("Cancel my booking", SERVICES, RESERVATIONS, GUEST, _turn("cancel_reservation"), "Done.")
+
+    # Assert
+    assert stored is False
+    assert cache.get("Cancel my booking", SERVICES, RESERVATIONS, GUEST) is None
+
+
+def test_response_cache_keeps_answers_from_prompt_state_to_that_guest():
+    """
+    Tests that an answer given from the reservations in the prompt, without
+    any tool call or quoted guest details, is never served to another guest.
+    """
+    # Arrange
+    cache = ResponseCache(max_entries=10, ttl=60, enabled=True)
+    cache.put("When do I check out?", SERVICES, RESERVATIONS, GUEST, _turn(), "You check out of room 7 on March 4th.")
+    cache.put("What services do you offer?", SERVICES, [], OTHER_GUEST, _turn(), "You have no bookings yet.")
+
+    # Act
+    other = cache.get("when do i check out", SERVICES, [], OTHER_GUEST)
+    own = cache.get("when do i check out", SERVICES, RESERVATIONS, GUEST)
+    shared_to_booked_guest = cache.get("what services do you offer", SERVICES, RESERVATIONS, GUEST)
+
+    # Assert
+    assert other is None, "Expected guest 1's reservation answer to stay with guest 1"
+    assert own == "You check out of room 7 on March 4th."
+    assert shared_to_booked_guest is None, "Expected answers given without reservations to skip guests who have some"
+
+
+def test_response_cache_answers_self_contained_questions_in_any_conversation():
+    """
+    Tests that 'ResponseCache' serves a self-contained question asked after
+    different earlier turns, but keeps follow-ups and answers that refer back
+    to the conversation they were given in.
+    """
+    # Arrange
+    cache = ResponseCache(max_entries=10, ttl=60, enabled=True)
+    cache.put(
+        "What services do you offer?", SERVICES, [], GUEST, _turn("list_all_services"),
+        "We offer wake up calls.", previous_reply="Hello! How can I help?"
+    )
+    cache.put(
+        "Is breakfast included in the price?", SERVICES, [], GUEST, _turn(),
+        "As I mentioned, breakfast is extra.", previous_reply="Breakfast costs extra."
+    )
+
+    # Act
+    other_session = cache.get("What services do you offer?", SERVICES, [], GUEST, previous_reply="Your room is ready.")
+    first_turn = cache.get("What services do you offer?", SERVICES, [], GUEST)
+    pronoun = cache.get("How much does that cost?", SERVICES, [], GUEST, previous_reply="Your room is ready.")
+    refers_back = cache.get("Is breakfast included in the price?", SERVICES, [], GUEST, previous_reply="Your room is ready.")
+    same_session = cache.get("Is breakfast included in the price?", SERVICES, [], GUEST, previous_reply="Breakfast costs extra.")
+
+    # Assert
+    assert other_session == "We offer wake up calls.", "Expected earlier turns not to matter for a self-contained question"
+    assert first_turn == "We offer wake up calls."
+    assert pronoun is None
+    assert refers_back is None, "Expected an answer that refers back to stay with its conversation"
+    assert same_session == "As I mentioned, breakfast is extra."
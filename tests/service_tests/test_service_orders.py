@@ -123,3 +123,63 @@ async def test_delete_service_orders_for_reservation(async_session):
     # 3) confirm they're gone
     remaining_orders = await service.list_service_orders_by_reservation_id(reservation_id=3)
     assert len(remaining_orders) == 0, "Expected no service orders for reservation_id=3 after delete"
+
+@pytest.mark.asyncio
+async def test_create_service_orders(async_session):
+    """
+    Tests 'create_service_orders' in 'ServiceOrderService'.
+    Every order in the batch should be created and returned in input order.
+    """
+    service = ServiceOrderService(db=async_session)
+
+    orders = [
+        ServiceOrderSchema(reservation_id=4, service_id=1, quantity=1, status="pending"),
+        ServiceOrderSchema(reservation_id=4, service_id=2, quantity=3, status="pending"),
+        ServiceOrderSchema(reservation_id=5, service_id=1, quantity=2, status="pending"),
+    ]
+    created = await service.create_service_orders(orders)
+
+    assert len(created) == 3
+    assert all(o.order_id is not None for o in created)
+    assert [(o.reservation_id, o.service_id, o.quantity) for o in created] == [(4, 1, 1), (4, 2, 3), (5, 1, 2)]
+
+@pytest.mark.asyncio
+async def test_create_service_orders_rejects_unknown_service(async_session):
+    """
+    Tests that 'create_service_orders' creates nothing when
+    any service_id in the batch does not exist.
+    """
+    service = ServiceOrderService(db=async_session)
+    before = await service.list_service_orders_by_reservation_id(reservation_id=6)
+
+    with pytest.raises(ValueError):
+        await service.create_service_orders([
+            ServiceOrderSchema(reservation_id=6, service_id=1, quantity=1, status="pending"),
+            ServiceOrderSchema(reservation_id=6, service_id=999999, quantity=1, status="pending"),
+        ])
+
+    after = await service.list_service_orders_by_reservation_id(reservation_id=6)
+    assert len(after) == len(before), "Expected no orders to be created"
+
+
+@pytest.mark.asyncio
+async def test_create_service_orders_rejects_unknown_reservation_and_bad_quantity(async_session):
+    """
+    Tests that 'create_service_orders' raises ValueError and creates nothing when
+    a reservation_id does not exist or a quantity is not positive.
+    """
+    service = ServiceOrderService(db=async_session)
+    before = await service.list_service_orders_by_reservation_id(reservation_id=6)
+
+    with pytest.raises(ValueError, match="Reservations"):
+        await service.create_service_orders([
+            ServiceOrderSchema(reservation_id=6, service_id=1, quantity=1, status="pending"),
+            ServiceOrderSchema(reservation_id=999999, service_id=1, quantity=1, status="pending"),
+        ])
+    with pytest.raises(ValueError, match="quantity"):
+        await service.create_service_orders([
+            ServiceOrderSchema(reservation_id=6, service_id=1, quantity=0, status="pending"),
+        ])
+
+    after = await service.list_service_orders_by_reservation_id(reservation_id=6)
+    assert len(after) == len(before), "Expected no orders to be created"
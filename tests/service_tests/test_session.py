@@ -46,9 +46,10 @@ async def test_get_session_from_session_id(async_session):
     """
     # arrange
     service = SessionService(db= async_session)
+    created = await service.create_session(guest_id=1)
 
     # Act
-    session = await service.get_session_from_session_id(session_id=7)
+    session = await service.get_session_from_session_id(session_id=created.session_id)
 
     # Assert
     assert isinstance(session, SessionSchema), "Expected the retrieved session to match the input session"
@@ -0,0 +1,128 @@
+import json
+import time
+import asyncio
+import pytest
+
+from backend.services.streaming import ChatEvent, DeltaCoalescer, ndjson_frames, sse_events, STREAM_PROTOCOL_VERSION
+
+
+async def _events(*events):
+    for event in events:
+        yield event
+
+
+async def _failing_events():
+    yield ChatEvent("delta", {"text": "partial"})
+    raise RuntimeError("boom")
+
+
+@pytest.mark.asyncio
+async def test_ndjson_frames_coalesce_deltas_and_end_with_done():
+    """
+    Tests that 'ndjson_frames' sends the first delta at once, groups the rest
+    by size, flushes before the final frame and numbers every frame.
+    """
+    # Arrange
+    deltas = [ChatEvent("delta", {"text": "ab"}) for _ in range(10)]
+    done = ChatEvent("done", {"message_id": 7, "usage": {"total_tokens": 3}})
+
+    # Act
+    lines = [line async for line in ndjson_frames(_events(*deltas, done), DeltaCoalescer(max_chars=8, max_delay=60))]
+    frames = [json.loads(line) for line in lines]
+
+    # Assert
+    assert [f["text"] for f in frames if f["type"] == "delta"] == ["ab", "abababab", "abababab", "ab"]
+    assert frames[-1]["type"] == "done" and frames[-1]["message_id"] == 7
+    assert [f["seq"] for f in frames] == list(range(1, len(frames) + 1)), "Expected consecutive seq numbers"
+    assert all(f["v"] == STREAM_PROTOCOL_VERSION for f in frames)
+
+
+@pytest.mark.asyncio
+async def test_ndjson_frames_flush_buffered_text_while_the_stream_is_quiet():
+    """
+    Tests that 'ndjson_frames' sends buffered text once max_delay has passed
+    even when no further event arrives to trigger it.
+    """
+    # Arrange
+    async def slow_events():
+        yield ChatEvent("delta", {"text": "Let me "})
+        yield ChatEvent("delta", {"text": "check"})
+        await asyncio.sleep(0.5)  # e.g. a slow tool call
+        yield ChatEvent("done", {"message_id": 1})
+
+    started = time.monotonic()
+    arrivals = []
+
+    # Act
+    async for line in ndjson_frames(slow_events(), DeltaCoalescer(max_chars=1000, max_delay=0.05)):
+        arrivals.append((json.loads(line), time.monotonic() - started))
+
+    # Assert
+    assert [(f["type"], f.get("text")) for f, _ in arrivals] == [("delta", "Let me "), ("delta", "check"), ("done", None)]
+    assert arrivals[1][1] < 0.3, "Expected the buffered delta to go out before the next event arrived"
+
+
+@pytest.mark.asyncio
+async def test_ndjson_frames_end_with_error_frame_on_failure():
+    """
+    Tests that a failure mid-turn flushes buffered text and ends the stream
+    with an error frame instead of raising.
+    """
+    # Act
+    frames = [json.loads(line) async for line in ndjson_frames(_failing_events())]
+
+    # Assert
+    assert [f["type"] for f in frames] == ["delta", "error"]
+    assert frames[0]["text"] == "partial"
+
+
+@pytest.mark.asyncio
+async def test_sse_events_name_events_and_send_heartbeats_as_comments():
+    """
+    Tests that 'sse_events' writes typed SSE events with increasing ids and
+    turns heartbeats into comment lines.
+    """
+    # Arrange
+    events = _events(
+        ChatEvent("tool_start", {"tool": "get_reservations", "args": {}}),
+        ChatEvent("heartbeat"),
+        ChatEvent("tool_end", {"tool": "get_reservations", "ok": True}),
+        ChatEvent("delta", {"text": "Hi"}),
+        ChatEvent("done", {"message_id": 1}),
+    )
+
+    # Act
+    messages = [m async for m in sse_events(events)]
+
+    # Assert
+    assert messages[1] == ": heartbeat\n\n", "Expected the heartbeat as an SSE comment"
+    assert messages[3] == 'id: 3\nevent: token\ndata: {"text": "Hi"}\n\n'
+    assert [m.split("\n")[1] for m in messages if not m.startswith(":")] == [
+        "event: tool_start", "event: tool_end", "event: token", "event: done"
+    ]
+
+
+def test_ws_chat_rejects_malformed_messages_and_stays_open():
+    """
+    Tests that '/ws/chat' answers a malformed message or a cancel with no
+    running turn without closing the connection.
+    """
+    # Arrange
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.routes.chat import router
+
+    app = FastAPI()
+    app.include_router(router)
+
+    # Act
+    with TestClient(app) as client, client.websocket_connect("/ws/chat") as ws:
+        ws.send_json({"type": "cancel"})
+        ws.send_json({"type": "unknown"})
+        first = ws.receive_json()
+        ws.send_json({"type": "message", "message": ""})
+        second = ws.receive_json()
+
+    # Assert
+    assert first["type"] == "error" and first["v"] == STREAM_PROTOCOL_VERSION
+    assert second["type"] == "error", "Expected the connection to survive a bad message"
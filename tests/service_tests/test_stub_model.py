@@ -0,0 +1,52 @@
+import pytest
+from pydantic_ai import Agent, RunContext
+
+from backend.services.stub_model import StubModel, StubModelError
+
+
+def _agent_with_services_tool(calls: list) -> Agent:
+    agent = Agent("test", defer_model_check=True)
+
+    @agent.tool
+    async def list_all_services(ctx: RunContext[None]) -> list:
+        calls.append("list_all_services")
+        return ["wake up call", "hot water"]
+
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_stub_model_calls_matching_tool_then_streams_answer():
+    """
+    Tests that 'StubModel' calls the read tool the guest's message asks about,
+    ignoring the injected context, and streams a templated answer of the
+    configured length.
+    """
+    # Arrange
+    calls = []
+    agent = _agent_with_services_tool(calls)
+    stub = StubModel(ttft=0, tokens_per_second=0, error_rate=0, response_words=20)
+    prompt = "<system prompt> this guest currently has these reservations: [] <user prompt> What services do you offer?"
+
+    # Act
+    async with agent.run_stream(prompt, model=stub.as_model()) as result:
+        text = await result.get_data()
+
+    # Assert
+    assert calls == ["list_all_services"]
+    assert text.startswith("I checked for you and found 2 results from list_all_services.")
+    assert len(text.split()) == 20
+
+
+@pytest.mark.asyncio
+async def test_stub_model_fails_at_configured_error_rate():
+    """
+    Tests that 'StubModel' raises a simulated provider error when error_rate is 1.
+    """
+    # Arrange
+    agent = _agent_with_services_tool([])
+    stub = StubModel(ttft=0, tokens_per_second=0, error_rate=1)
+
+    # Act / Assert
+    with pytest.raises(StubModelError):
+        await agent.run("hello", model=stub.as_model())
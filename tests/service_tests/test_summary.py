@@ -0,0 +1,81 @@
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from backend.db.repositories.message import MessageRepository
+from backend.db.repositories.session import SessionRepository
+from backend.schemas.message import MessagePairSchema, MessageSchema
+from backend.schemas.session import SessionSchema
+from backend.services.summary import (
+    CHAT_SUMMARY_KEEP_PAIRS,
+    CHAT_SUMMARY_MIN_PAIRS,
+    SummaryService,
+    summarizer
+)
+
+
+async def _new_session_with_pairs(async_session, count: int) -> int:
+    session = await SessionRepository(db=async_session).add_session(SessionSchema(guest_id=1))
+    repo = MessageRepository(db=async_session)
+    for i in range(count):
+        await repo.add_message(
+            MessagePairSchema(
+                guest_id=1,
+                session_id=session.session_id,
+                user_message=MessageSchema(content=f"question {i}", role="user"),
+                ai_message=MessageSchema(content=f"answer {i}", role="assistant")
+            )
+        )
+    return session.session_id
+
+
+def _fake_summary(messages, info) -> ModelResponse:
+    prompt = messages[-1].parts[-1].content
+    return ModelResponse(parts=[TextPart(content=f"summary of {prompt.count('Guest:')} turns")])
+
+
+@pytest.mark.asyncio
+async def test_compact_folds_turns_older_than_the_recent_window(async_session):
+    """
+    Tests that 'compact' in 'SummaryService' summarizes every pair except the
+    last CHAT_SUMMARY_KEEP_PAIRS and records how far the summary reaches.
+    """
+    # Arrange
+    folded = CHAT_SUMMARY_MIN_PAIRS + 1
+    session_id = await _new_session_with_pairs(async_session, CHAT_SUMMARY_KEEP_PAIRS + folded)
+    pairs = await MessageRepository(db=async_session).get_messages_by_session_id(session_id)
+    service = SummaryService(db=async_session)
+
+    # Act
+    with summarizer.override(model=FunctionModel(_fake_summary)):
+        updated = await service.compact(session_id)
+    session = await SessionRepository(db=async_session).get_session_by_id(session_id)
+    recent = await MessageRepository(db=async_session).get_recent_messages_by_session_id(
+        session_id, limit=100, after_id=session.summary_through_message_id
+    )
+
+    # Assert
+    assert updated is True, "Expected the summary to be updated"
+    assert session.summary == f"summary of {folded} turns"
+    assert session.summary_through_message_id == sorted(p.message_id for p in pairs)[folded - 1]
+    assert len(recent) == CHAT_SUMMARY_KEEP_PAIRS, "Expected only the recent window to remain unsummarized"
+
+
+@pytest.mark.asyncio
+async def test_compact_skips_short_sessions(async_session):
+    """
+    Tests that 'compact' in 'SummaryService' leaves the summary alone until
+    enough pairs have aged out of the recent window.
+    """
+    # Arrange
+    session_id = await _new_session_with_pairs(async_session, CHAT_SUMMARY_KEEP_PAIRS + CHAT_SUMMARY_MIN_PAIRS - 1)
+    service = SummaryService(db=async_session)
+
+    # Act
+    with summarizer.override(model=FunctionModel(_fake_summary)):
+        updated = await service.compact(session_id)
+    session = await SessionRepository(db=async_session).get_session_by_id(session_id)
+
+    # Assert
+    assert updated is False, "Expected no compaction below the threshold"
+    assert session.summary is None
@@ -0,0 +1,50 @@
+import json
+import pytest
+
+from backend.services.tracing import RunTrace, TraceSink
+
+
+def test_run_trace_keeps_only_the_newest_events():
+    """
+    Tests that 'RunTrace' acts as a ring buffer and counts what it dropped.
+    """
+    # Arrange
+    trace = RunTrace(session_id=1, guest_id=1, capacity=3)
+
+    # Act
+    for i in range(5):
+        trace.record("tool_call", step=i)
+    schema = trace.to_schema()
+
+    # Assert
+    assert [e.data["step"] for e in schema.events] == [2, 3, 4], "Expected the three newest events"
+    assert schema.dropped_events == 2, "Expected the overwritten events to be counted"
+
+
+@pytest.mark.asyncio
+async def test_trace_sink_flushes_batches_and_rotates(tmp_path):
+    """
+    Tests that 'TraceSink.flush' appends finished runs as JSONL in one batch,
+    rotates the file once it is full, and keeps recent runs queryable.
+    """
+    # Arrange
+    sink = TraceSink(directory=str(tmp_path), max_bytes=1, backups=2)
+    for session_id in (1, 2, 1):
+        trace = sink.start_run(session_id=session_id, guest_id=1)
+        trace.record("run_complete")
+        sink.finish(trace)
+
+    # Act
+    first = await sink.flush()
+    trace = sink.start_run(session_id=3, guest_id=1)
+    sink.finish(trace)
+    second = await sink.flush()
+
+    # Assert
+    assert (first, second) == (3, 1), "Expected each flush to write the pending batch"
+    rotated = (tmp_path / "chat_traces.jsonl.1").read_text().splitlines()
+    current = (tmp_path / "chat_traces.jsonl").read_text().splitlines()
+    assert len(rotated) == 3 and len(current) == 1, "Expected the full file to be rotated before the second batch"
+    assert json.loads(current[0])["session_id"] == 3
+    assert [t.session_id for t in sink.recent_traces(10, session_id=1)] == [1, 1]
+    assert sink.recent_traces(1)[0].session_id == 3, "Expected newest traces first"
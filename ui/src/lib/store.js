@@ -1,5 +1,7 @@
 import { create } from 'zustand'
 
+const STREAM_PROTOCOL_VERSION = 1;
+
 const useChat = create((set, get) => ({
     messages: [],
     isThinking: false,
@@ -39,14 +41,45 @@ const useChat = create((set, get) => ({
                 throw new Error('Network response was not ok');
             }
 
-            // Stream partial text
+            // Stream protocol v1: one JSON frame per line, {v, seq, type, ...}.
+            // "delta" frames carry only new text, "done" closes the turn
+            // (usage, session_id) and "error" reports a failure mid-stream.
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
             let buffer = "";
-
-            // We'll add a "partial AI message" to track text as it arrives
-            // or we can keep appending new messages, your choice
             let partialText = "";
+            let lastSeq = 0;
+
+            const appendText = (text) => {
+                partialText += text;
+                set(state => {
+                    const lastMessage = state.messages[state.messages.length - 1];
+                    if (lastMessage && !lastMessage.isUser) {
+                        // It's the partial AI msg
+                        lastMessage.text = partialText;
+                        return { ...state, messages: [...state.messages], isThinking: false }
+                    }
+                    // First chunk from AI -> push new AI msg
+                    return {
+                        ...state,
+                        messages: [...state.messages, { text: partialText, isUser: false }]
+                    }
+                });
+            };
+
+            const handleFrame = (frame) => {
+                if (frame.v !== STREAM_PROTOCOL_VERSION) {
+                    throw new Error(`Unsupported stream protocol version ${frame.v}`);
+                }
+                if (frame.seq <= lastSeq) return; // duplicate
+                lastSeq = frame.seq;
+
+                if (frame.type === "delta") {
+                    appendText(frame.text);
+                } else if (frame.type === "error") {
+                    throw new Error(frame.error);
+                }
+            };
 
             while (true) {
                 const { value, done } = await reader.read();
@@ -60,25 +93,7 @@ const useChat = create((set, get) => ({
                 for (let i = 0; i < lines.length - 1; i++) {
                     const line = lines[i].trim();
                     if (line) {
-                        const parsed = JSON.parse(line);
-                        partialText = parsed.message;
-
-                        // Update messages with partialText
-                        // If you want a single message that keeps being updated, do this:
-                        set(state => {
-                            const lastMessage = state.messages[state.messages.length - 1];
-                            if (lastMessage && !lastMessage.isUser) {
-                                // It's the partial AI msg
-                                lastMessage.text = partialText;
-                                return { ...state, messages: [...state.messages], isThinking: false}
-                            } else {
-                                // First chunk from AI -> push new AI msg
-                                return {
-                                    ...state,
-                                    messages: [...state.messages, { text: partialText, isUser: false }]
-                                }
-                            }
-                        });
+                        handleFrame(JSON.parse(line));
                     }
                 }
                 // leftover partial